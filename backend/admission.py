@@ -0,0 +1,35 @@
+import math
+import time
+from typing import Optional
+
+
+class QueueFullError(Exception):
+    """Raised instead of queueing work when a model's queue is full"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Whole seconds for the Retry-After header"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class DeadlineExceededError(Exception):
+    """Raised for work whose deadline passed before it started"""
+
+
+def deadline_after(timeout_ms: Optional[float]) -> Optional[float]:
+    """time.monotonic() deadline timeout_ms from now, or None without a timeout"""
+    return None if timeout_ms is None else time.monotonic() + timeout_ms / 1000
+
+
+def expired(deadline: Optional[float]) -> bool:
+    """Whether a time.monotonic() deadline has passed"""
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def estimate_retry_after(waiting: int, slots: int, mean_seconds: float) -> float:
+    """Seconds until the work queued ahead of a new request has likely drained"""
+    return waiting / max(slots, 1) * mean_seconds
@@ -0,0 +1,28 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+def is_newer_than_weights(model_path: str, derived_path: str) -> bool:
+    """Whether a file built from the model weights in model_path (an export or quantized cache) exists and postdates them"""
+    if not os.path.exists(derived_path):
+        return False
+    weights = [os.path.join(model_path, name) for name in os.listdir(model_path)
+               if name.endswith((".safetensors", ".bin")) and name != "training_args.bin"]
+    return all(os.path.getmtime(derived_path) >= os.path.getmtime(path) for path in weights)
+
+
+@contextmanager
+def atomic_path(path: str) -> Iterator[str]:
+    """
+    A temporary path to write the new content of path to. It replaces path only once the
+    block completes, so neither a crash nor a concurrent reader ever sees a half-written file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
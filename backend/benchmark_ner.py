@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for Lease Buddy NER models
+
+Runs the NER backends over the lease documents in datasets/dataset-master and
+prints latency and entity statistics for the configurations being compared.
+The script imports main.py, so it needs the same environment as the API server.
+
+Usage:
+    python benchmark_ner.py bert-windows
+    python benchmark_ner.py health-under-load --url http://localhost:8000
+    python benchmark_ner.py throughput --url http://localhost:8000 --requests 200
+    python benchmark_ner.py spacy-profile --model spacy
+    python benchmark_ner.py spacy-profile --model spacy_bert
+    python benchmark_ner.py bert-variants --models bert bert-int8 bert_onnx
+    python benchmark_ner.py paragraph-hit-rate
+    python benchmark_ner.py cascade
+    python benchmark_ner.py prefilter --models bert spacy_bert
+    python benchmark_ner.py response-size --copies 5
+"""
+
+import argparse
+import asyncio
+import glob
+import gzip
+import json
+import os
+import re
+import statistics
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+import requests
+from docx import Document
+
+import main
+from paragraph_memo import paragraph_hit_rate
+from cascade import CascadeStats, run_cascade
+from region_prefilter import candidate_windows, is_covered
+from fast_json import dumps
+
+
+DATASET_DIR = "./datasets/dataset-master"
+TEST_DATASET_DIR = "./datasets/dataset-master/testing"
+
+
+def read_docx_file(file_path: str) -> str:
+    """Read text from a .docx file the same way the tagged datasets were built"""
+    doc = Document(file_path)
+    return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+
+
+def load_documents(dataset_dir: str = DATASET_DIR, limit: int = None) -> Dict[str, str]:
+    """Load every lease document in the dataset directory"""
+    paths = sorted(glob.glob(os.path.join(dataset_dir, "*.docx")))
+    if limit:
+        paths = paths[:limit]
+    return {os.path.basename(path): read_docx_file(path) for path in paths}
+
+
+def load_test_documents(limit: int = None) -> Dict[str, str]:
+    """Load the held-out test leases"""
+    return load_documents(TEST_DATASET_DIR, limit)
+
+
+def time_calls(func: Callable, inputs: List, repeat: int = 1) -> List[float]:
+    """Time func on every input and return the latencies in milliseconds"""
+    latencies = []
+    for item in inputs:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(item)
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize_latencies(latencies: List[float]) -> str:
+    """Format mean, p50 and p95 of a latency sample"""
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"mean {statistics.mean(ordered):8.1f} ms | p50 {statistics.median(ordered):8.1f} ms | p95 {p95:8.1f} ms"
+
+
+def benchmark_bert_windows(args):
+    """Compare the single-window BERT path with the sliding-window mode"""
+    config = main.MODEL_CONFIGS["bert"]
+    model_dict = main.load_bert_model(
+        config["path"],
+        window_size=args.window_size or config["window_size"],
+        stride=args.stride or config["stride"]
+    )
+    documents = load_documents(limit=args.limit)
+    tokenizer = model_dict["tokenizer"]
+    token_counts = [len(tokenizer(text, add_special_tokens=False, verbose=False)["input_ids"]) for text in documents.values()]
+    content_size = model_dict["window_size"] - 2
+
+    print(f"Documents: {len(documents)} | tokens per document: mean {statistics.mean(token_counts):.0f}, max {max(token_counts)}")
+    print(f"Window size {model_dict['window_size']}, stride {model_dict['stride']}")
+    print("-" * 80)
+
+    for mode, sliding in [("single-window", False), ("sliding-window", True)]:
+        model_dict["sliding_window"] = sliding
+        entity_counts = [len(main.extract_entities_bert(text, model_dict)) for text in documents.values()]
+        latencies = time_calls(lambda text: main.extract_entities_bert(text, model_dict), list(documents.values()), args.repeat)
+        covered = sum(count if sliding else min(count, content_size) for count in token_counts)
+        print(f"{mode:15s} | {summarize_latencies(latencies)} | "
+              f"tokens seen {covered / sum(token_counts):6.1%} | entities {sum(entity_counts)}")
+
+
+def load_with_memory(loader: Callable):
+    """Call loader and return its result with the memory allocated while loading, in bytes"""
+    tracemalloc.start()
+    try:
+        result = loader()
+        memory, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, memory
+
+
+def benchmark_spacy_profile(args):
+    """Compare the full spaCy pipeline with the NER-only profile and check they find the same entities"""
+    path = main.MODEL_CONFIGS[args.model]["path"]
+    load = main.load_spacy_bert_model if args.model == "spacy_bert" else main.load_spacy_model
+    documents = load_test_documents(limit=args.limit)
+    texts = list(documents.values())
+
+    results = {}
+    for profile, ner_only in [("full pipeline", False), ("ner only", True)]:
+        nlp, memory = load_with_memory(lambda: load(path, ner_only=ner_only))
+        results[profile] = [main.extract_entities_spacy(text, nlp) for text in texts]
+        latencies = time_calls(lambda text: main.extract_entities_spacy(text, nlp), texts, args.repeat)
+        print(f"{profile:13s} | components {len(nlp.pipe_names)} | load memory {memory / 1024 ** 2:7.1f} MB | "
+              f"{summarize_latencies(latencies)}")
+
+    mismatched = [name for name, full, ner_only in zip(documents, results["full pipeline"], results["ner only"])
+                  if full != ner_only]
+    if mismatched:
+        print(f"Entities differ on {len(mismatched)} of {len(texts)} test documents: {', '.join(mismatched)}")
+    else:
+        print(f"Entities identical on all {len(texts)} test documents")
+
+
+def benchmark_bert_variants(args):
+    """Compare BERT backends and variants with the first one on the test leases"""
+    documents = load_test_documents(limit=args.limit)
+    texts = list(documents.values())
+    reference = args.models[0]
+
+    results = {}
+    for model_name in args.models:
+        model_dict = main.load_model(model_name)
+        batch_size = main.MODEL_CONFIGS[model_name]["batch_size"]
+        results[model_name] = main.extract_entities_bert_batch(texts, model_dict, batch_size)
+        latencies = time_calls(lambda text: main.extract_entities_bert(text, model_dict), texts, args.repeat)
+        start = time.perf_counter()
+        main.extract_entities_bert_batch(texts, model_dict, batch_size)
+        throughput = len(texts) / (time.perf_counter() - start)
+        mismatched = sum(entities != expected for entities, expected in zip(results[model_name], results[reference]))
+        print(f"{model_name:9s} | {summarize_latencies(latencies)} | batched throughput {throughput:6.2f} docs/s | "
+              f"entities differ from {reference} on {mismatched}/{len(texts)} documents")
+
+
+def sample_health_latency(url: str, duration: float, interval: float = 0.05) -> List[float]:
+    """Poll /health for duration seconds and return the latencies in milliseconds"""
+    latencies = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        requests.get(f"{url}/health", timeout=30)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+    return latencies
+
+
+def benchmark_health_under_load(args):
+    """Measure /health latency on a running server, idle and while BERT requests saturate it"""
+    documents = list(load_documents(limit=args.limit).values())
+    stop = threading.Event()
+    completed = []
+
+    def send_extractions(worker: int):
+        index = worker
+        while not stop.is_set():
+            text = documents[index % len(documents)]
+            response = requests.post(f"{args.url}/extract-entities", json={"text": text, "model": args.model}, timeout=300)
+            completed.append(response.status_code)
+            index += args.concurrency
+
+    idle = sample_health_latency(args.url, args.duration)
+    workers = [threading.Thread(target=send_extractions, args=(worker,), daemon=True) for worker in range(args.concurrency)]
+    for worker in workers:
+        worker.start()
+    # Give the load a moment to fill the inference queues
+    time.sleep(1)
+    loaded = sample_health_latency(args.url, args.duration)
+    stop.set()
+
+    print(f"/health idle          | {summarize_latencies(idle)}")
+    print(f"/health under {args.concurrency:3d} {args.model:6s} | {summarize_latencies(loaded)}")
+    print(f"extraction requests completed during the run: {len(completed)}")
+
+
+def benchmark_throughput(args):
+    """Measure documents per second a running server sustains with concurrent clients"""
+    documents = list(load_documents(limit=args.limit).values())
+    payloads = [{"text": documents[i % len(documents)], "model": args.model} for i in range(args.requests)]
+
+    def send(payload):
+        start = time.perf_counter()
+        response = requests.post(f"{args.url}/extract-entities", json=payload, timeout=600)
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        latencies = list(executor.map(send, payloads))
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} {args.model} requests, {args.concurrency} concurrent clients")
+    print(f"throughput {args.requests / elapsed:8.2f} docs/s | {summarize_latencies(latencies)}")
+
+
+def benchmark_paragraph_hit_rate(args):
+    """Share of paragraphs the paragraph cache would serve when tagging the corpus in order"""
+    documents = load_documents(args.dataset_dir, args.limit)
+    stats = paragraph_hit_rate(documents.values())
+    print(f"{len(documents)} documents, {stats['paragraphs']} paragraphs, {stats['unique_paragraphs']} unique")
+    print(f"paragraph hit rate {stats['hit_rate']:.1%} | character hit rate {stats['char_hit_rate']:.1%}")
+
+
+def benchmark_cascade(args):
+    """Accuracy and latency of the spaCy-first cascade against always running the transformer, on the golden leases"""
+    from ner_evaluation import entity_values, evaluate_predictions, format_report, load_golden_data, read_lease_text
+
+    golden = load_golden_data()
+    paths = [path for path in golden if os.path.exists(path)]
+    texts = [read_lease_text(path) for path in paths]
+    main.model_registry.preload([args.first, args.second])
+
+    async def extract_with(model_name, batch):
+        return main.extract_entities_batch(model_name, batch)
+
+    stats = CascadeStats()
+    runs = {
+        args.second: lambda text, stats: main.extract_entities_batch(args.second, [text])[0],
+        "auto": lambda text, stats: asyncio.run(run_cascade(
+            [text], lambda batch: extract_with(args.first, batch), lambda batch: extract_with(args.second, batch), stats
+        ))[0]
+    }
+    reports = {}
+    for name, run in runs.items():
+        # Only the first pass counts towards the cascade statistics
+        results = [run(text, stats) for text in texts]
+        latencies = time_calls(lambda text: run(text, None), texts, args.repeat)
+        reports[name] = evaluate_predictions({path: entity_values(entities) for path, entities in zip(paths, results)}, golden)
+        print(f"{name:10s} | {summarize_latencies(latencies)}")
+
+    cascade = stats.get_stats()
+    print(f"decided by {args.first} alone: {cascade['decided_by_first_model']}/{cascade['documents']} documents | "
+          f"share of text sent to {args.second}: {cascade['escalated_text_share']:.1%}")
+    print(f"escalations per label: {cascade['label_escalations']}")
+    print(format_report(reports))
+
+
+def benchmark_prefilter(args):
+    """Golden values inside the prefilter windows, BERT tokens they save and, per model, F1 with and without them"""
+    from transformers import AutoTokenizer
+    from ner_evaluation import ENTITY_COLUMNS, entity_values, evaluate_predictions, format_report, load_golden_data, read_lease_text
+
+    golden = load_golden_data()
+    paths = [path for path in golden if os.path.exists(path)]
+    texts = [read_lease_text(path) for path in paths]
+    windows = [candidate_windows(text, args.radius) for text in texts]
+
+    tokenizer = AutoTokenizer.from_pretrained(main.MODEL_CONFIGS["bert"]["path"])
+    count_tokens = lambda text: len(tokenizer(text, add_special_tokens=False)["input_ids"])
+    all_tokens = sum(count_tokens(text) for text in texts)
+    window_tokens = sum(count_tokens(text[start:end]) for text, text_windows in zip(texts, windows) for start, end in text_windows)
+    print(f"{len(texts)} golden leases, radius {args.radius}: {window_tokens}/{all_tokens} tokens kept "
+          f"({1 - window_tokens / all_tokens:.1%} fewer)")
+
+    # A golden value is within reach of the model if one of its occurrences lies inside a window
+    for column in ENTITY_COLUMNS:
+        found = covered = 0
+        for path, text, text_windows in zip(paths, texts, windows):
+            value = golden[path][column].strip()
+            occurrences = [match.span() for match in re.finditer(re.escape(value), text)] if value else []
+            if occurrences:
+                found += 1
+                covered += any(is_covered(text_windows, start, end) for start, end in occurrences)
+        print(f"{column:25s} | golden values inside a window {covered:3d}/{found:3d}")
+
+    reports = {}
+    for model_name in args.models:
+        full = main.extract_entities_batch(model_name, texts)
+        window_results = iter(main.extract_entities_batch(
+            model_name, [text[start:end] for text, text_windows in zip(texts, windows) for start, end in text_windows]
+        ))
+        prefiltered = [
+            main.to_document_offsets([(start, text[start:end]) for start, end in text_windows],
+                                     [next(window_results) for _ in text_windows])
+            for text, text_windows in zip(texts, windows)
+        ]
+        for name, results in ((model_name, full), (f"{model_name}+prefilter", prefiltered)):
+            reports[name] = evaluate_predictions({path: entity_values(entities) for path, entities in zip(paths, results)}, golden)
+    if reports:
+        print(format_report(reports))
+
+
+def benchmark_response_size(args):
+    """Serialization time and bytes on the wire of the validated NERResponse vs the fast path, with and without the text"""
+    documents = list(load_documents(limit=args.limit).values())
+    # Stand-in for a long lease: each document repeated, entities on every run of capitalized words.
+    # That is far more spans than a model finds, so the entity share of the payload is overstated.
+    texts = ["\n".join([text] * args.copies) for text in documents]
+    entities = [
+        [main.Entity(text=match.group(), label="LESSEE_NAME", start=match.start(), end=match.end())
+         for match in re.finditer(r"[A-Z][a-z]+(?: [A-Z][a-z]+)+", text)]
+        for text in texts
+    ]
+
+    def validated(index: int) -> bytes:
+        # What FastAPI does with a returned NERResponse: dump, validate against response_model, dump, json.dumps
+        response = main.NERResponse(entities=entities[index], text=texts[index], model="bert")
+        body = main.NERResponse.model_validate(response.model_dump()).model_dump(mode="json")
+        return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    variants = {
+        "validated": validated,
+        "fast": lambda index: dumps(main.ner_content(texts[index], entities[index], "bert")),
+        "fast, no text": lambda index: dumps(main.ner_content(texts[index], entities[index], "bert", echo_text=False))
+    }
+    indices = list(range(len(texts)))
+    print(f"{len(texts)} documents x {args.copies}: mean {statistics.mean(map(len, texts)) / 1000:.0f}k characters, "
+          f"{statistics.mean(map(len, entities)):.0f} entities")
+    for name, serialize in variants.items():
+        latencies = time_calls(serialize, indices, args.repeat)
+        bodies = [serialize(index) for index in indices]
+        raw = statistics.mean(map(len, bodies))
+        compressed = statistics.mean(len(gzip.compress(body)) for body in bodies)
+        print(f"{name:14s} | {summarize_latencies(latencies)} | {raw / 1000:7.1f} kB | gzip {compressed / 1000:6.1f} kB")
+
+
+def main_cli():
+    """Parse arguments and run the selected benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark Lease Buddy NER models")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N documents")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per document")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    windows_parser = subparsers.add_parser("bert-windows", help="Single-window vs sliding-window BERT inference")
+    windows_parser.add_argument("--window-size", type=int, default=None)
+    windows_parser.add_argument("--stride", type=int, default=None)
+    windows_parser.set_defaults(func=benchmark_bert_windows)
+
+    load_parser = subparsers.add_parser("health-under-load", help="/health latency while the server runs BERT requests")
+    load_parser.add_argument("--url", default="http://localhost:8000")
+    load_parser.add_argument("--model", default="bert")
+    load_parser.add_argument("--concurrency", type=int, default=16)
+    load_parser.add_argument("--duration", type=float, default=10, help="Seconds to sample /health in each phase")
+    load_parser.set_defaults(func=benchmark_health_under_load)
+
+    throughput_parser = subparsers.add_parser("throughput", help="docs/sec of a running server under concurrent clients")
+    throughput_parser.add_argument("--url", default="http://localhost:8000")
+    throughput_parser.add_argument("--model", default="bert")
+    throughput_parser.add_argument("--concurrency", type=int, default=32)
+    throughput_parser.add_argument("--requests", type=int, default=200)
+    throughput_parser.set_defaults(func=benchmark_throughput)
+
+    profile_parser = subparsers.add_parser("spacy-profile", help="Full spaCy pipeline vs the NER-only profile")
+    profile_parser.add_argument("--model", default="spacy", choices=["spacy", "spacy_bert"])
+    profile_parser.set_defaults(func=benchmark_spacy_profile)
+
+    variants_parser = subparsers.add_parser("bert-variants", help="BERT backends vs the first one: latency, throughput, parity")
+    variants_parser.add_argument("--models", nargs="+", default=["bert", "bert-int8", "bert_onnx"])
+    variants_parser.set_defaults(func=benchmark_bert_variants)
+
+    paragraphs_parser = subparsers.add_parser("paragraph-hit-rate", help="Paragraphs repeated across the lease corpus")
+    paragraphs_parser.add_argument("--dataset-dir", default=DATASET_DIR)
+    paragraphs_parser.set_defaults(func=benchmark_paragraph_hit_rate)
+
+    cascade_parser = subparsers.add_parser("cascade", help="spaCy-first cascade vs always BERT: golden F1 and latency")
+    cascade_parser.add_argument("--first", default=main.CASCADE_FIRST_MODEL)
+    cascade_parser.add_argument("--second", default=main.CASCADE_SECOND_MODEL)
+    cascade_parser.set_defaults(func=benchmark_cascade)
+
+    prefilter_parser = subparsers.add_parser("prefilter", help="Cue-phrase prefilter: golden recall ceiling, tokens saved, F1")
+    prefilter_parser.add_argument("--radius", type=int, default=main.PREFILTER_RADIUS)
+    prefilter_parser.add_argument("--models", nargs="*", default=[], help="Also compare these models' F1 with and without it")
+    prefilter_parser.set_defaults(func=benchmark_prefilter)
+
+    response_parser = subparsers.add_parser("response-size", help="Response serialization time and bytes for large documents")
+    response_parser.add_argument("--copies", type=int, default=5, help="Repeat each lease this many times")
+    response_parser.set_defaults(func=benchmark_response_size)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,141 @@
+import re
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from ner_evaluation import ENTITY_COLUMNS
+from paragraph_memo import split_paragraphs
+
+# Words that appear next to each label in the leases; a label the first model missed is looked for near them
+LABEL_CUES = {
+    "LESSOR_NAME": re.compile(r"\b(?:lessor|landlord|owner|between)\b", re.IGNORECASE),
+    "LESSEE_NAME": re.compile(r"\b(?:lessee|tenant|between)\b", re.IGNORECASE),
+    "PROPERTY_ADDRESS": re.compile(r"\b(?:premises|property|located|address|street|avenue|road|unit)\b", re.IGNORECASE),
+    "LEASE_START_DATE": re.compile(r"\b(?:commenc\w*|start\w*|begin\w*|effective)\b", re.IGNORECASE),
+    "LEASE_END_DATE": re.compile(r"\b(?:terminat\w*|end\w*|expir\w*|until)\b", re.IGNORECASE),
+    "RENT_AMOUNT": re.compile(r"\b(?:rent|per month|monthly)\b|\$", re.IGNORECASE),
+    "SECURITY_DEPOSIT_AMOUNT": re.compile(r"\b(?:deposit|security)\b", re.IGNORECASE)
+}
+
+MONTHS = r"jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec"
+
+# spaCy has no per-entity confidence, so a value that can't be right for its label counts as low-confidence
+LABEL_CHECKS = {
+    "LESSOR_NAME": re.compile(r"[A-Za-z].*[A-Za-z]"),
+    "LESSEE_NAME": re.compile(r"[A-Za-z].*[A-Za-z]"),
+    "PROPERTY_ADDRESS": re.compile(r"\d"),
+    "LEASE_START_DATE": re.compile(rf"\d|\b(?:{MONTHS})", re.IGNORECASE),
+    "LEASE_END_DATE": re.compile(rf"\d|\b(?:{MONTHS})", re.IGNORECASE),
+    "RENT_AMOUNT": re.compile(r"\d"),
+    "SECURITY_DEPOSIT_AMOUNT": re.compile(r"\d")
+}
+
+
+def uncertain_labels(entities, labels: List[str] = ENTITY_COLUMNS) -> Set[str]:
+    """Labels without any entity that passes the label's check"""
+    confident = {entity.label for entity in entities
+                 if entity.label in LABEL_CHECKS and LABEL_CHECKS[entity.label].search(entity.text)}
+    return set(labels) - confident
+
+
+def escalation_regions(text: str, entities, labels: Set[str], context: int = 1,
+                       max_share: float = 0.5) -> List[Tuple[int, int]]:
+    """
+    Character ranges of the paragraphs around the gaps for labels: paragraphs holding a
+    failed entity of the label or one of its cue words, plus context paragraphs on each
+    side. Adjacent paragraphs are joined into one range. Without any cue, or when more
+    than max_share of the paragraphs would be selected, the whole text is one range.
+    """
+    paragraphs = split_paragraphs(text)
+    if not paragraphs:
+        return []
+
+    selected = set()
+    for index, (offset, paragraph) in enumerate(paragraphs):
+        end = offset + len(paragraph)
+        for label in labels:
+            if LABEL_CUES[label].search(paragraph) or any(
+                entity.label == label and entity.start < end and entity.end > offset for entity in entities
+            ):
+                selected.update(range(max(index - context, 0), min(index + context + 1, len(paragraphs))))
+                break
+    if not selected or len(selected) > max_share * len(paragraphs):
+        return [(paragraphs[0][0], len(text.rstrip()))]
+
+    regions = []
+    for index in sorted(selected):
+        start, end = paragraphs[index][0], paragraphs[index][0] + len(paragraphs[index][1])
+        if regions and index - 1 in selected:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+def merge_cascade(first_entities, second_entities, labels: Set[str]) -> List[Any]:
+    """The first model's entities, with the escalated labels replaced by the second model's where it found any"""
+    found = {entity.label for entity in second_entities if entity.label in labels}
+    merged = [entity for entity in first_entities if entity.label not in found]
+    merged.extend(entity for entity in second_entities if entity.label in found)
+    return sorted(merged, key=lambda entity: (entity.start, entity.end))
+
+
+class CascadeStats:
+    """How often the first model decided a document alone and how much text the second model saw"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.escalated = 0
+        self.characters = 0
+        self.escalated_characters = 0
+        self.label_escalations = {label: 0 for label in ENTITY_COLUMNS}
+
+    def record(self, text: str, labels: Set[str], regions: List[Tuple[int, int]]):
+        with self._lock:
+            self.documents += 1
+            self.characters += len(text)
+            if labels:
+                self.escalated += 1
+                self.escalated_characters += sum(end - start for start, end in regions)
+            for label in labels:
+                self.label_escalations[label] = self.label_escalations.get(label, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "documents": self.documents,
+                "decided_by_first_model": self.documents - self.escalated,
+                "escalated": self.escalated,
+                "escalated_text_share": round(self.escalated_characters / self.characters, 4) if self.characters else 0.0,
+                "label_escalations": dict(self.label_escalations)
+            }
+
+
+async def run_cascade(texts: List[str], first: Callable[[List[str]], Awaitable[List]],
+                      second: Callable[[List[str]], Awaitable[List]], stats: Optional[CascadeStats] = None) -> List[List[Any]]:
+    """
+    Tag texts with the first (cheap) model, then run the second model only on the regions
+    around labels the first one missed or got implausibly, and merge the two
+    """
+    first_results = await first(texts)
+
+    escalations = []
+    for text, entities in zip(texts, first_results):
+        labels = uncertain_labels(entities)
+        regions = escalation_regions(text, entities, labels) if labels else []
+        if stats is not None:
+            stats.record(text, labels, regions)
+        escalations.append((labels, regions))
+
+    region_texts = [text[start:end] for text, (_, regions) in zip(texts, escalations) for start, end in regions]
+    region_results = iter(await second(region_texts) if region_texts else [])
+
+    results = []
+    for entities, (labels, regions) in zip(first_results, escalations):
+        second_entities = [
+            entity.model_copy(update={"start": entity.start + start, "end": entity.end + start})
+            for start, _ in regions
+            for entity in next(region_results)
+        ]
+        results.append(merge_cascade(entities, second_entities, labels) if labels else list(entities))
+    return results
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Distill the LegalBERT lease NER teacher into a compact student token classifier
+
+The student is a BERT with fewer layers (and optionally a narrower hidden size).
+It is trained on CPU to match the teacher's temperature-softened label
+distributions on every token. The text is the tagged leases in
+datasets/tagged_dataset.json plus the unlabeled leases in dataset-raw and
+dataset-html. On the tagged leases the gold labels are added as a hard-label
+loss term.
+
+The student is saved as a regular Hugging Face model, so it is served by the bert
+model type (MODEL_CONFIGS["bert-student"]) and all of its windowing and decoding.
+
+Usage:
+    python distill_student.py --layers 4 --epochs 3
+    python distill_student.py --layers 4 --hidden-size 384 --output ./legalBert/legalbert-ner-student-384
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import time
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+from transformers import AutoModelForTokenClassification, AutoTokenizer, BertConfig, BertForTokenClassification
+
+TEACHER_PATH = "./legalBert/legalbert-ner-model-100"
+STUDENT_PATH = "./legalBert/legalbert-ner-student"
+TAGGED_DATASET_PATH = "./datasets/tagged_dataset.json"
+UNLABELED_DIRS = ["./datasets/dataset-raw", "./datasets/dataset-html"]
+
+# Label ids of the tagged entity types, as in fine_tuned_legalBert.ipynb
+LABEL2ID = {
+    "LESSOR_NAME": 1,
+    "LESSEE_NAME": 2,
+    "PROPERTY_ADDRESS": 3,
+    "LEASE_START_DATE": 4,
+    "LEASE_END_DATE": 5,
+    "RENT_AMOUNT": 6,
+    "SECURITY_DEPOSIT_AMOUNT": 7
+}
+IGNORE_INDEX = -100
+
+
+def read_docx_text(file_path: str) -> str:
+    """Read a .docx lease the way the tagged datasets were built"""
+    from docx import Document
+    doc = Document(file_path)
+    return "\n".join([p.text for p in doc.paragraphs if p.text.strip()]).strip()
+
+
+class _ParagraphText(HTMLParser):
+    """Collect the text of an HTML document, one line per paragraph"""
+
+    def __init__(self):
+        super().__init__()
+        self.paragraphs = [[]]
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4"):
+            self.paragraphs.append([])
+
+    def handle_data(self, data):
+        self.paragraphs[-1].append(data)
+
+    def text(self) -> str:
+        lines = (" ".join("".join(parts).split()) for parts in self.paragraphs)
+        return "\n".join(line for line in lines if line)
+
+
+def read_html_text(file_path: str) -> str:
+    """Read the text of an HTML lease"""
+    parser = _ParagraphText()
+    with open(file_path, encoding="utf-8", errors="ignore") as f:
+        parser.feed(f.read())
+    return parser.text()
+
+
+def resolve_dataset_path(file_path: str) -> str:
+    """Map the notebook-relative paths in the tagged datasets to paths under backend/"""
+    return file_path.replace("../datasets/", "./datasets/", 1)
+
+
+def load_labeled_documents(path: str = TAGGED_DATASET_PATH) -> List[Tuple[str, List[Tuple[int, int, int]]]]:
+    """Tagged leases as (text, [(start_char, end_char, label_id)])"""
+    with open(path, encoding="utf-8") as f:
+        records = json.load(f)
+    documents = []
+    for record in records:
+        file_path = resolve_dataset_path(record["file_path"])
+        if not os.path.exists(file_path):
+            continue
+        spans = [(span["start"], span["end"], LABEL2ID[label]) for label, span in record["entities"].items()]
+        documents.append((read_docx_text(file_path), spans))
+    return documents
+
+
+def load_unlabeled_documents(dirs: List[str] = UNLABELED_DIRS, limit: Optional[int] = None) -> List[str]:
+    """Untagged lease texts from the raw .docx and .html collections"""
+    paths = []
+    for directory in dirs:
+        paths.extend(sorted(glob.glob(os.path.join(directory, "*.docx"))))
+        paths.extend(sorted(glob.glob(os.path.join(directory, "*.html"))))
+    if limit is not None:
+        paths = paths[:limit]
+    texts = []
+    for path in paths:
+        try:
+            text = read_docx_text(path) if path.endswith(".docx") else read_html_text(path)
+        except Exception as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        if text:
+            texts.append(text)
+    return texts
+
+
+def token_labels(offsets: List[Tuple[int, int]], spans: List[Tuple[int, int, int]]) -> List[int]:
+    """
+    Gold label of every token, aligned the way the teacher was trained
+
+    A whitespace word takes an entity label when it lies inside the entity's span.
+    The first token of a word carries the word's label; later sub-word tokens carry it
+    only if it is an entity label and are ignored otherwise.
+    """
+    labels = []
+    previous_word_end = -1
+    word_label = 0
+    for start, end in offsets:
+        if start >= previous_word_end:
+            # A new whitespace word starts; its label comes from the span containing it
+            word_label = next((label for span_start, span_end, label in spans if span_start <= start and end <= span_end), 0)
+            labels.append(word_label)
+        else:
+            labels.append(word_label if word_label != 0 else IGNORE_INDEX)
+        previous_word_end = max(previous_word_end, end)
+    return labels
+
+
+def _word_boundaries(text: str, offsets: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Replace every token's end with the end of the whitespace word it belongs to"""
+    bounded = []
+    for start, end in offsets:
+        word_end = end
+        while word_end < len(text) and not text[word_end].isspace():
+            word_end += 1
+        bounded.append((start, word_end))
+    return bounded
+
+
+def build_chunks(tokenizer, texts: List[str], spans: Optional[List[List[Tuple[int, int, int]]]] = None,
+                 max_length: int = 256) -> List[Dict[str, List[int]]]:
+    """
+    Cut every document into consecutive max_length windows of token ids
+
+    Returns:
+        One dict per window with input_ids (including [CLS]/[SEP]) and, for tagged
+        documents, gold labels (IGNORE_INDEX where there is no label)
+    """
+    content_size = max_length - 2
+    encodings = tokenizer(texts, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    chunks = []
+    for index, text in enumerate(texts):
+        input_ids = encodings["input_ids"][index]
+        labels = None
+        if spans is not None:
+            offsets = _word_boundaries(text, encodings["offset_mapping"][index])
+            labels = token_labels(offsets, spans[index])
+        for start in range(0, len(input_ids), content_size):
+            chunk = {"input_ids": [tokenizer.cls_token_id] + input_ids[start:start + content_size] + [tokenizer.sep_token_id]}
+            if labels is not None:
+                chunk["labels"] = [IGNORE_INDEX] + labels[start:start + content_size] + [IGNORE_INDEX]
+            chunks.append(chunk)
+    return chunks
+
+
+def pad_batch(chunks: List[Dict[str, List[int]]], pad_token_id: int) -> Dict[str, torch.Tensor]:
+    """Pad a list of windows into input_ids, attention_mask and labels tensors"""
+    max_len = max(len(chunk["input_ids"]) for chunk in chunks)
+    input_ids = torch.full((len(chunks), max_len), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(chunks), max_len), dtype=torch.long)
+    labels = torch.full((len(chunks), max_len), IGNORE_INDEX, dtype=torch.long)
+    for row, chunk in enumerate(chunks):
+        length = len(chunk["input_ids"])
+        input_ids[row, :length] = torch.tensor(chunk["input_ids"])
+        attention_mask[row, :length] = 1
+        if "labels" in chunk:
+            labels[row, :length] = torch.tensor(chunk["labels"])
+    return {"input_ids": input_ids, "attention_mask": attention_mask, "labels": labels}
+
+
+def add_teacher_logits(teacher, chunks: List[Dict[str, List[int]]], pad_token_id: int, batch_size: int = 8):
+    """Run the teacher once over every window and store its logits as the soft targets"""
+    teacher.eval()
+    ordered = sorted(chunks, key=lambda chunk: len(chunk["input_ids"]))
+    with torch.no_grad():
+        for batch_start in range(0, len(ordered), batch_size):
+            batch_chunks = ordered[batch_start:batch_start + batch_size]
+            batch = pad_batch(batch_chunks, pad_token_id)
+            logits = teacher(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"]).logits
+            for row, chunk in enumerate(batch_chunks):
+                chunk["teacher_logits"] = logits[row, :len(chunk["input_ids"])].clone()
+
+
+def make_student(teacher, num_layers: int, hidden_size: Optional[int] = None) -> BertForTokenClassification:
+    """
+    Build the student from the teacher's config with fewer layers
+
+    With the teacher's hidden size, the student starts from the teacher's embeddings,
+    classifier and evenly spaced encoder layers. A narrower student starts from scratch.
+    """
+    config_dict = teacher.config.to_dict()
+    config_dict["num_hidden_layers"] = num_layers
+    narrower = hidden_size is not None and hidden_size != teacher.config.hidden_size
+    if narrower:
+        config_dict["hidden_size"] = hidden_size
+        config_dict["num_attention_heads"] = max(1, hidden_size // 64)
+        config_dict["intermediate_size"] = hidden_size * 4
+    student = BertForTokenClassification(BertConfig(**config_dict))
+    if narrower:
+        return student
+
+    teacher_layers = teacher.bert.encoder.layer
+    picked = [round(i * (len(teacher_layers) - 1) / max(num_layers - 1, 1)) for i in range(num_layers)]
+    student.bert.embeddings.load_state_dict(teacher.bert.embeddings.state_dict())
+    for student_layer, teacher_index in zip(student.bert.encoder.layer, picked):
+        student_layer.load_state_dict(teacher_layers[teacher_index].state_dict())
+    student.classifier.load_state_dict(teacher.classifier.state_dict())
+    return student
+
+
+def distillation_loss(student_logits: torch.Tensor, teacher_logits: torch.Tensor, labels: torch.Tensor,
+                      attention_mask: torch.Tensor, temperature: float = 2.0, alpha: float = 0.5) -> torch.Tensor:
+    """
+    Soft-label KL divergence to the teacher on every real token, plus hard-label
+    cross-entropy where gold labels exist
+
+    Args:
+        alpha: Weight of the soft-label term; the hard-label term gets 1 - alpha
+    """
+    mask = attention_mask.bool()
+    soft = F.kl_div(
+        F.log_softmax(student_logits[mask] / temperature, dim=-1),
+        F.softmax(teacher_logits[mask] / temperature, dim=-1),
+        reduction="batchmean"
+    ) * temperature ** 2
+    if (labels != IGNORE_INDEX).any():
+        hard = F.cross_entropy(student_logits.reshape(-1, student_logits.size(-1)), labels.reshape(-1),
+                               ignore_index=IGNORE_INDEX)
+        return alpha * soft + (1 - alpha) * hard
+    return soft
+
+
+def train_student(student, chunks: List[Dict], pad_token_id: int, epochs: int = 3, batch_size: int = 8,
+                  learning_rate: float = 5e-5, temperature: float = 2.0, alpha: float = 0.5, seed: int = 0):
+    """Train the student on the teacher's soft targets"""
+    random.seed(seed)
+    torch.manual_seed(seed)
+    optimizer = torch.optim.AdamW(student.parameters(), lr=learning_rate, weight_decay=0.01)
+    total_steps = epochs * ((len(chunks) + batch_size - 1) // batch_size)
+    scheduler = torch.optim.lr_scheduler.LambdaLR(optimizer, lambda step: max(0.0, 1 - step / max(total_steps, 1)))
+
+    student.train()
+    for epoch in range(epochs):
+        order = list(chunks)
+        random.shuffle(order)
+        epoch_loss = 0.0
+        for batch_start in range(0, len(order), batch_size):
+            batch_chunks = order[batch_start:batch_start + batch_size]
+            batch = pad_batch(batch_chunks, pad_token_id)
+            teacher_logits = torch.zeros(batch["input_ids"].shape + (student.config.num_labels,))
+            for row, chunk in enumerate(batch_chunks):
+                teacher_logits[row, :len(chunk["input_ids"])] = chunk["teacher_logits"]
+
+            logits = student(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"]).logits
+            loss = distillation_loss(logits, teacher_logits, batch["labels"], batch["attention_mask"], temperature, alpha)
+            optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+            optimizer.step()
+            scheduler.step()
+            epoch_loss += loss.item() * len(batch_chunks)
+        print(f"Epoch {epoch + 1}/{epochs}: distillation loss {epoch_loss / max(len(order), 1):.4f}")
+    student.eval()
+    return student
+
+
+def compare_with_teacher(teacher_path: str, student_path: str):
+    """Per-entity F1 on the golden test leases and docs/sec of the teacher and the student"""
+    import main
+    from ner_evaluation import load_golden_data, entity_values, evaluate_predictions, format_report, read_lease_text
+
+    golden = load_golden_data()
+    paths = [path for path in golden if os.path.exists(path)]
+    # Read the leases once, outside the timed region, so docs/s measures the model alone
+    texts = [read_lease_text(path) for path in paths]
+    reports = {}
+    for name, model_path in [("teacher", teacher_path), ("student", student_path)]:
+        model_dict = main.load_bert_model(model_path)
+        batch_size = main.MODEL_CONFIGS["bert"]["batch_size"]
+        start = time.perf_counter()
+        results = main.extract_entities_bert_batch(texts, model_dict, batch_size)
+        elapsed = time.perf_counter() - start
+        predictions = {path: entity_values(entities) for path, entities in zip(paths, results)}
+        reports[name] = evaluate_predictions(predictions, golden)
+        parameters = sum(p.numel() for p in model_dict["model"].parameters())
+        print(f"{name:8s} | {parameters / 1e6:6.1f}M parameters | {len(texts) / elapsed:6.2f} docs/s")
+    print(format_report(reports))
+
+
+def main_cli():
+    """Distill the teacher into a student and compare them"""
+    parser = argparse.ArgumentParser(description="Distill LegalBERT into a compact lease NER student")
+    parser.add_argument("--teacher", default=TEACHER_PATH)
+    parser.add_argument("--output", default=STUDENT_PATH)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--hidden-size", type=int, default=None, help="Narrower hidden size (default: the teacher's)")
+    parser.add_argument("--max-length", type=int, default=256, help="Tokens per training window")
+    parser.add_argument("--unlabeled-limit", type=int, default=None, help="Use at most this many unlabeled documents")
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--learning-rate", type=float, default=5e-5)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--alpha", type=float, default=0.5, help="Weight of the soft-label loss")
+    parser.add_argument("--skip-eval", action="store_true")
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.teacher)
+    teacher = AutoModelForTokenClassification.from_pretrained(args.teacher)
+
+    labeled = load_labeled_documents()
+    unlabeled = load_unlabeled_documents(limit=args.unlabeled_limit)
+    print(f"Training text: {len(labeled)} tagged and {len(unlabeled)} unlabeled documents")
+    chunks = build_chunks(tokenizer, [text for text, _ in labeled], [spans for _, spans in labeled], args.max_length)
+    chunks += build_chunks(tokenizer, unlabeled, max_length=args.max_length)
+    print(f"Labelling {len(chunks)} windows with the teacher...")
+    add_teacher_logits(teacher, chunks, tokenizer.pad_token_id, args.batch_size)
+
+    student = make_student(teacher, args.layers, args.hidden_size)
+    train_student(student, chunks, tokenizer.pad_token_id, args.epochs, args.batch_size,
+                  args.learning_rate, args.temperature, args.alpha)
+    student.save_pretrained(args.output)
+    tokenizer.save_pretrained(args.output)
+    print(f"Saved the student to {args.output}")
+
+    if not args.skip_eval:
+        compare_with_teacher(args.teacher, args.output)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,57 @@
+import difflib
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+def match_paragraphs(old: List[str], new: List[str]) -> Dict[int, int]:
+    """Indices of the new paragraphs left unchanged by the edit, mapped to their index in the old version"""
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    matches = {}
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(new_end - new_start):
+                matches[new_start + offset] = old_start + offset
+    return matches
+
+
+class DocumentStore:
+    """
+    The most recent extracted document versions, so an edited draft only re-runs its changed paragraphs
+
+    A version is a dict with the model_name and model digest it was extracted with, its
+    paragraphs, and the entities of each paragraph relative to the paragraph.
+    """
+
+    def __init__(self, max_versions: int = 1000):
+        """
+        Initialize the store
+
+        Args:
+            max_versions: Versions kept; the least recently used are dropped first
+        """
+        self.max_versions = max_versions
+        self._versions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version_id: str) -> Optional[Dict[str, Any]]:
+        """A stored version, or None if it is unknown or was dropped"""
+        with self._lock:
+            version = self._versions.get(version_id)
+            if version is not None:
+                self._versions.move_to_end(version_id)
+            return version
+
+    def put(self, version: Dict[str, Any]) -> str:
+        """Store a version and return its ID"""
+        version_id = uuid.uuid4().hex
+        with self._lock:
+            self._versions[version_id] = version
+            while len(self._versions) > self.max_versions:
+                self._versions.popitem(last=False)
+        return version_id
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"versions": len(self._versions), "max_versions": self.max_versions}
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from admission import DeadlineExceededError, QueueFullError, estimate_retry_after, expired
+
+
+class InferencePools:
+    """Bounded thread pools that keep blocking inference off the asyncio event loop"""
+
+    def __init__(self, pool_sizes: Dict[str, int], default_size: int = 1,
+                 max_waiting: Optional[Dict[str, int]] = None):
+        """
+        Initialize the pools
+
+        Args:
+            pool_sizes: Worker count per pool, e.g. one pool per model type plus "chat".
+                The worker count is the pool's concurrency limit; extra calls wait in the pool.
+            default_size: Worker count for pools that are not listed
+            max_waiting: Calls allowed to wait per pool; more are rejected with QueueFullError.
+                Pools that are not listed queue without limit.
+        """
+        self.pool_sizes = dict(pool_sizes)
+        self.default_size = default_size
+        self.max_waiting = dict(max_waiting or {})
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._active: Dict[str, int] = {}
+        self._submitted: Dict[str, int] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get_size(self, pool_name: str) -> int:
+        """Concurrency limit of a pool"""
+        return max(1, self.pool_sizes.get(pool_name, self.default_size))
+
+    def get_executor(self, pool_name: str) -> ThreadPoolExecutor:
+        """Return the executor for a pool, creating it on first use"""
+        with self._lock:
+            if pool_name not in self._executors:
+                self._executors[pool_name] = ThreadPoolExecutor(
+                    max_workers=self.get_size(pool_name),
+                    thread_name_prefix=f"{pool_name}-inference"
+                )
+                self._active[pool_name] = 0
+                self._submitted[pool_name] = 0
+                self._timings[pool_name] = {"calls": 0, "wait_seconds": 0.0, "compute_seconds": 0.0,
+                                            "rejected": 0, "expired": 0}
+            return self._executors[pool_name]
+
+    def _track(self, pool_name: str, submitted_at: float, deadline: Optional[float],
+               fn: Callable, *args, **kwargs) -> Any:
+        """Run fn in a worker thread while counting it as active, unless its deadline passed while it waited"""
+        start = time.monotonic()
+        with self._lock:
+            if expired(deadline):
+                self._submitted[pool_name] -= 1
+                self._timings[pool_name]["expired"] += 1
+                raise DeadlineExceededError(f"Deadline passed while waiting for the {pool_name} pool")
+            self._active[pool_name] += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active[pool_name] -= 1
+                self._submitted[pool_name] -= 1
+                timings = self._timings[pool_name]
+                timings["calls"] += 1
+                timings["wait_seconds"] += start - submitted_at
+                timings["compute_seconds"] += time.monotonic() - start
+
+    async def run(self, pool_name: str, fn: Callable, *args, deadline: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a blocking function in the named pool and await its result
+
+        A call still waiting for a worker at deadline (a time.monotonic() value) is
+        dropped with DeadlineExceededError instead of run.
+        """
+        executor = self.get_executor(pool_name)
+        with self._lock:
+            timings = self._timings[pool_name]
+            waiting = self._submitted[pool_name] - self._active[pool_name]
+            limit = self.max_waiting.get(pool_name)
+            if limit is not None and waiting >= limit:
+                timings["rejected"] += 1
+                mean_seconds = timings["compute_seconds"] / timings["calls"] if timings["calls"] else 1.0
+                raise QueueFullError(f"Too many queued calls for the {pool_name} pool",
+                                     estimate_retry_after(waiting + 1, self.get_size(pool_name), mean_seconds))
+            if expired(deadline):
+                timings["expired"] += 1
+                raise DeadlineExceededError(f"Deadline passed before the {pool_name} pool could start")
+            self._submitted[pool_name] += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, partial(self._track, pool_name, time.monotonic(), deadline, fn, *args, **kwargs)
+        )
+
+    def shutdown(self, wait: bool = True):
+        """Shut down every pool"""
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors.clear()
+        for executor in executors:
+            executor.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Workers, running and waiting calls, rejections and queue wait vs compute time per pool"""
+        with self._lock:
+            stats = {}
+            for pool_name in self._executors:
+                timings = self._timings[pool_name]
+                calls = timings["calls"]
+                stats[pool_name] = {
+                    "max_workers": self.get_size(pool_name),
+                    "active": self._active[pool_name],
+                    "waiting": self._submitted[pool_name] - self._active[pool_name],
+                    "max_waiting": self.max_waiting.get(pool_name),
+                    "rejected": timings["rejected"],
+                    "expired": timings["expired"],
+                    "mean_wait_ms": round(timings["wait_seconds"] / calls * 1000, 2) if calls else 0.0,
+                    "mean_compute_ms": round(timings["compute_seconds"] / calls * 1000, 2) if calls else 0.0
+                }
+            return stats
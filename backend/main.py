@@ -1,15 +1,41 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 import spacy
+import asyncio
+import hashlib
 import json
 import os
-from typing import List, Dict, Any, Optional
+import itertools
+import time
+import threading
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple
 import uvicorn
 from chat_helper import chat_helper
 from local_chat_helper import local_chat_helper
+from micro_batcher import MicroBatcher
+from inference_pool import InferencePools
+from worker_pool import ModelWorkerPool
+from model_registry import ModelRegistry, ModelNotLoadedError
+from spacy_pipeline import load_pipeline_for
+from onnx_backend import load_onnx_classifier
+from quantization import load_quantized_model
+from ner_cache import NERResultCache, ArtifactDigests, text_digest
+from paragraph_memo import split_paragraphs, ParagraphStats
+from document_store import DocumentStore, match_paragraphs
+from cascade import CascadeStats, run_cascade
+from region_prefilter import candidate_windows, PrefilterStats
+from shared_encoding import EncodingCache, vocab_fingerprint
+from model_router import CostCurve, ModelRouter
+from admission import QueueFullError, DeadlineExceededError, deadline_after, expired
+from single_flight import SingleFlight
+from fast_json import FastJSONResponse
 from transformers import AutoTokenizer, AutoModelForTokenClassification
 import torch
+import numpy as np
 
 
 app = FastAPI(title="Lease Buddy NER API", version="1.0.0")
@@ -23,10 +49,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses of at least this many bytes for clients that accept gzip (0 disables)
+RESPONSE_GZIP_MIN_BYTES = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "1000"))
+if RESPONSE_GZIP_MIN_BYTES > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=RESPONSE_GZIP_MIN_BYTES)
+
 # Pydantic models for request/response
 class TextRequest(BaseModel):
     text: str
     model: str = "spacy"  # Default to spaCy model
+    by_paragraph: bool = False  # Tag each paragraph separately so repeated boilerplate is served from the cache
+    mode: Optional[str] = None  # "auto": the cheap model first, the transformer only around the labels it missed
+    prefilter: bool = False  # Only tag the windows around lease cue phrases
+    latency_budget_ms: Optional[float] = None  # For model="auto"; the X-Latency-Budget-Ms header also sets it
+    deadline_ms: Optional[float] = None  # Drop the request if still queued after this long; or the X-Deadline-Ms header
+    echo_text: bool = True  # False returns text_digest and text_length instead of the text
 
 class Entity(BaseModel):
     text: str
@@ -36,7 +73,53 @@ class Entity(BaseModel):
 
 class NERResponse(BaseModel):
     entities: List[Entity]
+    text: Optional[str] = None  # Omitted with echo_text=False
+    text_digest: Optional[str] = None  # SHA-256 of the text, with echo_text=False
+    text_length: Optional[int] = None
+    model: Optional[str] = None  # The model that served the request
+
+class BatchTextRequest(BaseModel):
+    texts: List[str]
+    model: str = "spacy"
+    batch_size: Optional[int] = None  # Defaults to the model's configured batch size
+    by_paragraph: bool = False
+    mode: Optional[str] = None
+    prefilter: bool = False
+    deadline_ms: Optional[float] = None
+    echo_text: bool = True
+
+class BatchNERResponse(BaseModel):
+    results: List[NERResponse]
+
+class IncrementalTextRequest(BaseModel):
     text: str
+    model: str = "spacy"
+    previous_version_id: Optional[str] = None  # Version returned for the draft this text is an edit of
+
+class IncrementalNERResponse(BaseModel):
+    entities: List[Entity]
+    text: str
+    version_id: str
+    reused_paragraphs: int
+    computed_paragraphs: int
+    # Each paragraph is tagged on its own, so the entities equal a by_paragraph extraction,
+    # not necessarily a whole-document run
+    extraction_mode: str = "by_paragraph"
+
+class CompareRequest(BaseModel):
+    text: str
+    models: List[str] = ["spacy", "bert", "spacy_bert"]
+
+class ModelComparison(BaseModel):
+    entities: List[Entity]
+    wall_time_ms: float
+    error: Optional[str] = None
+
+class CompareResponse(BaseModel):
+    text: str
+    results: Dict[str, ModelComparison]
+    majority: List[Entity]  # Spans (start, end, label) found by more than half of the models
+    wall_time_ms: float
 
 class ChatRequest(BaseModel):
     message: str
@@ -46,71 +129,308 @@ class ChatResponse(BaseModel):
     response: str
     success: bool
 
-# Global variables to store the loaded models
-models = {
-    "spacy": None,
-    "bert": None,
-    "spacy_bert": None
-}
-
 # Model configurations
 MODEL_CONFIGS = {
     "spacy": {
         "path": "./spacy/lease_ner_model",
-        "type": "spacy"
+        "type": "spacy",
+        # Only doc.ents is read, so skip the tagger, parser, lemmatizer etc. the ner pipe doesn't use
+        "ner_only": os.getenv("SPACY_NER_ONLY", "true").lower() == "true",
+        "batch_size": 64,  # documents per nlp.pipe batch
+        # Concurrent /extract-entities calls are gathered for up to max_wait_ms into one batch
+        "max_batch_size": 32,
+        "max_wait_ms": 2
     },
     "bert": {
         "path": "./legalBert/legalbert-ner-model-100",
-        "type": "bert"
+        "type": "bert",
+        # Overlapping windows so leases longer than one window are fully tagged.
+        # stride is how far each window advances; window_size - stride tokens overlap.
+        "sliding_window": os.getenv("BERT_SLIDING_WINDOW", "true").lower() == "true",
+        "window_size": int(os.getenv("BERT_WINDOW_SIZE", "512")),
+        "stride": int(os.getenv("BERT_WINDOW_STRIDE", "384")),
+        "batch_size": 8,  # windows per padded forward pass
+        "max_batch_size": 8,
+        "max_wait_ms": 10
+    },
+    "bert-student": {
+        # 4-layer student distilled from the bert model with distill_student.py
+        "path": "./legalBert/legalbert-ner-student",
+        "type": "bert",
+        "sliding_window": os.getenv("BERT_SLIDING_WINDOW", "true").lower() == "true",
+        "window_size": int(os.getenv("BERT_WINDOW_SIZE", "512")),
+        "stride": int(os.getenv("BERT_WINDOW_STRIDE", "384")),
+        "batch_size": 16,
+        "max_batch_size": 16,
+        "max_wait_ms": 10,
+        "preload": False
+    },
+    "bert-pruned": {
+        # Layer/head-pruned bert model written by prune_bert.py
+        "path": "./legalBert/legalbert-ner-pruned",
+        "type": "bert",
+        "sliding_window": os.getenv("BERT_SLIDING_WINDOW", "true").lower() == "true",
+        "window_size": int(os.getenv("BERT_WINDOW_SIZE", "512")),
+        "stride": int(os.getenv("BERT_WINDOW_STRIDE", "384")),
+        "batch_size": 8,
+        "max_batch_size": 8,
+        "max_wait_ms": 10,
+        "preload": False
+    },
+    "bert-int8": {
+        # The bert model with int8 dynamically quantized linear layers, cached on disk after the first load
+        "path": "./legalBert/legalbert-ner-model-100",
+        "quantized_path": "./legalBert/quantized/legalbert-ner-model-100-int8.pt",
+        "type": "bert_int8",
+        "sliding_window": os.getenv("BERT_SLIDING_WINDOW", "true").lower() == "true",
+        "window_size": int(os.getenv("BERT_WINDOW_SIZE", "512")),
+        "stride": int(os.getenv("BERT_WINDOW_STRIDE", "384")),
+        "batch_size": 8,
+        "max_batch_size": 8,
+        "max_wait_ms": 10,
+        "preload": False
+    },
+    "bert_onnx": {
+        # The bert model exported to ONNX (on first load if onnx_path is missing) and run by ONNX Runtime
+        "path": "./legalBert/legalbert-ner-model-100",
+        "onnx_path": "./legalBert/onnx/legalbert-ner-model-100.onnx",
+        "type": "bert_onnx",
+        "intra_op_threads": int(os.getenv("ONNX_INTRA_OP_THREADS", "0")) or None,
+        "sliding_window": os.getenv("BERT_SLIDING_WINDOW", "true").lower() == "true",
+        "window_size": int(os.getenv("BERT_WINDOW_SIZE", "512")),
+        "stride": int(os.getenv("BERT_WINDOW_STRIDE", "384")),
+        "batch_size": 8,
+        "max_batch_size": 8,
+        "max_wait_ms": 10,
+        # Optional backend: loads on first use instead of at startup
+        "preload": False
     },
     "spacy_bert": {
         "path": "./spacy_legalBert/custom_legal_ner_spacy_100",
-        "type": "spacy_bert"
+        "type": "spacy_bert",
+        # The ner pipe embeds tokens with its own HashEmbedCNN and never reads the transformer's
+        # output, so the legal-bert forward pass is skipped unless a pipe listens to it
+        "ner_only": os.getenv("SPACY_BERT_NER_ONLY", "true").lower() == "true",
+        "batch_size": 16,
+        "max_batch_size": 16,
+        "max_wait_ms": 5
     }
 }
 
-def load_spacy_model(model_path: str):
-    """Load a spaCy model"""
+# Worker threads per model type; each pool caps how many inferences of that type run at once.
+# Blocking inference and chat calls run in these pools so the event loop stays responsive.
+INFERENCE_POOL_SIZES = {
+    "spacy": int(os.getenv("SPACY_INFERENCE_WORKERS", "2")),
+    "bert": int(os.getenv("BERT_INFERENCE_WORKERS", "1")),
+    "bert_int8": int(os.getenv("BERT_INT8_INFERENCE_WORKERS", "1")),
+    "bert_onnx": int(os.getenv("BERT_ONNX_INFERENCE_WORKERS", "1")),
+    "spacy_bert": int(os.getenv("SPACY_BERT_INFERENCE_WORKERS", "1")),
+    # The chat helpers keep a single shared conversation, so their calls stay sequential by default
+    "chat": int(os.getenv("CHAT_WORKERS", "1")),
+    "local_chat": int(os.getenv("CHAT_WORKERS", "1"))
+}
+
+# Requests allowed to wait per model; beyond it requests are rejected with 429 instead of
+# queueing without bound (0 = unbounded). A model's config can set its own max_queue_size.
+NER_MAX_QUEUE_SIZE = int(os.getenv("NER_MAX_QUEUE_SIZE", "64"))
+
+inference_pools = InferencePools(INFERENCE_POOL_SIZES, max_waiting={
+    config["type"]: NER_MAX_QUEUE_SIZE for config in MODEL_CONFIGS.values()
+} if NER_MAX_QUEUE_SIZE > 0 else None)
+
+# Pre-fork serving mode: with NER_WORKER_PROCESSES > 0 the models are loaded once in this
+# process and inference runs in forked workers that share the weights copy-on-write.
+# Only PRELOAD_MODELS are served in this mode: a model loaded on first use would be loaded
+# again in every worker after the fork, with a private copy of its weights per process.
+NER_WORKER_PROCESSES = int(os.getenv("NER_WORKER_PROCESSES", "0"))
+NER_WORKER_THREADS = int(os.getenv("NER_WORKER_THREADS", "0")) or None
+
+worker_pool = ModelWorkerPool(NER_WORKER_PROCESSES, NER_WORKER_THREADS) if NER_WORKER_PROCESSES > 0 else None
+
+def load_spacy_model(model_path: str, ner_only: bool = False):
+    """Load a spaCy model, optionally with only the components its ner pipe depends on"""
     if os.path.exists(model_path):
         print(f"Loading spaCy model from {model_path}...")
+        if ner_only:
+            return load_pipeline_for(model_path, "ner")
         return spacy.load(model_path)
     else:
         raise Exception(f"spaCy model not found at {model_path}")
 
-def load_bert_model(model_path: str):
-    """Load a BERT model"""
+def load_bert_model(model_path: str, sliding_window: bool = True, window_size: int = 512, stride: int = 384,
+                    quantized_path: Optional[str] = None):
+    """Load a BERT model, or its int8 dynamically quantized variant cached at quantized_path"""
     if os.path.exists(model_path):
         print(f"Loading BERT model from {model_path}...")
         tokenizer = AutoTokenizer.from_pretrained(model_path)
-        model = AutoModelForTokenClassification.from_pretrained(model_path)
-        return {"tokenizer": tokenizer, "model": model}
+        if quantized_path:
+            model = load_quantized_model(model_path, quantized_path)
+        else:
+            model = AutoModelForTokenClassification.from_pretrained(model_path)
+        model.eval()
+        return {
+            "tokenizer": tokenizer,
+            "vocab_key": vocab_fingerprint(tokenizer),
+            "model": model,
+            "sliding_window": sliding_window,
+            "window_size": window_size,
+            "stride": stride
+        }
+    else:
+        raise Exception(f"BERT model not found at {model_path}")
+
+def load_bert_onnx_model(model_path: str, onnx_path: str, intra_op_threads: Optional[int] = None,
+                         sliding_window: bool = True, window_size: int = 512, stride: int = 384):
+    """Load the BERT model as an ONNX Runtime session, exporting it first if needed"""
+    if os.path.exists(model_path):
+        print(f"Loading ONNX BERT model from {onnx_path}...")
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        return {
+            "tokenizer": tokenizer,
+            "vocab_key": vocab_fingerprint(tokenizer),
+            "model": load_onnx_classifier(model_path, onnx_path, intra_op_threads),
+            "sliding_window": sliding_window,
+            "window_size": window_size,
+            "stride": stride
+        }
     else:
         raise Exception(f"BERT model not found at {model_path}")
 
-def load_spacy_bert_model(model_path: str):
-    """Load a spaCy BERT model"""
+def load_spacy_bert_model(model_path: str, ner_only: bool = False):
+    """Load a spaCy BERT model, optionally with only the components its ner pipe depends on"""
     if os.path.exists(model_path):
         print(f"Loading spaCy BERT model from {model_path}...")
+        if ner_only:
+            return load_pipeline_for(model_path, "ner")
         return spacy.load(model_path)
     else:
         raise Exception(f"spaCy BERT model not found at {model_path}")
 
-def load_models():
-    """Load all available models"""
-    global models
+def load_model(model_name: str):
+    """Load a model by name from its MODEL_CONFIGS entry"""
+    config = MODEL_CONFIGS[model_name]
+    if config["type"] == "spacy":
+        return load_spacy_model(config["path"], ner_only=config.get("ner_only", False))
+    elif config["type"] in ("bert", "bert_int8"):
+        return load_bert_model(
+            config["path"],
+            sliding_window=config.get("sliding_window", True),
+            window_size=config.get("window_size", 512),
+            stride=config.get("stride", 384),
+            quantized_path=config.get("quantized_path")
+        )
+    elif config["type"] == "bert_onnx":
+        return load_bert_onnx_model(
+            config["path"],
+            config["onnx_path"],
+            intra_op_threads=config.get("intra_op_threads"),
+            sliding_window=config.get("sliding_window", True),
+            window_size=config.get("window_size", 512),
+            stride=config.get("stride", 384)
+        )
+    elif config["type"] == "spacy_bert":
+        return load_spacy_bert_model(config["path"], ner_only=config.get("ner_only", False))
+    raise Exception(f"Unknown model type for {model_name}")
+
+def get_model_memory(model_name: str, model=None) -> int:
+    """Approximate resident memory of a model in bytes
     
-    for model_name, config in MODEL_CONFIGS.items():
-        try:
-            if config["type"] == "spacy":
-                models[model_name] = load_spacy_model(config["path"])
-            elif config["type"] == "bert":
-                models[model_name] = load_bert_model(config["path"])
-            elif config["type"] == "spacy_bert":
-                models[model_name] = load_spacy_bert_model(config["path"])
-            print(f"Model {model_name} loaded successfully!")
-        except Exception as e:
-            print(f"Failed to load model {model_name}: {str(e)}")
-            models[model_name] = None
+    Exported (ONNX) and quantized models are measured by their serialized weights, whose
+    packed tensors don't show up as parameters. Other PyTorch models count their parameters
+    and buffers. spaCy models, and models that are not loaded yet, are estimated from the
+    size of their artifacts on disk.
+    """
+    config = MODEL_CONFIGS[model_name]
+    path = config["path"]
+    artifact_path = config.get("onnx_path") or config.get("quantized_path")
+    if artifact_path and os.path.exists(artifact_path):
+        return _directory_size(artifact_path)
+    if isinstance(model, dict) and isinstance(model.get("model"), torch.nn.Module):
+        module = model["model"]
+        return sum(tensor.numel() * tensor.element_size() for tensor in itertools.chain(module.parameters(), module.buffers()))
+    if isinstance(model, spacy.language.Language):
+        # Excluded components are never read from disk, so only count the ones in the pipeline
+        return sum(_directory_size(os.path.join(path, name)) for name in [*model.component_names, "vocab", "tokenizer"])
+    return _directory_size(path)
+
+def _directory_size(path: str) -> int:
+    """Total size of the files under path in bytes"""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+# Models load on first use, except PRELOAD_MODELS which load at startup. With a memory budget,
+# the least recently used models are evicted when loading another one would exceed it.
+DEFAULT_PRELOAD_MODELS = [name for name, config in MODEL_CONFIGS.items() if config.get("preload", True)]
+PRELOAD_MODELS = [name.strip() for name in os.getenv("PRELOAD_MODELS", ",".join(DEFAULT_PRELOAD_MODELS)).split(",") if name.strip()]
+MODEL_MEMORY_BUDGET_MB = int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0"))
+
+def is_served(model_name: str) -> bool:
+    """Whether requests may use a model; with forked workers only the models loaded before the fork"""
+    return model_name in MODEL_CONFIGS and (worker_pool is None or model_name in PRELOAD_MODELS)
+
+WARMUP_TEXT = (
+    "This Lease Agreement is made between John Smith (Landlord) and Jane Doe (Tenant) "
+    "for the property at 123 Main Street. The lease begins on January 1, 2024 and ends on "
+    "December 31, 2024. Monthly rent is $1,500 and the security deposit is $1,500."
+)
+
+def warm_up_model(model_name: str, model):
+    """Run one inference on a freshly loaded model so one-time allocations happen before it serves traffic"""
+    # With forked workers the parent must not start torch/OpenMP thread pools before the fork;
+    # each worker warms up after it (warm_up_worker)
+    if worker_pool is None:
+        run_extractor(MODEL_CONFIGS[model_name]["type"], model, [WARMUP_TEXT])
+    # Hash the model files now rather than on the first request
+    if ner_cache is not None:
+        model_digest(model_name)
+
+# Extraction results are cached per (model, model artifact and settings digest, text hash), so the same
+# lease sent again skips the model, and changed model files or settings never serve stale results
+NER_CACHE_MAX_MB = int(os.getenv("NER_CACHE_MAX_MB", "64"))
+NER_CACHE_DIR = os.getenv("NER_CACHE_DIR", "") or None
+
+ner_cache = NERResultCache(NER_CACHE_MAX_MB * 1024 * 1024, NER_CACHE_DIR) if NER_CACHE_MAX_MB > 0 or NER_CACHE_DIR else None
+artifact_digests = ArtifactDigests()
+
+# Config fields that change what a model extracts; results computed under other values must not be served
+EXTRACTION_SETTINGS = ("sliding_window", "window_size", "stride", "ner_only")
+
+def model_digest(model_name: str) -> str:
+    """Digest of the files a model is loaded from and the settings it extracts with"""
+    config = MODEL_CONFIGS[model_name]
+    paths = [config["path"]] + [config[key] for key in ("onnx_path", "quantized_path") if key in config]
+    settings = json.dumps({key: config[key] for key in EXTRACTION_SETTINGS if key in config}, sort_keys=True)
+    return hashlib.sha256(f"{artifact_digests.digest(paths)}:{settings}".encode("utf-8")).hexdigest()[:16]
+
+model_registry = ModelRegistry(
+    MODEL_CONFIGS,
+    load_model,
+    get_model_memory,
+    memory_budget_bytes=MODEL_MEMORY_BUDGET_MB * 1024 * 1024 or None,
+    warmup_fn=warm_up_model
+)
+
+# Loaded model objects by name; None while a model is not resident
+models = model_registry.models
+
+def warm_up_worker():
+    """Run one inference on every loaded model, in a freshly forked worker"""
+    for model_name in PRELOAD_MODELS:
+        model = models.get(model_name)
+        if model is not None:
+            run_extractor(MODEL_CONFIGS[model_name]["type"], model, [WARMUP_TEXT])
+
+def load_models():
+    """Load and warm up the models configured for preloading, all at once"""
+    model_registry.preload((name for name in PRELOAD_MODELS if name in MODEL_CONFIGS), parallel=True)
+
+# Tokenized documents shared by the BERT backends on the same vocabulary (bert, bert-int8, bert_onnx,
+# bert-student, bert-pruned), so comparing them tokenizes each document once
+encoding_cache = EncodingCache(int(os.getenv("ENCODING_CACHE_SIZE", "256")))
 
 def extract_entities_spacy(text: str, model) -> List[Entity]:
     """Extract entities using spaCy model"""
@@ -126,51 +446,158 @@ def extract_entities_spacy(text: str, model) -> List[Entity]:
         entities.append(entity)
     return entities
 
-def extract_entities_bert(text: str, model_dict) -> List[Entity]:
-    """Extract entities using BERT model"""
+def get_bert_windows(num_tokens: int, window: int, stride: int) -> List[Tuple[int, int]]:
+    """Split a token sequence into overlapping [start, end) windows that cover every token"""
+    if window <= 0 or stride <= 0:
+        raise ValueError("window and stride must be positive")
+    if stride > window:
+        raise ValueError("stride must not exceed the window size, or tokens would be skipped")
+    if num_tokens <= window:
+        return [(0, num_tokens)]
+
+    windows = []
+    start = 0
+    while True:
+        end = min(start + window, num_tokens)
+        windows.append((start, end))
+        if end == num_tokens:
+            return windows
+        start += stride
+
+def predict_bert_labels(documents_ids: List[List[int]], model_dict, batch_size: Optional[int] = None) -> List[np.ndarray]:
+    """Predict a label id for every token of every document, merging overlapping window predictions
+    
+    Windows from all documents are sorted by length and run batch_size at a time, so
+    each padded forward pass wastes little on padding. Without a batch_size every
+    window goes through a single forward pass.
+    """
     tokenizer = model_dict["tokenizer"]
     model = model_dict["model"]
+    window_size = model_dict.get("window_size", 512)
+
+    # Leave room for [CLS] and [SEP] in every window
+    content_size = window_size - 2
+    windows = []
+    for doc_index, input_ids in enumerate(documents_ids):
+        if not input_ids:
+            continue
+        if model_dict.get("sliding_window", True):
+            spans = get_bert_windows(len(input_ids), content_size, min(model_dict.get("stride", 384), content_size))
+        else:
+            spans = [(0, min(len(input_ids), content_size))]
+        windows.extend((doc_index, start, end) for start, end in spans)
+
+    # Sum the label distributions of tokens seen by more than one window, then average
+    num_labels = len(model.config.id2label)
+    covered = {}
+    for doc_index, start, end in windows:
+        covered[doc_index] = max(end, covered.get(doc_index, 0))
+    totals = {doc_index: torch.zeros((length, num_labels)) for doc_index, length in covered.items()}
+    counts = {doc_index: torch.zeros((length, 1)) for doc_index, length in covered.items()}
+
+    # Length bucketing: neighbouring windows in a batch have similar lengths
+    windows.sort(key=lambda window: window[2] - window[1])
+    batch_size = batch_size or max(len(windows), 1)
+    for batch_start in range(0, len(windows), batch_size):
+        batch = windows[batch_start:batch_start + batch_size]
+        max_len = max(end - start for _, start, end in batch) + 2
+        batch_ids = torch.full((len(batch), max_len), tokenizer.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(batch), max_len), dtype=torch.long)
+        for row, (doc_index, start, end) in enumerate(batch):
+            window_ids = [tokenizer.cls_token_id] + documents_ids[doc_index][start:end] + [tokenizer.sep_token_id]
+            batch_ids[row, :len(window_ids)] = torch.tensor(window_ids, dtype=torch.long)
+            attention_mask[row, :len(window_ids)] = 1
+
+        start_time = time.perf_counter()
+        with torch.no_grad():
+            outputs = model(input_ids=batch_ids, attention_mask=attention_mask)
+            probs = torch.softmax(outputs.logits, dim=-1)
+        encoding_cache.record_encoder(time.perf_counter() - start_time)
+
+        for row, (doc_index, start, end) in enumerate(batch):
+            totals[doc_index][start:end] += probs[row, 1:1 + end - start]
+            counts[doc_index][start:end] += 1
+
+    return [
+        torch.argmax(totals[doc_index] / counts[doc_index], dim=-1).numpy()
+        if doc_index in totals else np.zeros(0, dtype=np.int64)
+        for doc_index in range(len(documents_ids))
+    ]
+
+def decode_bert_entities(text: str, label_ids, offsets, id2label: Dict[int, str], word_ids: Optional[List[Optional[int]]] = None) -> List[Entity]:
+    """Group per-token label ids into entities with character offsets into text"""
+    label_ids = np.asarray(label_ids, dtype=np.int64)
+    offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 2)[:len(label_ids)]
     
-    # Tokenize the text
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-    
-    # Get predictions
-    with torch.no_grad():
-        outputs = model(**inputs)
-        predictions = torch.argmax(outputs.logits, dim=2)
+    # Map every label id to an entity type (0 = outside) and whether it is a B- tag
+    type_names = ["O"]
+    label_types = np.zeros(len(id2label), dtype=np.int64)
+    label_begins = np.zeros(len(id2label), dtype=bool)
+    for label_id, label in id2label.items():
+        if label == "O":
+            continue
+        entity_type = label[2:] if label[:2] in ("B-", "I-") else label
+        if entity_type not in type_names:
+            type_names.append(entity_type)
+        label_types[int(label_id)] = type_names.index(entity_type)
+        label_begins[int(label_id)] = label.startswith("B-")
+    types = label_types[label_ids]
+    begins = label_begins[label_ids]
     
-    # Convert predictions to entities
-    entities = []
-    tokens = tokenizer.convert_ids_to_tokens(inputs["input_ids"][0])
+    # Sub-word tokens take the label of the first token of their word
+    if word_ids is not None:
+        words = np.array([-1 if word is None else word for word in word_ids[:len(label_ids)]], dtype=np.int64)
+        first_of_word = np.ones(len(words), dtype=bool)
+        first_of_word[1:] = (words[1:] != words[:-1]) | (words[1:] == -1)
+        word_start = np.maximum.accumulate(np.where(first_of_word, np.arange(len(words)), 0))
+        types = types[word_start]
+        begins = begins & first_of_word
     
-    current_entity = None
-    current_start = 0
+    # Tokens without characters (special tokens, padding) never belong to an entity
+    keep = offsets[:, 1] > offsets[:, 0]
+    types, begins, offsets = types[keep], begins[keep], offsets[keep]
+    if len(types) == 0:
+        return []
     
-    for i, (token, pred) in enumerate(zip(tokens, predictions[0])):
-        if token.startswith("##"):
-            continue
-            
-        pred_label = model.config.id2label[pred.item()]
-        
-        if pred_label != "O":
-            if current_entity is None:
-                current_entity = pred_label
-                current_start = i
-        else:
-            if current_entity is not None:
-                # Create entity from accumulated tokens
-                entity_text = " ".join(tokens[current_start:i]).replace(" ##", "")
-                entity = Entity(
-                    text=entity_text,
-                    label=current_entity,
-                    start=current_start,
-                    end=i
-                )
-                entities.append(entity)
-                current_entity = None
+    # A run starts where the type changes or a B- tag appears, and ends right before the next start
+    inside = types != 0
+    boundary = np.ones(len(types), dtype=bool)
+    boundary[1:] = (types[1:] != types[:-1]) | begins[1:]
+    starts = np.flatnonzero(inside & boundary)
+    next_boundary = np.append(boundary[1:], True)
+    ends = np.flatnonzero(inside & next_boundary)
     
+    entities = []
+    for start_token, end_token in zip(starts, ends):
+        start_char = int(offsets[start_token, 0])
+        end_char = int(offsets[end_token, 1])
+        entities.append(Entity(
+            text=text[start_char:end_char],
+            label=type_names[types[start_token]],
+            start=start_char,
+            end=end_char
+        ))
     return entities
 
+def extract_entities_bert(text: str, model_dict) -> List[Entity]:
+    """Extract entities using BERT model"""
+    return extract_entities_bert_batch([text], model_dict)[0]
+
+def extract_entities_bert_batch(texts: List[str], model_dict, batch_size: Optional[int] = None) -> List[List[Entity]]:
+    """Extract entities from several texts using BERT model, batch_size windows per forward pass"""
+    tokenizer = model_dict["tokenizer"]
+    model = model_dict["model"]
+    
+    # Tokenize whole documents, or reuse another backend's tokens; windows are cut from the token ids afterwards
+    encodings = encoding_cache.encode(tokenizer, texts, model_dict.get("vocab_key"))
+    predictions = predict_bert_labels([encoding["input_ids"] for encoding in encodings], model_dict, batch_size)
+    
+    # Convert predictions to character-offset entities
+    return [
+        decode_bert_entities(text, prediction, encoding["offsets"], model.config.id2label, encoding["word_ids"])
+        for text, prediction, encoding in zip(texts, predictions, encodings)
+    ]
+
 def extract_entities_spacy_bert(text: str, model) -> List[Entity]:
     """Extract entities using spaCy BERT model"""
     doc = model(text)
@@ -185,10 +612,274 @@ def extract_entities_spacy_bert(text: str, model) -> List[Entity]:
         entities.append(entity)
     return entities
 
+def extract_entities_spacy_batch(texts: List[str], model, batch_size: Optional[int] = None) -> List[List[Entity]]:
+    """Extract entities from several texts using spaCy model, batch_size documents per nlp.pipe batch"""
+    # Length bucketing: pipe the documents shortest first, then restore the input order
+    order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+    results = [None] * len(texts)
+    docs = model.pipe((texts[index] for index in order), batch_size=batch_size)
+    for index, doc in zip(order, docs):
+        results[index] = [
+            Entity(text=ent.text, label=ent.label_, start=ent.start_char, end=ent.end_char)
+            for ent in doc.ents
+        ]
+    return results
+
+def extract_entities_spacy_bert_batch(texts: List[str], model, batch_size: Optional[int] = None) -> List[List[Entity]]:
+    """Extract entities from several texts using spaCy BERT model"""
+    return extract_entities_spacy_batch(texts, model, batch_size)
+
+def run_extractor(model_type: str, model, texts: List[str], batch_size: Optional[int] = None) -> List[List[Entity]]:
+    """Run texts through a loaded model with the batch extractor for its type"""
+    if model_type == "spacy":
+        return extract_entities_spacy_batch(texts, model, batch_size)
+    elif model_type in ("bert", "bert_int8", "bert_onnx"):
+        return extract_entities_bert_batch(texts, model, batch_size)
+    elif model_type == "spacy_bert":
+        return extract_entities_spacy_bert_batch(texts, model, batch_size)
+    raise ValueError(f"Unknown model type {model_type}")
+
+def extract_entities_batch(model_name: str, texts: List[str], batch_size: Optional[int] = None) -> List[List[Entity]]:
+    """Run texts through the named model in batches and return their entities in input order"""
+    model = model_registry.get(model_name)
+    batch_size = batch_size or MODEL_CONFIGS[model_name].get("batch_size")
+    return run_extractor(MODEL_CONFIGS[model_name]["type"], model, texts, batch_size)
+
+async def run_inference(model_type: str, fn, *args, deadline: Optional[float] = None):
+    """Run blocking inference in the forked workers when enabled, otherwise in the model type's thread pool"""
+    if worker_pool is not None and worker_pool.started:
+        if expired(deadline):
+            raise DeadlineExceededError(f"Deadline passed before {model_type} inference could start")
+        return await worker_pool.run(fn, *args)
+    return await inference_pools.run(model_type, fn, *args, deadline=deadline)
+
+# Identical texts already being extracted by the same model are awaited instead of run again
+single_flight = SingleFlight()
+
+async def extract_with_cache(model_name: str, texts: List[str], extract, single: bool = False,
+                             deadline: Optional[float] = None) -> List[List[Entity]]:
+    """Serve texts from the result cache and run only the misses through extract(texts)
+    
+    Misses another request is already extracting with the same model wait for its result, until
+    this request's deadline, so a burst of requests for an uncached document runs the model once.
+    If the other request's own deadline passes first, this one extracts the text itself.
+    With single=True, extract returns the entities of its one text instead of a list per text.
+    """
+    digest = await asyncio.to_thread(model_digest, model_name) if ner_cache is not None else None
+    results: List[Optional[List[Entity]]] = []
+    misses = []
+    for index, text in enumerate(texts):
+        cached = ner_cache.get(model_name, digest, text) if ner_cache is not None else None
+        if cached is None:
+            results.append(None)
+            misses.append(index)
+        else:
+            # Cached entities were validated when first extracted
+            results.append([Entity.model_construct(**entity) for entity in cached])
+    
+    async def compute(leading: List[int]) -> List[List[Entity]]:
+        computed = await extract([texts[misses[index]] for index in leading])
+        if single:
+            computed = [computed]
+        # Cached before the waiters are released, so later requests hit the cache
+        if ner_cache is not None:
+            for index, entities in zip(leading, computed):
+                ner_cache.put(model_name, digest, texts[misses[index]], [entity.model_dump() for entity in entities])
+        return computed
+    
+    if misses:
+        keys = [(model_name, text_digest(texts[index])) for index in misses]
+        for index, entities in zip(misses, await single_flight.run_many(keys, compute, deadline)):
+            results[index] = entities
+    return results
+
+paragraph_stats = ParagraphStats()
+
+async def extract_by_paragraph(model_name: str, texts: List[str], extract,
+                               deadline: Optional[float] = None) -> List[List[Entity]]:
+    """Tag the distinct paragraphs of texts through the result cache and shift their entities to document offsets
+    
+    Templated leases share most of their paragraphs, so only paragraphs the model has not seen run through extract(paragraphs).
+    """
+    split_texts = [split_paragraphs(text) for text in texts]
+    unique = list(dict.fromkeys(paragraph for paragraphs in split_texts for _, paragraph in paragraphs))
+    computed = 0
+    
+    async def extract_misses(paragraphs: List[str]) -> List[List[Entity]]:
+        nonlocal computed
+        computed += len(paragraphs)
+        return await extract(paragraphs)
+    
+    paragraph_entities = dict(zip(unique, await extract_with_cache(
+        model_name, unique, extract_misses, deadline=deadline
+    ))) if unique else {}
+    paragraph_stats.record(sum(len(paragraphs) for paragraphs in split_texts), computed)
+    return [
+        to_document_offsets(paragraphs, [paragraph_entities[paragraph] for _, paragraph in paragraphs])
+        for paragraphs in split_texts
+    ]
+
+def to_document_offsets(paragraphs: List[Tuple[int, str]], paragraph_entities: List[List[Entity]]) -> List[Entity]:
+    """Shift each paragraph's entities by the paragraph's offset in the document"""
+    return [
+        entity.model_copy(update={"start": entity.start + offset, "end": entity.end + offset})
+        for (offset, _), entities in zip(paragraphs, paragraph_entities)
+        for entity in entities
+    ]
+
+# prefilter=True sends only the text around cue phrases ("commence", "deposit", "$", dates, ...) to the model
+PREFILTER_RADIUS = int(os.getenv("PREFILTER_RADIUS", "80"))
+prefilter_stats = PrefilterStats()
+
+async def extract_prefiltered(model_name: str, texts: List[str], extract,
+                              deadline: Optional[float] = None) -> List[List[Entity]]:
+    """Tag only the candidate windows of texts, through the result cache, and shift their entities to document offsets"""
+    windows = [candidate_windows(text, PREFILTER_RADIUS) for text in texts]
+    for text, text_windows in zip(texts, windows):
+        prefilter_stats.record(text, text_windows)
+    window_texts = [text[start:end] for text, text_windows in zip(texts, windows) for start, end in text_windows]
+    window_entities = iter(await extract_with_cache(model_name, window_texts, extract, deadline=deadline)
+                           if window_texts else [])
+    return [
+        to_document_offsets([(start, text[start:end]) for start, end in text_windows],
+                            [next(window_entities) for _ in text_windows])
+        for text, text_windows in zip(texts, windows)
+    ]
+
+# Extracted document versions, so a resubmitted draft only re-runs the paragraphs its edit changed
+document_store = DocumentStore(int(os.getenv("NER_DOCUMENT_VERSIONS", "1000")))
+
+async def extract_incremental(model_name: str, text: str, previous_version_id: Optional[str], extract):
+    """Tag the paragraphs of text that differ from a stored earlier version and reuse the entities of the rest
+    
+    Returns the entities, the new version ID and how many paragraphs were reused and computed. The entities
+    equal a full paragraph-mode extraction of text; an unknown version, or one extracted with another model
+    or other model files, is not reused.
+    """
+    paragraphs = split_paragraphs(text)
+    texts = [paragraph for _, paragraph in paragraphs]
+    digest = await asyncio.to_thread(model_digest, model_name)
+    
+    reused: Dict[int, List[Entity]] = {}
+    previous = document_store.get(previous_version_id) if previous_version_id else None
+    if previous is not None and previous["model_name"] == model_name and previous["digest"] == digest:
+        for new_index, old_index in match_paragraphs(previous["paragraphs"], texts).items():
+            reused[new_index] = previous["entities"][old_index]
+    
+    changed = list(dict.fromkeys(paragraph for index, paragraph in enumerate(texts) if index not in reused))
+    computed = dict(zip(changed, await extract_with_cache(model_name, changed, extract))) if changed else {}
+    paragraph_entities = [reused[index] if index in reused else computed[paragraph] for index, paragraph in enumerate(texts)]
+    paragraph_stats.record(len(texts), len(texts) - len(reused))
+    
+    version_id = document_store.put({
+        "model_name": model_name, "digest": digest, "paragraphs": texts, "entities": paragraph_entities
+    })
+    return to_document_offsets(paragraphs, paragraph_entities), version_id, len(reused), len(texts) - len(reused)
+
+def majority_vote(text: str, model_entities: List[List[Entity]]) -> List[Entity]:
+    """Entities whose exact span and label more than half of the models found, in document order"""
+    votes: Dict[Tuple[int, int, str], int] = {}
+    for entities in model_entities:
+        for span in {(entity.start, entity.end, entity.label) for entity in entities}:
+            votes[span] = votes.get(span, 0) + 1
+    return [
+        Entity(text=text[start:end], label=label, start=start, end=end)
+        for (start, end, label), count in sorted(votes.items())
+        if count * 2 > len(model_entities)
+    ]
+
+# mode="auto" runs the first model on every text and the second only around missing or implausible labels
+CASCADE_FIRST_MODEL = os.getenv("CASCADE_FIRST_MODEL", "spacy")
+CASCADE_SECOND_MODEL = os.getenv("CASCADE_SECOND_MODEL", "bert")
+cascade_stats = CascadeStats()
+
+# model="auto" picks the most accurate of ROUTER_MODELS (most accurate first) whose latency, predicted from the
+# document length by per-model cost curves fitted to measured latencies, fits the request's budget
+ROUTER_MODELS = [name.strip() for name in os.getenv("ROUTER_MODELS", "bert,spacy_bert,spacy").split(",") if name.strip()]
+# Starting curves (base ms, ms per character) until measurements replace them
+ROUTER_PRIORS = {"spacy": (2.0, 0.002), "spacy_bert": (5.0, 0.004), "bert": (20.0, 0.06)}
+model_router = ModelRouter({
+    name: CostCurve(*ROUTER_PRIORS.get(name, ROUTER_PRIORS["bert"])) for name in ROUTER_MODELS if name in MODEL_CONFIGS
+})
+
+def route_request(text: str, budget_ms: Optional[float]) -> Tuple[str, float]:
+    """The model model="auto" runs a text with, and its predicted latency; raises 500 if no model can serve"""
+    available = [name for name in model_router.curves if is_served(name) and model_registry.state(name) != "failed"]
+    if not available:
+        raise HTTPException(status_code=500, detail="No model available for routing")
+    return model_router.choose(len(text), budget_ms, available)
+
+def request_models(model_name: str, mode: Optional[str]) -> List[str]:
+    """The models a request runs, validated; raises 400 for an unknown model or mode and 500 for a failed model"""
+    if mode not in (None, "auto"):
+        raise HTTPException(status_code=400, detail=f"Mode '{mode}' not available")
+    model_names = [CASCADE_FIRST_MODEL, CASCADE_SECOND_MODEL] if mode == "auto" else [model_name]
+    for name in model_names:
+        if not is_served(name):
+            raise HTTPException(status_code=400, detail=f"Model '{name}' not available")
+        if model_registry.state(name) == "failed":
+            raise HTTPException(status_code=500, detail=f"Model '{name}' not loaded")
+    return model_names
+
+def cached_batcher_extract(model_name: str, deadline: Optional[float] = None):
+    """extract(texts) through the result cache and the model's micro-batcher"""
+    return lambda texts: extract_with_cache(model_name, texts, lambda misses: asyncio.gather(
+        *(batchers[model_name].submit(text, deadline) for text in misses)
+    ), deadline=deadline)
+
+def cached_batch_extract(model_name: str, batch_size: Optional[int] = None, deadline: Optional[float] = None):
+    """extract(texts) through the result cache and one batched inference call"""
+    return lambda texts: extract_with_cache(model_name, texts, lambda misses: run_inference(
+        MODEL_CONFIGS[model_name]["type"], extract_entities_batch, model_name, misses, batch_size, deadline=deadline
+    ), deadline=deadline)
+
+# One micro-batcher per model turns concurrent single-text requests into batched inference
+batchers = {
+    model_name: MicroBatcher(
+        model_name,
+        partial(extract_entities_batch, model_name),
+        max_batch_size=config.get("max_batch_size", 8),
+        max_wait_ms=config.get("max_wait_ms", 5),
+        max_concurrent_batches=worker_pool.num_workers if worker_pool else inference_pools.get_size(config["type"]),
+        runner=partial(run_inference, config["type"]),
+        max_queue_size=config.get("max_queue_size", NER_MAX_QUEUE_SIZE) or None
+    )
+    for model_name, config in MODEL_CONFIGS.items()
+}
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    """Shed load with 429 and a hint for when the queue will have room again"""
+    return JSONResponse(status_code=429, content={"detail": str(exc)},
+                        headers={"Retry-After": exc.retry_after_header})
+
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError):
+    """The client's deadline passed before its request got to run"""
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize all models on startup"""
-    load_models()
+    """Load the models in the background so the server starts serving right away"""
+    if worker_pool is not None:
+        # Workers must be forked after the models are in memory to share them, and before the
+        # server accepts requests, which would otherwise run inference in this process. So in this
+        # mode startup blocks until the models are loaded and every worker has warmed up, and
+        # /health/live answers only then.
+        torch.set_num_threads(1)
+        load_models()
+        worker_pool.start(warmup=warm_up_worker)
+    else:
+        threading.Thread(target=load_models, name="model-preload", daemon=True).start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the micro-batching tasks and inference pools"""
+    for batcher in batchers.values():
+        await batcher.close()
+    inference_pools.shutdown(wait=False)
+    if worker_pool is not None:
+        worker_pool.shutdown()
 
 @app.get("/")
 async def root():
@@ -199,18 +890,62 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     loaded_models = {name: model is not None for name, model in models.items()}
-    return {"status": "healthy", "models_loaded": loaded_models}
+    return {
+        "status": "healthy",
+        "models_loaded": loaded_models,
+        "models": model_registry.get_status(),
+        "memory_used_bytes": model_registry.memory_used(),
+        "memory_budget_bytes": model_registry.memory_budget_bytes
+    }
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up and its event loop is responding"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: every preloaded model is loaded and warmed up"""
+    ready_models = {name: model_registry.is_ready(name) for name in PRELOAD_MODELS if name in MODEL_CONFIGS}
+    ready = all(ready_models.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "models_ready": ready_models,
+            "models": {name: status["state"] for name, status in model_registry.get_status().items()}
+        }
+    )
+
+@app.get("/metrics")
+async def get_metrics():
+    """Inference queue depth, batch-size distribution and pool usage"""
+    return {
+        "batching": {name: batcher.get_stats() for name, batcher in batchers.items()},
+        "pools": inference_pools.get_stats(),
+        "workers": worker_pool.get_stats() if worker_pool is not None else None,
+        "cache": ner_cache.get_stats() if ner_cache is not None else None,
+        "paragraphs": paragraph_stats.get_stats(),
+        "documents": document_store.get_stats(),
+        "cascade": cascade_stats.get_stats(),
+        "prefilter": prefilter_stats.get_stats(),
+        "encoding": encoding_cache.get_stats(),
+        "router": model_router.get_stats(),
+        "single_flight": single_flight.get_stats()
+    }
 
 @app.get("/models")
 async def get_available_models():
-    """Get list of available models"""
+    """Get list of available models; models that are not resident are loaded on first use"""
     available_models = []
-    for model_name, model in models.items():
-        if model is not None:
+    for model_name, status in model_registry.get_status().items():
+        if status["state"] != "failed" and is_served(model_name):
             available_models.append({
                 "name": model_name,
                 "display_name": get_model_display_name(model_name),
-                "type": MODEL_CONFIGS[model_name]["type"]
+                "type": MODEL_CONFIGS[model_name]["type"],
+                "state": status["state"],
+                "memory_bytes": status["memory_bytes"]
             })
     return {"models": available_models}
 
@@ -219,59 +954,202 @@ def get_model_display_name(model_name: str) -> str:
     display_names = {
         "spacy": "Fine-tuned spaCy NER Model",
         "bert": "BERT-based NER Model", 
+        "bert-student": "Distilled BERT NER Model",
+        "bert-pruned": "Pruned BERT NER Model",
+        "bert-int8": "BERT-based NER Model (int8 quantized)",
+        "bert_onnx": "BERT-based NER Model (ONNX Runtime)",
         "spacy_bert": "spaCy + BERT NER Model"
     }
     return display_names.get(model_name, model_name)
 
+def ner_content(text: str, entities: List[Entity], model_name: str, echo_text: bool = True) -> Dict[str, Any]:
+    """NERResponse body as a dict; without echo_text the text is referenced by its SHA-256 and length"""
+    content: Dict[str, Any] = {"entities": entities}
+    if echo_text:
+        content["text"] = text
+    else:
+        content["text_digest"] = text_digest(text)
+        content["text_length"] = len(text)
+    content["model"] = model_name
+    return content
+
 @app.post("/extract-entities", response_model=NERResponse)
-async def extract_entities(request: TextRequest):
+async def extract_entities(request: TextRequest, x_latency_budget_ms: Optional[float] = Header(None),
+                           x_deadline_ms: Optional[float] = Header(None)):
     """Extract NER entities from the provided text using the specified model"""
     model_name = request.model
     text = request.text
+    deadline = deadline_after(request.deadline_ms or x_deadline_ms)
+    routed = model_name == "auto" and request.mode is None
+    if routed:
+        model_name, predicted_ms = route_request(text, request.latency_budget_ms or x_latency_budget_ms)
+    request_models(model_name, request.mode)
+    
+    async def submit(texts: List[str]) -> List[Entity]:
+        # Measured latencies of routed requests refine the model's cost curve
+        start = time.perf_counter()
+        entities = await batchers[model_name].submit(texts[0], deadline)
+        if routed:
+            model_router.record(model_name, len(text), (time.perf_counter() - start) * 1000, predicted_ms)
+        return entities
+    
+    try:
+        if request.mode == "auto":
+            model_name = "auto"
+            entities = await run_cascade(
+                [text],
+                cached_batcher_extract(CASCADE_FIRST_MODEL, deadline),
+                cached_batcher_extract(CASCADE_SECOND_MODEL, deadline),
+                cascade_stats
+            )
+        elif request.prefilter:
+            entities = await extract_prefiltered(model_name, [text], lambda windows: asyncio.gather(
+                *(batchers[model_name].submit(window, deadline) for window in windows)
+            ), deadline)
+        elif request.by_paragraph:
+            # The micro-batcher batches the new paragraphs together
+            entities = await extract_by_paragraph(model_name, [text], lambda paragraphs: asyncio.gather(
+                *(batchers[model_name].submit(paragraph, deadline) for paragraph in paragraphs)
+            ), deadline)
+        else:
+            entities = await extract_with_cache(model_name, [text], submit, single=True, deadline=deadline)
+        
+        # Serialized straight from the extracted entities, without re-validating them as a NERResponse
+        return FastJSONResponse(ner_content(text, entities[0], model_name, request.echo_text))
+    
+    except (QueueFullError, DeadlineExceededError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing text with {model_name}: {str(e)}")
+
+@app.post("/extract-entities/batch", response_model=BatchNERResponse)
+async def extract_entities_batch_endpoint(request: BatchTextRequest, x_deadline_ms: Optional[float] = Header(None)):
+    """Extract NER entities from several texts in one call, batching them through the model"""
+    model_name = request.model
+    deadline = deadline_after(request.deadline_ms or x_deadline_ms)
+    
+    if request.batch_size is not None and request.batch_size < 1:
+        raise HTTPException(status_code=400, detail="batch_size must be at least 1")
     
-    if model_name not in models:
+    request_models(model_name, request.mode)
+    
+    try:
+        extract = lambda texts: run_inference(
+            MODEL_CONFIGS[model_name]["type"], extract_entities_batch, model_name, texts, request.batch_size,
+            deadline=deadline
+        )
+        if request.mode == "auto":
+            model_name = "auto"
+            results = await run_cascade(
+                request.texts,
+                cached_batch_extract(CASCADE_FIRST_MODEL, request.batch_size, deadline),
+                cached_batch_extract(CASCADE_SECOND_MODEL, request.batch_size, deadline),
+                cascade_stats
+            )
+        elif request.prefilter:
+            results = await extract_prefiltered(model_name, request.texts, extract, deadline)
+        elif request.by_paragraph:
+            results = await extract_by_paragraph(model_name, request.texts, extract, deadline)
+        else:
+            results = await extract_with_cache(model_name, request.texts, extract, deadline=deadline)
+        return FastJSONResponse({"results": [
+            ner_content(text, entities, model_name, request.echo_text)
+            for text, entities in zip(request.texts, results)
+        ]})
+    
+    except (QueueFullError, DeadlineExceededError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing texts with {model_name}: {str(e)}")
+
+@app.post("/extract-entities/incremental", response_model=IncrementalNERResponse)
+async def extract_entities_incremental(request: IncrementalTextRequest):
+    """Extract NER entities from an edited document, re-running only the paragraphs changed since previous_version_id
+    
+    Every paragraph is tagged on its own, so the result equals a by_paragraph extraction of the text.
+    It can differ from a whole-document run for entities that span paragraphs or depend on BERT
+    context from neighbouring paragraphs; extraction_mode says so in the response.
+    """
+    model_name = request.model
+    
+    if not is_served(model_name):
         raise HTTPException(status_code=400, detail=f"Model '{model_name}' not available")
     
-    model = models[model_name]
-    if model is None:
+    if model_registry.state(model_name) == "failed":
         raise HTTPException(status_code=500, detail=f"Model '{model_name}' not loaded")
     
     try:
-        if MODEL_CONFIGS[model_name]["type"] == "spacy":
-            entities = extract_entities_spacy(text, model)
-        elif MODEL_CONFIGS[model_name]["type"] == "bert":
-            entities = extract_entities_bert(text, model)
-        elif MODEL_CONFIGS[model_name]["type"] == "spacy_bert":
-            entities = extract_entities_spacy_bert(text, model)
-        else:
-            raise HTTPException(status_code=500, detail=f"Unknown model type for {model_name}")
-        
-        return NERResponse(
+        entities, version_id, reused, computed = await extract_incremental(
+            model_name, request.text, request.previous_version_id,
+            lambda paragraphs: asyncio.gather(*(batchers[model_name].submit(paragraph) for paragraph in paragraphs))
+        )
+        return IncrementalNERResponse(
             entities=entities,
-            text=text
+            text=request.text,
+            version_id=version_id,
+            reused_paragraphs=reused,
+            computed_paragraphs=computed
         )
     
+    except QueueFullError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing text with {model_name}: {str(e)}")
 
+@app.post("/extract-entities/compare", response_model=CompareResponse)
+async def extract_entities_compare(request: CompareRequest):
+    """Run several models on the same text concurrently and return each one's entities and time, plus a majority vote"""
+    model_names = list(dict.fromkeys(request.models))
+    if not model_names:
+        raise HTTPException(status_code=400, detail="models must not be empty")
+    for model_name in model_names:
+        if not is_served(model_name):
+            raise HTTPException(status_code=400, detail=f"Model '{model_name}' not available")
+    
+    async def run_model(model_name: str) -> ModelComparison:
+        # Each model type has its own inference pool, so the models run side by side.
+        # The result cache is bypassed so the times are the models' own.
+        start = time.perf_counter()
+        try:
+            if model_registry.state(model_name) == "failed":
+                raise RuntimeError(f"Model '{model_name}' not loaded")
+            entities = await batchers[model_name].submit(request.text)
+            error = None
+        except Exception as e:
+            entities, error = [], str(e)
+        return ModelComparison(entities=entities, wall_time_ms=(time.perf_counter() - start) * 1000, error=error)
+    
+    start = time.perf_counter()
+    comparisons = await asyncio.gather(*(run_model(model_name) for model_name in model_names))
+    wall_time_ms = (time.perf_counter() - start) * 1000
+    
+    succeeded = [comparison.entities for comparison in comparisons if comparison.error is None]
+    return CompareResponse(
+        text=request.text,
+        results=dict(zip(model_names, comparisons)),
+        majority=majority_vote(request.text, succeeded),
+        wall_time_ms=wall_time_ms
+    )
+
 @app.get("/entity-types")
 async def get_entity_types(model: str = "spacy"):
     """Get the list of entity types the specified model can recognize"""
-    if model not in models:
+    if not is_served(model):
         raise HTTPException(status_code=400, detail=f"Model '{model}' not available")
     
-    model_obj = models[model]
-    if model_obj is None:
+    try:
+        model_obj = await inference_pools.run(MODEL_CONFIGS[model]["type"], model_registry.get, model)
+    except ModelNotLoadedError:
         raise HTTPException(status_code=500, detail=f"Model '{model}' not loaded")
     
     try:
         if MODEL_CONFIGS[model]["type"] == "spacy":
             ner = model_obj.get_pipe("ner")
             return {"entity_types": list(ner.labels)}
-        elif MODEL_CONFIGS[model]["type"] == "bert":
-            # For BERT models, return the label2id mapping
-            label2id = model_obj["model"].config.label2id
-            return {"entity_types": list(label2id.keys())}
+        elif MODEL_CONFIGS[model]["type"] in ("bert", "bert_int8", "bert_onnx"):
+            # For BERT models (PyTorch, int8 or ONNX Runtime), return the labels in id order
+            id2label = model_obj["model"].config.id2label
+            return {"entity_types": [id2label[label_id] for label_id in sorted(id2label)]}
         else:
             return {"entity_types": []}
     except Exception as e:
@@ -286,7 +1164,7 @@ async def chat_with_document(request: ChatRequest):
             chat_helper.set_document_context(request.document_content)
         
         # Get response from OpenAI
-        response = chat_helper.get_chat_response(request.message)
+        response = await inference_pools.run("chat", chat_helper.get_chat_response, request.message)
         
         return ChatResponse(
             response=response,
@@ -315,7 +1193,7 @@ async def chat_with_document_local(request: ChatRequest):
             local_chat_helper.set_document_context(request.document_content)
         
         # Get response from local LLM
-        response = local_chat_helper.get_chat_response(request.message)
+        response = await inference_pools.run("local_chat", local_chat_helper.get_chat_response, request.message)
         
         return ChatResponse(
             response=response,
@@ -338,7 +1216,7 @@ async def clear_local_chat_history():
 async def get_local_model_info():
     """Get information about the local LLM model"""
     try:
-        model_info = local_chat_helper.get_model_info()
+        model_info = await inference_pools.run("local_chat", local_chat_helper.get_model_info)
         return {"success": True, "model_info": model_info}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting model info: {str(e)}")
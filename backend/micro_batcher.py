@@ -0,0 +1,170 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from admission import DeadlineExceededError, QueueFullError, estimate_retry_after, expired
+
+
+class MicroBatcher:
+    """Collect concurrent single-text requests for one model and run them as a batch"""
+
+    def __init__(self, name: str, batch_fn: Callable[[List[str]], List[Any]],
+                 max_batch_size: int = 8, max_wait_ms: float = 5.0, max_concurrent_batches: int = 1,
+                 runner: Optional[Callable[..., Awaitable[Any]]] = None, max_queue_size: Optional[int] = None):
+        """
+        Initialize the micro-batcher
+
+        Args:
+            name: The model the batches are run on (used in metrics)
+            batch_fn: Blocking function that maps a list of texts to a list of results
+            max_batch_size: Run a batch as soon as this many requests are waiting
+            max_wait_ms: Longest time the first request of a batch waits for company
+            max_concurrent_batches: Batches allowed to run at the same time
+            runner: Coroutine function that runs batch_fn(texts) off the event loop;
+                defaults to the loop's default executor
+            max_queue_size: Requests allowed to wait; more are rejected with QueueFullError (None = unbounded)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.max_concurrent_batches = max_concurrent_batches
+        self.runner = runner or self._run_in_default_executor
+        self.max_queue_size = max_queue_size
+        self.batch_sizes: Counter = Counter()
+        self.rejected = 0
+        self.expired = 0
+        self._queue_wait_seconds = 0.0
+        self._queued_requests = 0
+        self._compute_seconds = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting to be batched"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _ensure_worker(self):
+        """Start the batching task on the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = loop.create_task(self._collect_batches())
+
+    async def _run_in_default_executor(self, fn: Callable, *args) -> Any:
+        """Run fn in the event loop's default executor"""
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    def _retry_after(self) -> float:
+        """Seconds until the current queue has likely drained"""
+        batches = sum(self.batch_sizes.values())
+        mean_seconds = self._compute_seconds / batches if batches else self.max_wait_ms / 1000
+        return estimate_retry_after(self.queue_depth / self.max_batch_size, self.max_concurrent_batches, mean_seconds)
+
+    async def submit(self, text: str, deadline: Optional[float] = None) -> Any:
+        """
+        Queue a text and wait for its result from the batch it ends up in
+
+        Args:
+            text: The text to run
+            deadline: time.monotonic() by which the result is needed. A request still
+                queued then is dropped instead of computed, and DeadlineExceededError is raised.
+        """
+        self._ensure_worker()
+        if self.max_queue_size is not None and self._queue.qsize() >= self.max_queue_size:
+            self.rejected += 1
+            raise QueueFullError(f"Too many queued requests for {self.name}", self._retry_after())
+        if expired(deadline):
+            self.expired += 1
+            raise DeadlineExceededError(f"Deadline passed before {self.name} could start")
+
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future, time.monotonic()))
+        if deadline is None:
+            return await future
+        try:
+            # Cancels the future on timeout, so the batch it was queued for skips it
+            return await asyncio.wait_for(future, deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            self.expired += 1
+            raise DeadlineExceededError(f"Deadline passed while waiting for {self.name}") from None
+
+    async def _collect_batches(self):
+        """Gather queued requests into batches until max_batch_size or max_wait_ms is hit"""
+        while True:
+            # Wait for a free slot first so requests keep piling up while the model is busy
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self._loop.create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        """Run one batch off the event loop and hand every caller its own result"""
+        try:
+            # Callers that gave up or ran out of time while queued don't need to be computed
+            batch = [(text, future, queued_at) for text, future, queued_at in batch if not future.done()]
+            if not batch:
+                return
+            self.batch_sizes[len(batch)] += 1
+            start = time.monotonic()
+            self._queue_wait_seconds += sum(start - queued_at for _, _, queued_at in batch)
+            self._queued_requests += len(batch)
+            try:
+                results = await self.runner(self.batch_fn, [text for text, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            finally:
+                self._compute_seconds += time.monotonic() - start
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._slots.release()
+
+    async def close(self):
+        """Stop the batching task"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+            self._worker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth, batch-size distribution, rejections and queue wait vs compute time for the metrics endpoint"""
+        batches = sum(self.batch_sizes.values())
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": batches,
+            "batch_size_distribution": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            "rejected": self.rejected,
+            "expired": self.expired,
+            "mean_queue_wait_ms": round(self._queue_wait_seconds / self._queued_requests * 1000, 2) if self._queued_requests else 0.0,
+            "mean_compute_ms": round(self._compute_seconds / batches * 1000, 2) if batches else 0.0
+        }
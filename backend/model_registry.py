@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+class ModelNotLoadedError(Exception):
+    """Raised when a model cannot be loaded"""
+
+
+class ModelRegistry:
+    """Load models on first use and evict the least recently used ones to stay within a memory budget"""
+
+    def __init__(self, model_names: Iterable[str], loader: Callable[[str], Any],
+                 memory_fn: Callable[[str, Any], int], memory_budget_bytes: Optional[int] = None,
+                 warmup_fn: Optional[Callable[[str, Any], None]] = None):
+        """
+        Initialize the registry
+
+        Args:
+            model_names: Names of the models that can be loaded
+            loader: Loads a model by name; raises on failure
+            memory_fn: Resident memory of a model in bytes; called with model=None for an
+                estimate before the model is loaded
+            memory_budget_bytes: Total memory the loaded models may use (None = unlimited)
+            warmup_fn: Runs a first inference on a freshly loaded model before it is served
+        """
+        self.loader = loader
+        self.memory_fn = memory_fn
+        self.memory_budget_bytes = memory_budget_bytes
+        self.warmup_fn = warmup_fn
+        # Loaded model objects by name; None while a model is not resident
+        self.models: Dict[str, Any] = {name: None for name in model_names}
+        self._status: Dict[str, Dict[str, Any]] = {
+            name: {"state": "not_loaded", "memory_bytes": 0, "last_used": None, "error": None}
+            for name in self.models
+        }
+        self._lru: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in self.models}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.models
+
+    def state(self, name: str) -> str:
+        """Lifecycle state of a model: not_loaded, loading, warming, loaded, evicted or failed"""
+        with self._lock:
+            if self.models.get(name) is not None:
+                return "loaded"
+            return self._status[name]["state"]
+
+    def _touch(self, name: str):
+        """Mark a model as the most recently used"""
+        with self._lock:
+            self._status[name]["last_used"] = time.time()
+            if name in self._lru:
+                self._lru.move_to_end(name)
+
+    def get(self, name: str) -> Any:
+        """Return a loaded model, loading it first if needed"""
+        if name not in self.models:
+            raise KeyError(name)
+        model = self.models[name]
+        if model is not None:
+            self._touch(name)
+            return model
+
+        # One thread loads a given model; the others wait for it
+        with self._load_locks[name]:
+            model = self.models[name]
+            if model is not None:
+                self._touch(name)
+                return model
+            if self._status[name]["state"] == "failed":
+                raise ModelNotLoadedError(f"Model '{name}' failed to load: {self._status[name]['error']}")
+
+            self._make_room(name, self.memory_fn(name, None))
+            with self._lock:
+                self._status[name]["state"] = "loading"
+            try:
+                model = self.loader(name)
+                # One inference before serving, so no request pays for one-time allocations
+                if self.warmup_fn is not None:
+                    with self._lock:
+                        self._status[name]["state"] = "warming"
+                    self.warmup_fn(name, model)
+            except Exception as e:
+                with self._lock:
+                    self._status[name].update(state="failed", error=str(e))
+                raise ModelNotLoadedError(f"Model '{name}' failed to load: {str(e)}") from e
+
+            memory_bytes = self.memory_fn(name, model)
+            with self._lock:
+                self.models[name] = model
+                self._status[name].update(state="loaded", memory_bytes=memory_bytes, error=None)
+                self._lru[name] = None
+            self._touch(name)
+            # The real footprint can differ from the estimate
+            self._make_room(name, 0)
+            return model
+
+    def _make_room(self, name: str, incoming_bytes: int):
+        """Evict least recently used models until incoming_bytes fits in the budget"""
+        if self.memory_budget_bytes is None:
+            return
+        with self._lock:
+            candidates = [other for other in self._lru if other != name]
+        for other in candidates:
+            if self.memory_used() + incoming_bytes <= self.memory_budget_bytes:
+                return
+            self.evict(other)
+        if self.memory_used() + incoming_bytes > self.memory_budget_bytes:
+            print(f"Model {name} does not fit in the memory budget on its own; loading it anyway")
+
+    def evict(self, name: str):
+        """Drop a loaded model; it is reloaded on its next use"""
+        with self._lock:
+            if self.models.get(name) is None:
+                return
+            self.models[name] = None
+            self._lru.pop(name, None)
+            self._status[name].update(state="evicted", memory_bytes=0)
+        print(f"Evicted model {name} to stay within the memory budget")
+
+    def _preload_one(self, name: str):
+        """Load one model, recording a failure instead of raising"""
+        try:
+            self.get(name)
+            print(f"Model {name} loaded successfully!")
+        except ModelNotLoadedError as e:
+            print(f"Failed to load model {name}: {str(e)}")
+
+    def preload(self, names: Iterable[str], parallel: bool = False):
+        """Load the given models now, one after another or all at once"""
+        names = list(names)
+        if not parallel:
+            for name in names:
+                self._preload_one(name)
+            return
+        threads = [threading.Thread(target=self._preload_one, args=(name,), name=f"load-{name}") for name in names]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def is_ready(self, name: str) -> bool:
+        """Whether a model is loaded and warmed up"""
+        return self.state(name) == "loaded"
+
+    def memory_used(self) -> int:
+        """Memory of all resident models in bytes"""
+        with self._lock:
+            return sum(status["memory_bytes"] for status in self._status.values())
+
+    def loaded_models(self) -> List[str]:
+        """Names of the resident models"""
+        return [name for name, model in self.models.items() if model is not None]
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """State, resident memory and last use of every model"""
+        with self._lock:
+            status = {name: dict(entry) for name, entry in self._status.items()}
+        for name, entry in status.items():
+            if self.models.get(name) is not None:
+                entry["state"] = "loaded"
+        return status
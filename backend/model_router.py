@@ -0,0 +1,105 @@
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+class CostCurve:
+    """
+    Latency of a model as a linear function of document length, fitted online by
+    exponentially weighted least squares so it follows changes in load and hardware.
+    Starts from a prior line that fades as real observations come in.
+    """
+
+    def __init__(self, base_ms: float, ms_per_char: float, decay: float = 0.98, prior_weight: float = 2.0,
+                 prior_length: int = 10000):
+        self.decay = decay
+        self._weight = self._sum_x = self._sum_y = self._sum_xx = self._sum_xy = 0.0
+        # The prior is two pseudo-observations on the prior line
+        for length in (0, prior_length):
+            self._add(length, base_ms + ms_per_char * length, prior_weight / 2)
+
+    def _add(self, length: float, latency_ms: float, weight: float = 1.0):
+        self._weight = self._weight * self.decay + weight
+        self._sum_x = self._sum_x * self.decay + weight * length
+        self._sum_y = self._sum_y * self.decay + weight * latency_ms
+        self._sum_xx = self._sum_xx * self.decay + weight * length * length
+        self._sum_xy = self._sum_xy * self.decay + weight * length * latency_ms
+
+    def coefficients(self) -> Tuple[float, float]:
+        """(base_ms, ms_per_char) of the current fit"""
+        denominator = self._weight * self._sum_xx - self._sum_x ** 2
+        slope = (self._weight * self._sum_xy - self._sum_x * self._sum_y) / denominator if denominator > 0 else 0.0
+        slope = max(slope, 0.0)
+        return (self._sum_y - slope * self._sum_x) / self._weight, slope
+
+    def predict(self, length: int) -> float:
+        """Expected latency in milliseconds of a document of length characters"""
+        base_ms, ms_per_char = self.coefficients()
+        return max(base_ms + ms_per_char * length, 0.0)
+
+    def update(self, length: int, latency_ms: float):
+        """Fit a measured latency"""
+        self._add(length, latency_ms)
+
+
+class ModelRouter:
+    """Picks the most accurate model whose predicted latency fits a request's budget"""
+
+    def __init__(self, curves: Dict[str, CostCurve]):
+        """
+        Initialize the router
+
+        Args:
+            curves: Cost curve per model, most accurate model first
+        """
+        self.curves = curves
+        self._lock = threading.Lock()
+        self._decisions = {model_name: 0 for model_name in curves}
+        self._over_budget = 0
+        self._errors = {model_name: {"observations": 0, "abs_error_ms": 0.0, "abs_pct_error": 0.0} for model_name in curves}
+
+    def choose(self, length: int, budget_ms: Optional[float] = None,
+               available: Optional[Iterable[str]] = None) -> Tuple[str, float]:
+        """
+        The most accurate available model predicted to finish within budget_ms, or the one
+        predicted fastest when none fits; returns it with its predicted latency
+        """
+        available = set(self.curves if available is None else available)
+        with self._lock:
+            predictions = [(model_name, curve.predict(length)) for model_name, curve in self.curves.items()
+                           if model_name in available]
+            if not predictions:
+                raise ValueError("No model available for routing")
+            fitting = [prediction for prediction in predictions if budget_ms is None or prediction[1] <= budget_ms]
+            if fitting:
+                choice = fitting[0]
+            else:
+                self._over_budget += 1
+                choice = min(predictions, key=lambda prediction: prediction[1])
+            self._decisions[choice[0]] += 1
+            return choice
+
+    def record(self, model_name: str, length: int, latency_ms: float, predicted_ms: float):
+        """Update the model's cost curve with a measured latency and track the prediction error"""
+        with self._lock:
+            self.curves[model_name].update(length, latency_ms)
+            errors = self._errors[model_name]
+            errors["observations"] += 1
+            errors["abs_error_ms"] += abs(latency_ms - predicted_ms)
+            errors["abs_pct_error"] += abs(latency_ms - predicted_ms) / max(latency_ms, 1e-6)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {}
+            for model_name, curve in self.curves.items():
+                base_ms, ms_per_char = curve.coefficients()
+                errors = self._errors[model_name]
+                observations = errors["observations"]
+                models[model_name] = {
+                    "decisions": self._decisions[model_name],
+                    "observations": observations,
+                    "mean_abs_error_ms": round(errors["abs_error_ms"] / observations, 2) if observations else None,
+                    "mean_abs_pct_error": round(errors["abs_pct_error"] / observations, 4) if observations else None,
+                    "base_ms": round(base_ms, 3),
+                    "ms_per_1k_chars": round(ms_per_char * 1000, 3)
+                }
+            return {"over_budget": self._over_budget, "models": models}
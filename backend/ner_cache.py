@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from atomic_file import atomic_path
+
+
+def text_digest(text: str) -> str:
+    """SHA-256 of a text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ArtifactDigests:
+    """Content digests of model artifacts, re-hashed only when a file's size or mtime changes"""
+
+    def __init__(self, check_interval: float = 5.0):
+        """
+        Initialize the digest tracker
+
+        Args:
+            check_interval: Seconds between checks of the artifact files for changes
+        """
+        self.check_interval = check_interval
+        self._file_digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._digests: Dict[Tuple[str, ...], Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _files(paths: Iterable[str]) -> List[str]:
+        """Every file under the given files and directories, in a stable order"""
+        files = []
+        for path in paths:
+            if os.path.isfile(path):
+                files.append(path)
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, name) for name in names)
+        return sorted(files)
+
+    def _file_digest(self, path: str) -> str:
+        """SHA-256 of one file, reused while its size and mtime are unchanged"""
+        stat = os.stat(path)
+        fingerprint = (stat.st_size, stat.st_mtime_ns)
+        cached = self._file_digests.get(path)
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        self._file_digests[path] = (fingerprint, sha.hexdigest())
+        return sha.hexdigest()
+
+    def digest(self, paths: Iterable[str]) -> str:
+        """Combined digest of the model files under paths"""
+        paths = tuple(paths)
+        with self._lock:
+            cached = self._digests.get(paths)
+            if cached is not None and time.monotonic() - cached[0] < self.check_interval:
+                return cached[1]
+            sha = hashlib.sha256()
+            for path in self._files(paths):
+                sha.update(path.encode("utf-8"))
+                sha.update(self._file_digest(path).encode("ascii"))
+            digest = sha.hexdigest()[:16]
+            self._digests[paths] = (time.monotonic(), digest)
+            return digest
+
+
+class NERResultCache:
+    """Entities per (model, model artifact digest, text hash) in a bounded memory LRU and an optional disk tier"""
+
+    def __init__(self, max_bytes: int, disk_dir: Optional[str] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_bytes: Size of the serialized entries the memory tier may hold
+            disk_dir: Directory of the persistent tier (None = memory only). Entries are
+                stored under <model>/<digest>/, so results of changed model files are
+                never read and are deleted when a new digest is first written.
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self._bytes = 0
+        self._known_digests: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _disk_path(self, key: Tuple[str, str, str]) -> str:
+        model_name, digest, text_hash = key
+        return os.path.join(self.disk_dir, model_name, digest, text_hash[:2], f"{text_hash}.json")
+
+    def _remember(self, key: Tuple[str, str, str], payload: bytes):
+        """Add an entry to the memory tier, evicting the least recently used ones to fit"""
+        if len(payload) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key))
+        self._entries[key] = payload
+        self._bytes += len(payload)
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def get(self, model_name: str, digest: str, text: str) -> Optional[List[Dict[str, Any]]]:
+        """Cached entities of a text, or None"""
+        key = (model_name, digest, text_digest(text))
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(payload)
+
+        if self.disk_dir is not None:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    payload = f.read()
+            except OSError:
+                payload = None
+            if payload is not None:
+                with self._lock:
+                    self._remember(key, payload)
+                    self.disk_hits += 1
+                return json.loads(payload)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, model_name: str, digest: str, text: str, entities: List[Dict[str, Any]]):
+        """Store the entities of a text"""
+        key = (model_name, digest, text_digest(text))
+        payload = json.dumps(entities, separators=(",", ":")).encode("utf-8")
+        with self._lock:
+            self._remember(key, payload)
+            new_digest = self._known_digests.get(model_name) != digest
+            self._known_digests[model_name] = digest
+
+        if self.disk_dir is not None:
+            if new_digest:
+                self._remove_stale(model_name, digest)
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with atomic_path(path) as tmp_path, open(tmp_path, "wb") as f:
+                f.write(payload)
+
+    def _remove_stale(self, model_name: str, digest: str):
+        """Delete a model's disk entries from other artifact digests"""
+        model_dir = os.path.join(self.disk_dir, model_name)
+        if not os.path.isdir(model_dir):
+            return
+        for name in os.listdir(model_dir):
+            if name != digest:
+                shutil.rmtree(os.path.join(model_dir, name), ignore_errors=True)
+
+    def clear(self):
+        """Drop the memory tier"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit and miss counters and memory-tier usage"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "disk_dir": self.disk_dir
+            }
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Per-entity accuracy of the NER models against datasets/golden_data.csv
+
+Scores follow result_comparison.ipynb: every test lease has one golden value per
+entity type, and a model's prediction for that type is its last entity with the
+label, as in the prediction CSVs the notebooks wrote. Exact match compares the
+stripped strings. Partial match buckets the token-sort similarity into
+1.0 / 0.75 / 0.5 / 0.25 / 0.0 and counts a score of at least 0.5 as a hit.
+
+Usage:
+    python ner_evaluation.py --models bert bert-int8
+"""
+
+import argparse
+import csv
+import json
+import os
+from difflib import SequenceMatcher
+from typing import Callable, Dict, List, Optional
+
+GOLDEN_DATA_PATH = "./datasets/golden_data.csv"
+
+ENTITY_COLUMNS = [
+    "LESSOR_NAME", "LESSEE_NAME", "PROPERTY_ADDRESS",
+    "LEASE_START_DATE", "LEASE_END_DATE",
+    "RENT_AMOUNT", "SECURITY_DEPOSIT_AMOUNT"
+]
+
+
+def load_golden_data(path: str = GOLDEN_DATA_PATH) -> Dict[str, Dict[str, str]]:
+    """Golden entity values per lease file path"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["FILE_PATH"]: {column: row.get(column) or "" for column in ENTITY_COLUMNS}
+                for row in csv.DictReader(f)}
+
+
+def entity_values(entities) -> Dict[str, str]:
+    """The text of the last entity of every label, the way the prediction CSVs were built"""
+    return {entity.label: entity.text for entity in entities}
+
+
+def token_sort_ratio(a: str, b: str) -> int:
+    """Similarity of two strings with their words sorted, from 0 to 100"""
+    a = " ".join(sorted(a.lower().split()))
+    b = " ".join(sorted(b.lower().split()))
+    return round(100 * SequenceMatcher(None, a, b).ratio())
+
+
+def exact_score(predicted: Optional[str], golden: Optional[str]) -> float:
+    """1.0 when the prediction equals the golden value, else 0.0"""
+    return float((predicted or "").strip() == (golden or "").strip())
+
+
+def partial_score(predicted: Optional[str], golden: Optional[str]) -> float:
+    """Bucketed fuzzy similarity of the prediction to the golden value"""
+    if not predicted or not golden:
+        return 0.0
+    score = token_sort_ratio(predicted.strip(), golden.strip())
+    if score >= 95:
+        return 1.0
+    elif score >= 85:
+        return 0.75
+    elif score >= 70:
+        return 0.5
+    elif score >= 50:
+        return 0.25
+    return 0.0
+
+
+def score_predictions(predictions: Dict[str, Dict[str, str]], golden: Dict[str, Dict[str, str]],
+                      score_fn: Callable[[Optional[str], Optional[str]], float],
+                      threshold: float) -> Dict[str, Dict[str, float]]:
+    """
+    Precision, recall and F1 per entity type
+
+    Args:
+        predictions: Predicted value per entity type, per file path
+        golden: Golden value per entity type, per file path
+        score_fn: exact_score or partial_score
+        threshold: Lowest score that counts as a true positive
+
+    Returns:
+        Metrics per entity type in the format of the *_exact.json / *_partial.json reports
+    """
+    files = [path for path in predictions if path in golden]
+    metrics = {}
+    for column in ENTITY_COLUMNS:
+        true_positives = sum(score_fn(predictions[path].get(column), golden[path][column]) >= threshold for path in files)
+        total = len(files)
+        # One golden value and one prediction per file, so precision and recall share a denominator
+        precision = true_positives / total if total else 0
+        recall = true_positives / total if total else 0
+        f1 = 2 * precision * recall / (precision + recall) if (precision + recall) else 0
+        metrics[column] = {
+            "total": total,
+            "true_positives": int(true_positives),
+            "precision": round(precision, 3),
+            "recall": round(recall, 3),
+            "f1_score": round(f1, 3)
+        }
+    return metrics
+
+
+def evaluate_predictions(predictions: Dict[str, Dict[str, str]],
+                         golden: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Exact and partial match metrics for one model's predictions"""
+    return {
+        "exact": score_predictions(predictions, golden, exact_score, 1.0),
+        "partial": score_predictions(predictions, golden, partial_score, 0.5)
+    }
+
+
+def read_lease_text(file_path: str) -> str:
+    """Read a test lease the way tagged_testing_dataset.json and golden_data.csv were built"""
+    from docx import Document
+    doc = Document(file_path)
+    return "\n".join([p.text for p in doc.paragraphs if p.text.strip()]).strip()
+
+
+def predict_golden_files(extract_fn: Callable[[List[str]], List], golden: Dict[str, Dict[str, str]]) -> Dict[str, Dict[str, str]]:
+    """Run extract_fn over every golden lease and keep one value per label"""
+    paths = [path for path in golden if os.path.exists(path)]
+    results = extract_fn([read_lease_text(path) for path in paths])
+    return {path: entity_values(entities) for path, entities in zip(paths, results)}
+
+
+def format_report(reports: Dict[str, Dict[str, Dict[str, Dict[str, float]]]]) -> str:
+    """Side-by-side F1 table of several models' exact and partial metrics"""
+    models = list(reports)
+    header = f"{'entity':25s}" + "".join(f" | {model + ' ' + kind:>20s}" for model in models for kind in ("exact", "partial"))
+    lines = [header, "-" * len(header)]
+    for column in ENTITY_COLUMNS:
+        lines.append(f"{column:25s}" + "".join(
+            f" | {reports[model][kind][column]['f1_score']:20.3f}" for model in models for kind in ("exact", "partial")
+        ))
+    return "\n".join(lines)
+
+
+def main_cli():
+    """Evaluate the selected models and print the per-entity F1 table"""
+    parser = argparse.ArgumentParser(description="Exact and partial per-entity F1 against the golden test leases")
+    parser.add_argument("--models", nargs="+", default=["bert", "bert-int8"])
+    parser.add_argument("--golden", default=GOLDEN_DATA_PATH)
+    parser.add_argument("--output", default=None, help="Write the full metrics to this JSON file")
+    args = parser.parse_args()
+
+    import main
+    golden = load_golden_data(args.golden)
+    reports = {}
+    for model_name in args.models:
+        predictions = predict_golden_files(lambda texts: main.extract_entities_batch(model_name, texts), golden)
+        reports[model_name] = evaluate_predictions(predictions, golden)
+
+    print(format_report(reports))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=4, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main_cli()
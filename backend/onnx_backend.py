@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+ONNX Runtime backend for the LegalBERT token classifier
+
+Exports the fine-tuned Hugging Face model to ONNX with dynamic batch and sequence
+axes and serves it through ONNX Runtime's CPU execution provider. OnnxTokenClassifier
+is called like the PyTorch model, so the BERT windowing and decoding code in main.py
+runs unchanged on top of it.
+
+Usage:
+    python onnx_backend.py ./legalBert/legalbert-ner-model-100 ./legalBert/onnx/legalbert-ner-model-100.onnx
+"""
+
+import argparse
+import inspect
+import os
+from types import SimpleNamespace
+from typing import Optional
+
+import torch
+from transformers import AutoConfig, AutoModelForTokenClassification
+
+from atomic_file import atomic_path, is_newer_than_weights
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+
+def export_to_onnx(model_path: str, onnx_path: str, opset: int = 17) -> str:
+    """
+    Export a token-classification model to ONNX
+
+    Args:
+        model_path: Directory of the fine-tuned Hugging Face model
+        onnx_path: Where to write the .onnx file
+        opset: ONNX opset version
+
+    Returns:
+        onnx_path
+    """
+    model = AutoModelForTokenClassification.from_pretrained(model_path)
+    model.eval()
+    os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+
+    # Any shape works for tracing; both axes are exported as dynamic
+    dummy_ids = torch.ones((2, 16), dtype=torch.long)
+    dummy_mask = torch.ones((2, 16), dtype=torch.long)
+    # Newer torch releases default to the dynamo exporter; keep the TorchScript one they all share
+    extra_args = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.no_grad(), atomic_path(onnx_path) as tmp_path:
+        torch.onnx.export(
+            model,
+            (dummy_ids, dummy_mask),
+            tmp_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch", 1: "sequence"}
+            },
+            opset_version=opset,
+            **extra_args
+        )
+    print(f"Exported {model_path} to {onnx_path}")
+    return onnx_path
+
+
+class OnnxTokenClassifier:
+    """An ONNX Runtime session with the call signature of a Hugging Face token classifier"""
+
+    def __init__(self, onnx_path: str, config, intra_op_threads: Optional[int] = None):
+        """
+        Initialize the session
+
+        Args:
+            onnx_path: Exported model file
+            config: The Hugging Face config of the exported model (for id2label)
+            intra_op_threads: Threads per inference (None = ONNX Runtime's default)
+        """
+        if ort is None:
+            raise ImportError("onnxruntime is not installed; pip install onnxruntime to use the ONNX backend")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.onnx_path = onnx_path
+        self.config = config
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> SimpleNamespace:
+        """Run the session and return the logits as a torch tensor, like the PyTorch model's output"""
+        logits, = self.session.run(["logits"], {
+            "input_ids": input_ids.numpy(),
+            "attention_mask": attention_mask.numpy()
+        })
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+
+def load_onnx_classifier(model_path: str, onnx_path: str, intra_op_threads: Optional[int] = None) -> OnnxTokenClassifier:
+    """Load the ONNX model, exporting it from model_path first if it has not been exported since the weights last changed"""
+    if not is_newer_than_weights(model_path, onnx_path):
+        export_to_onnx(model_path, onnx_path)
+    return OnnxTokenClassifier(onnx_path, AutoConfig.from_pretrained(model_path), intra_op_threads)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the LegalBERT token classifier to ONNX")
+    parser.add_argument("model_path")
+    parser.add_argument("onnx_path")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+    export_to_onnx(args.model_path, args.onnx_path, args.opset)
@@ -0,0 +1,58 @@
+import re
+from typing import Dict, Iterable, List, Tuple
+
+# A paragraph is a line of the document text; leases are read from .docx files one paragraph per line
+PARAGRAPH_PATTERN = re.compile(r"[^\n]+")
+
+
+def split_paragraphs(text: str) -> List[Tuple[int, str]]:
+    """The non-blank paragraphs of a text, stripped, with their start offsets in the text"""
+    paragraphs = []
+    for match in PARAGRAPH_PATTERN.finditer(text):
+        line = match.group()
+        stripped = line.strip()
+        if stripped:
+            paragraphs.append((match.start() + len(line) - len(line.lstrip()), stripped))
+    return paragraphs
+
+
+def paragraph_hit_rate(documents: Iterable[str]) -> Dict[str, float]:
+    """
+    Share of paragraphs, and of their characters, that an earlier document of the
+    sequence already contained, i.e. how much a paragraph cache saves on the corpus
+    """
+    seen = set()
+    paragraphs = hits = chars = hit_chars = 0
+    for text in documents:
+        for _, paragraph in split_paragraphs(text):
+            paragraphs += 1
+            chars += len(paragraph)
+            if paragraph in seen:
+                hits += 1
+                hit_chars += len(paragraph)
+            seen.add(paragraph)
+    return {
+        "paragraphs": paragraphs,
+        "unique_paragraphs": len(seen),
+        "hit_rate": hits / paragraphs if paragraphs else 0.0,
+        "char_hit_rate": hit_chars / chars if chars else 0.0
+    }
+
+
+class ParagraphStats:
+    """Paragraphs seen in paragraph mode and how many of them had to go through a model"""
+
+    def __init__(self):
+        self.paragraphs = 0
+        self.computed = 0
+
+    def record(self, paragraphs: int, computed: int):
+        self.paragraphs += paragraphs
+        self.computed += computed
+
+    def get_stats(self) -> Dict[str, float]:
+        return {
+            "paragraphs": self.paragraphs,
+            "computed": self.computed,
+            "hit_rate": round(1 - self.computed / self.paragraphs, 4) if self.paragraphs else 0.0
+        }
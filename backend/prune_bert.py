@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Structured layer and attention-head pruning of the fine-tuned LegalBERT NER model
+
+Every pruning level drops the least important encoder layers and attention heads,
+scored by a first-order Taylor estimate on the tagged leases. It then briefly
+re-fine-tunes on the tagged leases and measures per-entity F1 and latency on the
+golden test leases. Pruning stops at the first level where an entity's F1 falls below
+the configured threshold. The last level that passed is saved as a regular Hugging
+Face checkpoint, so load_bert_model serves it: the pruned heads are recorded in its
+config and re-applied on load.
+
+Usage:
+    python prune_bert.py --layers-per-level 1 --head-fraction 0.1 --max-drop 0.05
+    python prune_bert.py --min-f1 0.8 --output ./legalBert/legalbert-ner-pruned
+"""
+
+import argparse
+import copy
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import torch
+import torch.nn.functional as F
+from transformers import AutoModelForTokenClassification, AutoTokenizer
+
+from distill_student import IGNORE_INDEX, build_chunks, load_labeled_documents, pad_batch
+
+TEACHER_PATH = "./legalBert/legalbert-ner-model-100"
+PRUNED_PATH = "./legalBert/legalbert-ner-pruned"
+
+
+def remaining_heads(model, layer_index: int) -> List[int]:
+    """Original indices of the heads a layer still has"""
+    pruned = set(model.config.pruned_heads.get(layer_index, []))
+    return [head for head in range(model.config.num_attention_heads) if head not in pruned]
+
+
+def score_heads(model, chunks: List[Dict], pad_token_id: int, batch_size: int = 8) -> Dict[Tuple[int, int], float]:
+    """
+    Importance of every remaining head: |sum(weight * grad)| over the head's slice of its
+    layer's attention output projection, accumulated over the tagged windows
+    """
+    model.eval()
+    model.zero_grad()
+    for batch_start in range(0, len(chunks), batch_size):
+        batch = pad_batch(chunks[batch_start:batch_start + batch_size], pad_token_id)
+        logits = model(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"]).logits
+        loss = F.cross_entropy(logits.reshape(-1, logits.size(-1)), batch["labels"].reshape(-1), ignore_index=IGNORE_INDEX)
+        loss.backward()
+
+    head_size = model.config.hidden_size // model.config.num_attention_heads
+    scores = {}
+    for layer_index, layer in enumerate(model.bert.encoder.layer):
+        dense = layer.attention.output.dense
+        contribution = (dense.weight * dense.weight.grad).sum(dim=0)
+        for position, head in enumerate(remaining_heads(model, layer_index)):
+            scores[(layer_index, head)] = contribution[position * head_size:(position + 1) * head_size].sum().abs().item()
+    model.zero_grad()
+    return scores
+
+
+def drop_layers(model, layer_indices: List[int]):
+    """Remove encoder layers, keeping the pruned-head bookkeeping in step with the new layer indices"""
+    keep = [index for index in range(len(model.bert.encoder.layer)) if index not in set(layer_indices)]
+    model.bert.encoder.layer = torch.nn.ModuleList([model.bert.encoder.layer[index] for index in keep])
+    model.config.num_hidden_layers = len(keep)
+    model.config.pruned_heads = {
+        new_index: sorted(model.config.pruned_heads[old_index])
+        for new_index, old_index in enumerate(keep) if old_index in model.config.pruned_heads
+    }
+
+
+def prune_level(model, scores: Dict[Tuple[int, int], float], num_layers: int, num_heads: int):
+    """Drop the num_layers least important layers, then the num_heads least important remaining heads"""
+    if num_layers:
+        layer_scores = {}
+        for (layer_index, _), score in scores.items():
+            layer_scores[layer_index] = layer_scores.get(layer_index, 0.0) + score
+        # Always keep one layer
+        dropped = sorted(layer_scores, key=layer_scores.get)[:min(num_layers, len(layer_scores) - 1)]
+        kept = [index for index in sorted(layer_scores) if index not in dropped]
+        scores = {(kept.index(layer_index), head): score for (layer_index, head), score in scores.items()
+                  if layer_index in kept}
+        drop_layers(model, dropped)
+
+    if num_heads:
+        heads_left = {index: len(remaining_heads(model, index)) for index in range(model.config.num_hidden_layers)}
+        to_prune: Dict[int, List[int]] = {}
+        for (layer_index, head), _ in sorted(scores.items(), key=lambda item: item[1]):
+            if num_heads == 0:
+                break
+            # Every layer keeps at least one head
+            if heads_left[layer_index] <= 1:
+                continue
+            to_prune.setdefault(layer_index, []).append(head)
+            heads_left[layer_index] -= 1
+            num_heads -= 1
+        model.prune_heads(to_prune)
+
+
+def fine_tune(model, chunks: List[Dict], pad_token_id: int, epochs: int = 1, batch_size: int = 8,
+              learning_rate: float = 2e-5):
+    """Briefly re-fine-tune the pruned model on the tagged leases"""
+    optimizer = torch.optim.AdamW(model.parameters(), lr=learning_rate, weight_decay=0.01)
+    model.train()
+    for _ in range(epochs):
+        for batch_start in range(0, len(chunks), batch_size):
+            batch = pad_batch(chunks[batch_start:batch_start + batch_size], pad_token_id)
+            logits = model(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"]).logits
+            loss = F.cross_entropy(logits.reshape(-1, logits.size(-1)), batch["labels"].reshape(-1), ignore_index=IGNORE_INDEX)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+    model.eval()
+
+
+def evaluate_level(model, tokenizer, texts: List[str], paths: List[str], golden, metric: str = "partial"):
+    """Per-entity F1 on the golden test leases and mean latency per lease in milliseconds"""
+    import main
+    from ner_evaluation import entity_values, evaluate_predictions
+
+    model_dict = {"tokenizer": tokenizer, "model": model, "sliding_window": True,
+                  "window_size": main.MODEL_CONFIGS["bert"]["window_size"], "stride": main.MODEL_CONFIGS["bert"]["stride"]}
+    start = time.perf_counter()
+    results = [main.extract_entities_bert(text, model_dict) for text in texts]
+    latency_ms = (time.perf_counter() - start) * 1000 / max(len(texts), 1)
+    predictions = {path: entity_values(entities) for path, entities in zip(paths, results)}
+    report = evaluate_predictions(predictions, golden)[metric]
+    return {entity: metrics["f1_score"] for entity, metrics in report.items()}, latency_ms
+
+
+def passes_guard(f1: Dict[str, float], baseline: Dict[str, float], min_f1: Optional[float], max_drop: Optional[float]) -> bool:
+    """Whether every entity's F1 stays above the absolute threshold and within max_drop of the unpruned model"""
+    for entity, score in f1.items():
+        if min_f1 is not None and score < min_f1:
+            return False
+        if max_drop is not None and score < baseline[entity] - max_drop:
+            return False
+    return True
+
+
+def format_level(level: int, model, f1: Dict[str, float], latency_ms: float, passed: bool) -> str:
+    """One row of the latency/accuracy table"""
+    heads = sum(len(remaining_heads(model, index)) for index in range(model.config.num_hidden_layers))
+    parameters = sum(p.numel() for p in model.parameters()) / 1e6
+    scores = " ".join(f"{score:5.3f}" for score in f1.values())
+    return (f"{level:5d} | {model.config.num_hidden_layers:6d} | {heads:5d} | {parameters:7.1f}M | "
+            f"{latency_ms:9.1f} | {scores} | {'ok' if passed else 'stop'}")
+
+
+def main_cli():
+    """Prune level by level until the accuracy guard trips, and save the last passing model"""
+    parser = argparse.ArgumentParser(description="Prune LegalBERT layers and heads under an accuracy guard")
+    parser.add_argument("--model", default=TEACHER_PATH)
+    parser.add_argument("--output", default=PRUNED_PATH)
+    parser.add_argument("--layers-per-level", type=int, default=1, help="Encoder layers dropped per level")
+    parser.add_argument("--head-fraction", type=float, default=0.1, help="Share of the original heads pruned per level")
+    parser.add_argument("--max-levels", type=int, default=10)
+    parser.add_argument("--metric", choices=["exact", "partial"], default="partial")
+    parser.add_argument("--min-f1", type=float, default=None, help="Lowest per-entity F1 a level may reach")
+    parser.add_argument("--max-drop", type=float, default=0.05, help="Largest per-entity F1 drop from the unpruned model")
+    parser.add_argument("--fine-tune-epochs", type=int, default=1)
+    parser.add_argument("--max-length", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    from ner_evaluation import load_golden_data, read_lease_text
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForTokenClassification.from_pretrained(args.model)
+    model.eval()
+
+    labeled = load_labeled_documents()
+    chunks = build_chunks(tokenizer, [text for text, _ in labeled], [spans for _, spans in labeled], args.max_length)
+    golden = load_golden_data()
+    paths = [path for path in golden if os.path.exists(path)]
+    texts = [read_lease_text(path) for path in paths]
+    heads_per_level = round(args.head_fraction * model.config.num_hidden_layers * model.config.num_attention_heads)
+
+    baseline, latency_ms = evaluate_level(model, tokenizer, texts, paths, golden, args.metric)
+    print(f"{'level':>5s} | {'layers':>6s} | {'heads':>5s} | {'params':>8s} | {'ms/lease':>9s} | {args.metric} F1 per entity")
+    print(format_level(0, model, baseline, latency_ms, True))
+
+    accepted = copy.deepcopy(model)
+    for level in range(1, args.max_levels + 1):
+        if model.config.num_hidden_layers <= 1 and heads_per_level == 0:
+            break
+        scores = score_heads(model, chunks, tokenizer.pad_token_id, args.batch_size)
+        prune_level(model, scores, args.layers_per_level, heads_per_level)
+        fine_tune(model, chunks, tokenizer.pad_token_id, args.fine_tune_epochs, args.batch_size)
+        f1, latency_ms = evaluate_level(model, tokenizer, texts, paths, golden, args.metric)
+        passed = passes_guard(f1, baseline, args.min_f1, args.max_drop)
+        print(format_level(level, model, f1, latency_ms, passed))
+        if not passed:
+            break
+        accepted = copy.deepcopy(model)
+
+    accepted.save_pretrained(args.output)
+    tokenizer.save_pretrained(args.output)
+    print(f"Saved the pruned model ({accepted.config.num_hidden_layers} layers) to {args.output}")
+
+
+if __name__ == "__main__":
+    main_cli()
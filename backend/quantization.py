@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Int8 dynamic quantization of the LegalBERT token classifier
+
+The nn.Linear layers (attention projections, feed-forward layers and the classifier
+head) get int8 weights; activations are quantized on the fly per batch. The quantized
+weights are cached on disk so only the first start pays for quantization.
+
+Usage:
+    python quantization.py ./legalBert/legalbert-ner-model-100 ./legalBert/quantized/legalbert-ner-model-100-int8.pt
+"""
+
+import argparse
+import os
+
+import torch
+from transformers import AutoConfig, AutoModelForTokenClassification
+
+from atomic_file import atomic_path, is_newer_than_weights
+
+
+def quantize_dynamic(model: torch.nn.Module) -> torch.nn.Module:
+    """Quantize a model's linear layers to int8"""
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def build_quantized_cache(model_path: str, cache_path: str) -> torch.nn.Module:
+    """Quantize the model at model_path and save its quantized weights to cache_path"""
+    model = AutoModelForTokenClassification.from_pretrained(model_path)
+    model.eval()
+    quantized = quantize_dynamic(model)
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    with atomic_path(cache_path) as tmp_path:
+        torch.save(quantized.state_dict(), tmp_path)
+    print(f"Quantized {model_path} to {cache_path}")
+    return quantized
+
+
+def load_quantized_model(model_path: str, cache_path: str) -> torch.nn.Module:
+    """
+    Load the int8 model, quantizing and caching it first if the cache is missing or stale
+
+    Args:
+        model_path: Directory of the fine-tuned Hugging Face model
+        cache_path: File holding the quantized state dict
+
+    Returns:
+        The quantized model in eval mode
+    """
+    if not is_newer_than_weights(model_path, cache_path):
+        return build_quantized_cache(model_path, cache_path)
+    # Rebuild the quantized module structure without reading the fp32 weights, then fill it in
+    model = AutoModelForTokenClassification.from_config(AutoConfig.from_pretrained(model_path))
+    model.eval()
+    model = quantize_dynamic(model)
+    model.load_state_dict(torch.load(cache_path))
+    return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantize the LegalBERT token classifier to int8")
+    parser.add_argument("model_path")
+    parser.add_argument("cache_path")
+    args = parser.parse_args()
+    build_quantized_cache(args.model_path, args.cache_path)
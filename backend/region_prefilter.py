@@ -0,0 +1,71 @@
+import re
+import threading
+from typing import Dict, List, Tuple
+
+# Phrases the lease labels nearly always appear next to, and the shapes of the values themselves.
+# Words like "tenant" alone occur in almost every clause, so only the role headings count as cues.
+CUE_PATTERNS = [
+    r"\bbetween\b[^\n]{1,200}?\band\b",
+    r"\b(?:lessor|lessee|landlord|tenant|property|premises)\s*:",
+    r"\b(?:located at|premises at|address)\b",
+    r"\bcommenc\w*",
+    r"\bterminat\w*|\bexpir\w*",
+    r"\bper month\b|\bmonthly\b",
+    r"\bdeposit\b",
+    r"\$\s?\d",
+    r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?\s+\d{1,2},?\s+\d{4}\b",
+    r"\b\d{1,2}[/.-]\d{1,2}[/.-]\d{2,4}\b"
+]
+
+# One compiled alternation, so a document is scanned once for every cue
+CUE_PATTERN = re.compile("|".join(f"(?:{pattern})" for pattern in CUE_PATTERNS), re.IGNORECASE)
+
+
+def candidate_windows(text: str, radius: int = 80) -> List[Tuple[int, int]]:
+    """
+    Character ranges within radius of a cue match, widened to whitespace so no word is
+    cut and merged where they overlap
+    """
+    windows: List[Tuple[int, int]] = []
+    for match in CUE_PATTERN.finditer(text):
+        start = max(match.start() - radius, 0)
+        end = min(match.end() + radius, len(text))
+        while start > 0 and not text[start - 1].isspace():
+            start -= 1
+        while end < len(text) and not text[end].isspace():
+            end += 1
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def is_covered(windows: List[Tuple[int, int]], start: int, end: int) -> bool:
+    """Whether the span lies inside one window"""
+    return any(window_start <= start and end <= window_end for window_start, window_end in windows)
+
+
+class PrefilterStats:
+    """Characters of the prefiltered documents and how many of them went to the model"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents = 0
+        self.characters = 0
+        self.window_characters = 0
+
+    def record(self, text: str, windows: List[Tuple[int, int]]):
+        with self._lock:
+            self.documents += 1
+            self.characters += len(text)
+            self.window_characters += sum(end - start for start, end in windows)
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "documents": self.documents,
+                "characters": self.characters,
+                "window_characters": self.window_characters,
+                "kept_share": round(self.window_characters / self.characters, 4) if self.characters else 0.0
+            }
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ner_cache import text_digest
+
+
+def vocab_fingerprint(tokenizer) -> str:
+    """Digest of a tokenizer's vocabulary and normalization; equal fingerprints tokenize every text the same way"""
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        state = backend.to_str()
+    else:
+        state = json.dumps([type(tokenizer).__name__, sorted(tokenizer.get_vocab().items())])
+    return hashlib.sha256(state.encode("utf-8")).hexdigest()[:16]
+
+
+class EncodingCache:
+    """
+    Token ids, offsets and word ids of recently tokenized documents per (vocabulary
+    fingerprint, text hash), so backends on the same base vocabulary tokenize a document
+    once. Also accumulates tokenizer and encoder time separately.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Documents kept; the least recently used are dropped first (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.tokenize_seconds = 0.0
+        self.encoder_seconds = 0.0
+
+    def encode(self, tokenizer, texts: List[str], vocab_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        input_ids, offsets and word_ids (None for tokenizers without them) of every text, without special tokens.
+        Only texts not cached under vocab_key are tokenized, in one call; without a vocab_key nothing is shared.
+        """
+        keys = [(vocab_key, text_digest(text)) for text in texts] if vocab_key and self.max_entries else [None] * len(texts)
+        results: List[Optional[Dict[str, Any]]] = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key) if key is not None else None
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                results.append(entry)
+        misses = [index for index, entry in enumerate(results) if entry is None]
+        if not misses:
+            return results
+
+        start = time.perf_counter()
+        encodings = tokenizer([texts[index] for index in misses], add_special_tokens=False,
+                              return_offsets_mapping=True, verbose=False)
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.misses += len(misses)
+            self.tokenize_seconds += elapsed
+            for row, index in enumerate(misses):
+                results[index] = {
+                    "input_ids": encodings["input_ids"][row],
+                    "offsets": encodings["offset_mapping"][row],
+                    "word_ids": encodings.word_ids(row) if hasattr(encodings, "word_ids") else None
+                }
+                if keys[index] is not None:
+                    self._entries[keys[index]] = results[index]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return results
+
+    def record_encoder(self, seconds: float):
+        """Add the time of an encoder forward pass"""
+        with self._lock:
+            self.encoder_seconds += seconds
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "tokenize_ms": round(self.tokenize_seconds * 1000, 1),
+                "encoder_ms": round(self.encoder_seconds * 1000, 1)
+            }
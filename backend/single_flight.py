@@ -0,0 +1,106 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+from admission import DeadlineExceededError
+
+
+class _Abandoned(Exception):
+    """The caller computing a key gave up on it (its deadline passed or it was cancelled)"""
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight work: the first caller for a key computes it and
+    concurrent callers for the same key await the same future instead of computing it again.
+
+    A computation's own deadline or cancellation is not shared: callers waiting on a
+    computation whose caller gave up compute the key themselves.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.retried = 0
+
+    async def run_many(self, keys: List[Hashable], compute: Callable[[List[int]], Awaitable[List[Any]]],
+                       deadline: Optional[float] = None) -> List[Any]:
+        """
+        Results for every key, computing only the keys nobody else is computing
+
+        Args:
+            keys: One key per item
+            compute: Coroutine function returning the results of the items at the indices it
+                is given, in that order; called with the indices this call leads
+            deadline: time.monotonic() after which this caller stops waiting for keys other
+                callers compute and raises DeadlineExceededError; it does not affect them
+        """
+        loop = asyncio.get_running_loop()
+        results: List[Any] = [None] * len(keys)
+        pending = list(range(len(keys)))
+        while pending:
+            leading: List[int] = []
+            futures: Dict[int, asyncio.Future] = {}
+            for index in pending:
+                future = self._in_flight.get(keys[index])
+                if future is None:
+                    future = self._in_flight[keys[index]] = loop.create_future()
+                    leading.append(index)
+                    self.leaders += 1
+                else:
+                    self.coalesced += 1
+                futures[index] = future
+
+            if leading:
+                try:
+                    computed = await compute(leading)
+                except DeadlineExceededError:
+                    self._settle_all(keys, leading, exception=_Abandoned())
+                    raise
+                except Exception as e:
+                    self._settle_all(keys, leading, exception=e)
+                    raise
+                except BaseException:
+                    self._settle_all(keys, leading, exception=_Abandoned())
+                    raise
+                for index, result in zip(leading, computed):
+                    self._settle(keys[index], result=result)
+
+            retry = []
+            for index in pending:
+                try:
+                    results[index] = await self._wait(futures[index], deadline)
+                except _Abandoned:
+                    self.retried += 1
+                    retry.append(index)
+            pending = retry
+        return results
+
+    async def _wait(self, future: asyncio.Future, deadline: Optional[float]) -> Any:
+        # shield: a waiter that gives up must not cancel the result other callers share
+        if deadline is None:
+            return await asyncio.shield(future)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), deadline - time.monotonic())
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError("Deadline passed while waiting for an identical extraction") from None
+
+    def _settle_all(self, keys: List[Hashable], indices: List[int], exception: BaseException):
+        for index in indices:
+            self._settle(keys[index], exception=exception)
+
+    def _settle(self, key: Hashable, result: Any = None, exception: BaseException = None):
+        future = self._in_flight.pop(key)
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+            # Retrieved by the waiters, if any; don't warn about it otherwise
+            future.exception()
+        else:
+            future.set_result(result)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"leaders": self.leaders, "coalesced": self.coalesced, "retried": self.retried,
+                "in_flight": len(self._in_flight)}
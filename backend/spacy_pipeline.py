@@ -0,0 +1,97 @@
+import os
+from typing import Any, Dict, List, Set
+
+import spacy
+from spacy.language import Language
+
+
+# Model architectures that read another component's output instead of embedding tokens themselves
+LISTENER_ARCHITECTURES = ("spacy.Tok2VecListener", "spacy-transformers.TransformerListener")
+# Factories a listener with upstream = "*" can attach to
+EMBEDDING_FACTORIES = ("tok2vec", "transformer")
+
+
+def _listener_upstreams(node: Any) -> Set[str]:
+    """Upstream component names referenced by the listener layers in a component's config"""
+    upstreams = set()
+    if isinstance(node, dict):
+        architecture = node.get("@architectures", "")
+        if architecture.startswith(LISTENER_ARCHITECTURES):
+            upstreams.add(node.get("upstream", "*"))
+        for value in node.values():
+            upstreams |= _listener_upstreams(value)
+    return upstreams
+
+
+def _factory_meta(component_config: Dict[str, Any]):
+    """The registered factory metadata of a component, or None for an unknown factory"""
+    factory = component_config.get("factory")
+    if factory and Language.has_factory(factory):
+        return Language.get_factory_meta(factory)
+    return None
+
+
+def required_components(config: Dict[str, Any], target: str = "ner") -> List[str]:
+    """
+    Work out which pipeline components target needs to produce its annotations
+
+    A component is needed when target (or a component it needs) listens to it, or when it
+    assigns an attribute that target's factory declares in its requires.
+
+    Args:
+        config: A pipeline config, e.g. spacy.util.load_config(path / "config.cfg")
+        target: The component whose output is read
+
+    Returns:
+        The needed component names in pipeline order, target included
+    """
+    pipeline = list(config["nlp"]["pipeline"])
+    components = config["components"]
+    if target not in pipeline:
+        raise ValueError(f"Component '{target}' is not in the pipeline {pipeline}")
+
+    needed = {target}
+    pending = [target]
+    while pending:
+        name = pending.pop()
+        upstream_candidates = pipeline[:pipeline.index(name)]
+        dependencies = set()
+
+        for upstream in _listener_upstreams(components[name]):
+            if upstream == "*":
+                dependencies |= {other for other in upstream_candidates
+                                 if components[other].get("factory") in EMBEDDING_FACTORIES}
+            else:
+                dependencies.add(upstream)
+
+        meta = _factory_meta(components[name])
+        requires = set(meta.requires) if meta is not None else set()
+        if requires:
+            for other in upstream_candidates:
+                other_meta = _factory_meta(components[other])
+                if other_meta is not None and requires & set(other_meta.assigns):
+                    dependencies.add(other)
+
+        for dependency in dependencies - needed:
+            needed.add(dependency)
+            pending.append(dependency)
+
+    return [name for name in pipeline if name in needed]
+
+
+def excluded_components(config: Dict[str, Any], target: str = "ner") -> List[str]:
+    """Pipeline components target does not need"""
+    needed = set(required_components(config, target))
+    return [name for name in config["nlp"]["pipeline"] if name not in needed]
+
+
+def load_pipeline_for(model_path: str, target: str = "ner") -> Language:
+    """Load a spaCy pipeline with only the components target depends on
+
+    The other components are excluded, so their weights are never read from disk
+    and they don't run on nlp() or nlp.pipe().
+    """
+    config = spacy.util.load_config(os.path.join(model_path, "config.cfg"))
+    exclude = excluded_components(config, target)
+    print(f"Excluding spaCy components not needed by {target}: {exclude}")
+    return spacy.load(model_path, exclude=exclude)
@@ -0,0 +1,50 @@
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from atomic_file import atomic_path
+
+
+class TestAtomicPath(unittest.TestCase):
+    """Test cases for replacing files only once they are fully written"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "model.bin")
+        with open(self.path, "wb") as f:
+            f.write(b"old")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replaces_the_file_when_the_write_completes(self):
+        """Test that the new content appears only after the block and no temporary file is left"""
+        with atomic_path(self.path) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                f.write(b"new")
+            with open(self.path, "rb") as f:
+                self.assertEqual(f.read(), b"old")
+
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"new")
+        self.assertEqual(os.listdir(self.directory.name), ["model.bin"])
+
+    def test_failed_write_keeps_the_old_file(self):
+        """Test that an exception while writing leaves the old content and removes the partial file"""
+        with self.assertRaises(RuntimeError):
+            with atomic_path(self.path) as tmp_path:
+                with open(tmp_path, "wb") as f:
+                    f.write(b"ha")
+                raise RuntimeError("crashed mid-write")
+
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"old")
+        self.assertEqual(os.listdir(self.directory.name), ["model.bin"])
+
+
+if __name__ == '__main__':
+    unittest.main()
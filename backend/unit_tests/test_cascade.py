@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cascade import uncertain_labels, escalation_regions, merge_cascade, run_cascade, CascadeStats
+from ner_evaluation import ENTITY_COLUMNS
+from main import Entity
+
+LEASE = (
+    "LEASE AGREEMENT\n"
+    "This lease is made between ACME Properties (Landlord) and John Doe (Tenant).\n"
+    "The premises are located at 12 Oak Road.\n"
+    "Pets are not allowed.\n"
+    "Smoking is not allowed.\n"
+    "Quiet hours start at 10 pm.\n"
+    "The term commences on January 1, 2024 and expires on December 31, 2024.\n"
+    "Guests may stay for two weeks.\n"
+    "Monthly rent is $1,500.\n"
+    "Signed by both parties."
+)
+
+
+def entity(text, label, source=LEASE):
+    start = source.index(text)
+    return Entity(text=text, label=label, start=start, end=start + len(text))
+
+
+def all_labels():
+    return [
+        entity("ACME Properties", "LESSOR_NAME"), entity("John Doe", "LESSEE_NAME"),
+        entity("12 Oak Road", "PROPERTY_ADDRESS"), entity("January 1, 2024", "LEASE_START_DATE"),
+        entity("December 31, 2024", "LEASE_END_DATE"), entity("$1,500", "RENT_AMOUNT"),
+        Entity(text="$1,500", label="SECURITY_DEPOSIT_AMOUNT", start=LEASE.index("$1,500"), end=LEASE.index("$1,500") + 6)
+    ]
+
+
+class TestCascade(unittest.TestCase):
+    """Test cases for the spaCy-first, transformer-second extraction cascade"""
+
+    def test_uncertain_labels(self):
+        """Test that missing labels and implausible values are escalated"""
+        self.assertEqual(uncertain_labels(all_labels()), set())
+
+        entities = [e for e in all_labels() if e.label != "SECURITY_DEPOSIT_AMOUNT"]
+        entities[5] = Entity(text="monthly", label="RENT_AMOUNT", start=0, end=7)
+        self.assertEqual(uncertain_labels(entities), {"RENT_AMOUNT", "SECURITY_DEPOSIT_AMOUNT"})
+
+    def test_escalation_regions_around_cues(self):
+        """Test that only the paragraphs around the label's cue words are selected, joined when adjacent"""
+        regions = escalation_regions(LEASE, [], {"LEASE_START_DATE"}, context=0)
+
+        self.assertEqual([LEASE[start:end] for start, end in regions], [
+            "Quiet hours start at 10 pm.\nThe term commences on January 1, 2024 and expires on December 31, 2024."
+        ])
+
+    def test_escalation_regions_fall_back_to_whole_text(self):
+        """Test that a label without cues, or too many selected paragraphs, sends the whole text"""
+        whole = [(0, len(LEASE))]
+        self.assertEqual(escalation_regions("Nothing here.\nAt all.", [], {"RENT_AMOUNT"}), [(0, len("Nothing here.\nAt all."))])
+        self.assertEqual(escalation_regions(LEASE, [], set(ENTITY_COLUMNS)), whole)
+
+    def test_merge_keeps_first_model_where_second_finds_nothing(self):
+        """Test that escalated labels come from the second model only when it found them"""
+        first = [entity("John Doe", "LESSEE_NAME"), Entity(text="monthly", label="RENT_AMOUNT", start=0, end=7)]
+        second = [entity("$1,500", "RENT_AMOUNT"), entity("ACME Properties", "LESSOR_NAME")]
+
+        merged = merge_cascade(first, second, {"RENT_AMOUNT", "SECURITY_DEPOSIT_AMOUNT"})
+
+        self.assertEqual([(e.text, e.label) for e in merged], [("John Doe", "LESSEE_NAME"), ("$1,500", "RENT_AMOUNT")])
+
+    def test_run_cascade(self):
+        """Test that the second model only sees the regions of escalated documents, with offsets mapped back"""
+        second_calls = []
+
+        async def first(texts):
+            return [all_labels() if text == LEASE else [entity("John Doe", "LESSEE_NAME", text)] for text in texts]
+
+        async def second(texts):
+            second_calls.extend(texts)
+            return [[entity("$1,500", "RENT_AMOUNT", text)] if "$1,500" in text else [] for text in texts]
+
+        other = "Tenant John Doe.\nA nice garden.\nA quiet street.\nNo pets.\nMonthly rent is $1,500.\nSigned."
+        stats = CascadeStats()
+        results = asyncio.run(run_cascade([LEASE, other], first, second, stats))
+
+        self.assertEqual(results[0], all_labels())
+        self.assertEqual([(e.text, other[e.start:e.end]) for e in results[1]],
+                         [("John Doe", "John Doe"), ("$1,500", "$1,500")])
+        self.assertNotIn(LEASE, second_calls)
+        self.assertEqual(stats.get_stats()["decided_by_first_model"], 1)
+        self.assertEqual(stats.get_stats()["escalated"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
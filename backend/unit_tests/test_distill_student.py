@@ -0,0 +1,128 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from transformers import AutoTokenizer, BertConfig, BertForTokenClassification
+
+from distill_student import (IGNORE_INDEX, token_labels, build_chunks, make_student, distillation_loss,
+                             add_teacher_logits, train_student, read_html_text)
+from main import load_bert_model, extract_entities_bert
+
+BERT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "legalBert/legalbert-ner-model-100")
+
+
+class TestDistillStudent(unittest.TestCase):
+    """Test cases for distilling the LegalBERT teacher into a smaller student"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tokenizer = AutoTokenizer.from_pretrained(BERT_DIR)
+
+    def setUp(self):
+        """A small randomly initialised teacher with the lease labels"""
+        torch.manual_seed(0)
+        self.teacher = BertForTokenClassification(BertConfig(
+            hidden_size=32, num_hidden_layers=6, num_attention_heads=2, intermediate_size=64, num_labels=8
+        ))
+        self.teacher.eval()
+        self.text = "This lease is between John Smith and Jane Doe. Rent is $1,500."
+        start = self.text.index("John Smith")
+        self.spans = [(start, start + len("John Smith"), 1)]
+
+    def test_token_labels_follow_the_words(self):
+        """Test that tokens of a word inside an entity span take its label"""
+        chunk, = build_chunks(self.tokenizer, [self.text], [self.spans], max_length=64)
+        tokens = self.tokenizer.convert_ids_to_tokens(chunk["input_ids"])
+        labelled = [token for token, label in zip(tokens, chunk["labels"]) if label == 1]
+
+        self.assertEqual("".join(labelled).replace("##", ""), "johnsmith")
+        self.assertEqual(chunk["labels"][0], IGNORE_INDEX)
+        self.assertEqual(chunk["labels"][-1], IGNORE_INDEX)
+
+    def test_sub_words_outside_entities_are_ignored(self):
+        """Test the notebook's alignment: only a word's first token carries an O label"""
+        # "Smith," is one word: "smith" starts it and "," continues it
+        offsets = [(0, 6), (5, 6)]
+        self.assertEqual(token_labels(offsets, []), [0, IGNORE_INDEX])
+        self.assertEqual(token_labels(offsets, [(0, 6, 2)]), [2, 2])
+
+    def test_long_documents_are_cut_into_windows(self):
+        """Test that every token ends up in exactly one window"""
+        text = " ".join(["lease"] * 300)
+        chunks = build_chunks(self.tokenizer, [text], max_length=64)
+
+        self.assertEqual(sum(len(chunk["input_ids"]) - 2 for chunk in chunks), 300)
+        self.assertTrue(all(len(chunk["input_ids"]) <= 64 for chunk in chunks))
+        self.assertNotIn("labels", chunks[0])
+
+    def test_student_starts_from_teacher_layers(self):
+        """Test that a same-width student copies evenly spaced teacher layers"""
+        student = make_student(self.teacher, num_layers=3)
+
+        self.assertEqual(student.config.num_hidden_layers, 3)
+        for student_layer, teacher_index in zip(student.bert.encoder.layer, [0, 2, 5]):
+            teacher_weight = self.teacher.bert.encoder.layer[teacher_index].output.dense.weight
+            self.assertTrue(torch.equal(student_layer.output.dense.weight, teacher_weight))
+        self.assertTrue(torch.equal(student.classifier.weight, self.teacher.classifier.weight))
+
+    def test_narrower_student(self):
+        """Test that a narrower student gets a consistent config"""
+        student = make_student(self.teacher, num_layers=2, hidden_size=16)
+        self.assertEqual(student.config.hidden_size, 16)
+        self.assertEqual(student.config.num_labels, 8)
+
+    def test_distillation_loss_is_zero_for_identical_logits(self):
+        """Test that matching the teacher exactly costs nothing without gold labels"""
+        logits = torch.randn(2, 5, 8)
+        labels = torch.full((2, 5), IGNORE_INDEX)
+        loss = distillation_loss(logits, logits.clone(), labels, torch.ones(2, 5, dtype=torch.long))
+        self.assertAlmostEqual(loss.item(), 0.0, places=5)
+
+    def test_training_brings_student_closer_to_teacher(self):
+        """Test that training lowers the loss and the saved student is served by load_bert_model"""
+        texts = [self.text, "The tenant Jane Doe pays rent of $900 each month to the landlord."] * 4
+        chunks = build_chunks(self.tokenizer, texts, max_length=32)
+        add_teacher_logits(self.teacher, chunks, self.tokenizer.pad_token_id)
+        student = make_student(self.teacher, num_layers=1)
+
+        def loss():
+            with torch.no_grad():
+                return sum(
+                    distillation_loss(student(input_ids=torch.tensor([chunk["input_ids"]])).logits,
+                                      chunk["teacher_logits"].unsqueeze(0),
+                                      torch.full((1, len(chunk["input_ids"])), IGNORE_INDEX),
+                                      torch.ones(1, len(chunk["input_ids"]), dtype=torch.long)).item()
+                    for chunk in chunks
+                )
+
+        before = loss()
+        train_student(student, chunks, self.tokenizer.pad_token_id, epochs=5, batch_size=4, learning_rate=1e-3)
+        self.assertLess(loss(), before)
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            student.save_pretrained(tmp_dir)
+            self.tokenizer.save_pretrained(tmp_dir)
+            model_dict = load_bert_model(tmp_dir)
+            self.assertIsInstance(extract_entities_bert(self.text, model_dict), list)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_read_html_text(self):
+        """Test that HTML leases are read one paragraph per line"""
+        with tempfile.NamedTemporaryFile("w", suffix=".html", delete=False) as f:
+            f.write("<html><body><p>LEASE  AGREEMENT</p><p>Tenant: <b>Jane</b> Doe</p></body></html>")
+        try:
+            self.assertEqual(read_html_text(f.name), "LEASE AGREEMENT\nTenant: Jane Doe")
+        finally:
+            os.remove(f.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_store import DocumentStore, match_paragraphs
+
+
+def make_version(paragraphs):
+    return {"model_name": "bert", "digest": "v1", "paragraphs": paragraphs, "entities": [[] for _ in paragraphs]}
+
+
+class TestDocumentStore(unittest.TestCase):
+    """Test cases for stored document versions and the paragraph diff"""
+
+    def test_match_paragraphs_after_edit(self):
+        """Test that unchanged paragraphs are matched across inserted, deleted and replaced ones"""
+        old = ["Title", "Parties: John", "Rent clause", "Maintenance clause", "Signatures"]
+        new = ["Title", "Parties: Jane", "Rent clause", "New pet clause", "Maintenance clause"]
+
+        self.assertEqual(match_paragraphs(old, new), {0: 0, 2: 2, 4: 3})
+
+    def test_match_paragraphs_with_repeated_paragraphs(self):
+        """Test that each old paragraph is matched at most once"""
+        matches = match_paragraphs(["Clause", "Clause"], ["Clause", "Clause", "Clause"])
+
+        self.assertEqual(len(matches), 2)
+        self.assertEqual(len(set(matches.values())), 2)
+
+    def test_put_and_get(self):
+        """Test that every stored version gets its own ID"""
+        store = DocumentStore()
+        first = store.put(make_version(["a"]))
+        second = store.put(make_version(["b"]))
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(store.get(first)["paragraphs"], ["a"])
+        self.assertIsNone(store.get("unknown"))
+
+    def test_least_recently_used_versions_are_dropped(self):
+        """Test that the store keeps at most max_versions versions"""
+        store = DocumentStore(max_versions=2)
+        first = store.put(make_version(["a"]))
+        second = store.put(make_version(["b"]))
+        store.get(first)
+        third = store.put(make_version(["c"]))
+
+        self.assertIsNotNone(store.get(first))
+        self.assertIsNone(store.get(second))
+        self.assertIsNotNone(store.get(third))
+        self.assertEqual(store.get_stats(), {"versions": 2, "max_versions": 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
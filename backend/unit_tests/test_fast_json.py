@@ -0,0 +1,53 @@
+import unittest
+import sys
+import os
+import json
+from unittest.mock import patch
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fast_json import FastJSONResponse, dumps
+from main import Entity
+
+CONTENT = {
+    "entities": [Entity(text="Jöhn Doe", label="LESSEE_NAME", start=3, end=11)],
+    "text": "By Jöhn Doe",
+    "model": None
+}
+EXPECTED = {
+    "entities": [{"text": "Jöhn Doe", "label": "LESSEE_NAME", "start": 3, "end": 11}],
+    "text": "By Jöhn Doe",
+    "model": None
+}
+
+
+class TestFastJSON(unittest.TestCase):
+    """Test cases for the fast JSON response encoder"""
+
+    def test_dumps_serializes_pydantic_models(self):
+        """Test that models nested in the content are serialized as their fields"""
+        self.assertEqual(json.loads(dumps(CONTENT)), EXPECTED)
+
+    def test_fallback_without_orjson(self):
+        """Test that the json module produces the same compact UTF-8 output"""
+        with patch('fast_json.orjson', None):
+            fallback = dumps(CONTENT)
+        self.assertEqual(json.loads(fallback), EXPECTED)
+        self.assertIn("Jöhn".encode("utf-8"), fallback)
+        self.assertNotIn(b": ", fallback)
+
+    def test_unserializable_objects_are_rejected(self):
+        """Test that unknown types raise instead of being silently converted"""
+        with patch('fast_json.orjson', None), self.assertRaises(TypeError):
+            dumps({"value": object()})
+
+    def test_response(self):
+        """Test the response body and media type"""
+        response = FastJSONResponse(CONTENT)
+        self.assertEqual(response.media_type, "application/json")
+        self.assertEqual(json.loads(response.body), EXPECTED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import DeadlineExceededError, QueueFullError, deadline_after
+from inference_pool import InferencePools
+
+class TestInferencePools(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the bounded inference pools"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.pools = InferencePools({"bert": 2, "chat": 1})
+    
+    def tearDown(self):
+        """Shut the pools down"""
+        self.pools.shutdown()
+    
+    async def test_run_uses_a_worker_thread(self):
+        """Test that blocking work runs outside the event loop thread"""
+        thread_name = await self.pools.run("bert", lambda: threading.current_thread().name)
+        self.assertTrue(thread_name.startswith("bert-inference"))
+        self.assertEqual(await self.pools.run("chat", lambda a, b=0: a + b, 1, b=2), 3)
+    
+    async def test_pool_size_caps_concurrency(self):
+        """Test that no more calls run at once than the pool has workers"""
+        running = []
+        peak = []
+        lock = threading.Lock()
+        
+        def work():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.pop()
+        
+        await asyncio.gather(*(self.pools.run("bert", work) for _ in range(6)))
+        self.assertEqual(max(peak), 2)
+    
+    async def test_event_loop_stays_responsive(self):
+        """Test that the loop keeps running other coroutines while inference blocks"""
+        task = asyncio.ensure_future(self.pools.run("bert", time.sleep, 0.3))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        self.assertLess(time.perf_counter() - start, 0.2)
+        await task
+    
+    async def test_stats(self):
+        """Test the per-pool statistics"""
+        await self.pools.run("chat", lambda: None)
+        stats = self.pools.get_stats()
+        self.assertEqual(
+            {key: stats["chat"][key] for key in ["max_workers", "active", "waiting", "rejected", "expired"]},
+            {"max_workers": 1, "active": 0, "waiting": 0, "rejected": 0, "expired": 0}
+        )
+        self.assertNotIn("spacy", stats)
+        self.assertEqual(self.pools.get_size("spacy"), 1)
+
+    async def test_waiting_calls_are_capped(self):
+        """Test that calls beyond max_waiting are rejected instead of queued"""
+        pools = InferencePools({"bert": 1}, max_waiting={"bert": 1})
+        release = threading.Event()
+        running = asyncio.ensure_future(pools.run("bert", release.wait, 2))
+        queued = asyncio.ensure_future(pools.run("bert", lambda: "queued"))
+        await asyncio.sleep(0.05)
+        
+        with self.assertRaises(QueueFullError):
+            await pools.run("bert", lambda: "rejected")
+        # Pools without a limit keep queueing
+        self.assertEqual(await pools.run("chat", lambda: "chat"), "chat")
+        
+        release.set()
+        await running
+        self.assertEqual(await queued, "queued")
+        self.assertEqual(pools.get_stats()["bert"]["rejected"], 1)
+        pools.shutdown()
+    
+    async def test_expired_calls_are_not_run(self):
+        """Test that a call whose deadline passes while it waits for a worker is dropped"""
+        calls = []
+        running = asyncio.ensure_future(self.pools.run("chat", time.sleep, 0.1))
+        queued = asyncio.ensure_future(
+            self.pools.run("chat", calls.append, "late", deadline=deadline_after(20))
+        )
+        
+        with self.assertRaises(DeadlineExceededError):
+            await queued
+        await running
+        
+        self.assertEqual(calls, [])
+        stats = self.pools.get_stats()["chat"]
+        self.assertEqual((stats["expired"], stats["waiting"]), (1, 0))
+        self.assertGreater(stats["mean_compute_ms"], 50)
+    
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,8 @@ import unittest
 import sys
 import os
 import json
-from unittest.mock import patch, MagicMock, Mock
+import asyncio
+from unittest.mock import patch, MagicMock, Mock, AsyncMock
 from fastapi.testclient import TestClient
 from fastapi import HTTPException
 
@@ -10,7 +11,51 @@ from fastapi import HTTPException
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the main app
-from main import app, load_models, extract_entities_spacy, extract_entities_bert, extract_entities_spacy_bert, load_spacy_model, load_bert_model, load_spacy_bert_model
+from main import app, load_models, extract_entities_spacy, extract_entities_bert, extract_entities_spacy_bert, load_spacy_model, load_bert_model, load_spacy_bert_model, get_bert_windows, decode_bert_entities, extract_entities_bert_batch, extract_entities_spacy_batch, Entity
+import main
+import time
+import torch
+from transformers import BertConfig
+
+def make_fake_bert_model_dict(entity_words):
+    """Build a word-level stand-in for the BERT tokenizer and model"""
+    vocab = {"[PAD]": 0, "[CLS]": 1, "[SEP]": 2}
+    
+    def tokenize_one(text):
+        input_ids, offsets = [], []
+        position = 0
+        for word in text.split():
+            start = text.index(word, position)
+            position = start + len(word)
+            input_ids.append(vocab.setdefault(word.lower(), len(vocab)))
+            offsets.append((start, position))
+        return input_ids, offsets
+    
+    def tokenize(texts, add_special_tokens=False, **kwargs):
+        encoded = [tokenize_one(text) for text in texts]
+        return {"input_ids": [ids for ids, _ in encoded], "offset_mapping": [offsets for _, offsets in encoded]}
+    
+    tokenizer = MagicMock(side_effect=tokenize)
+    tokenizer.pad_token_id, tokenizer.cls_token_id, tokenizer.sep_token_id = 0, 1, 2
+    id_to_word = lambda: {v: k for k, v in vocab.items()}
+    tokenizer.convert_ids_to_tokens.side_effect = lambda ids: [id_to_word()[int(i)] for i in ids]
+    
+    def forward(input_ids, attention_mask):
+        words = id_to_word()
+        is_entity = torch.tensor([float(words[i] in entity_words) for i in range(len(words))])
+        entity_scores = is_entity[input_ids]
+        return MagicMock(logits=torch.stack([1 - entity_scores, entity_scores], dim=-1))
+    
+    model = MagicMock(side_effect=forward)
+    model.config.id2label = {0: "O", 1: "PERSON"}
+    return {"tokenizer": tokenizer, "model": model, "sliding_window": True, "window_size": 512, "stride": 384}
+
+def make_counting_batch(model_dict, calls):
+    """Batch function over a fake BERT model dict that records the texts it is given in calls"""
+    def counting_batch(texts):
+        calls.extend(texts)
+        return main.extract_entities_bert_batch(texts, model_dict)
+    return counting_batch
 
 class TestMainAPI(unittest.TestCase):
     """Test cases for the main FastAPI application"""
@@ -19,6 +64,8 @@ class TestMainAPI(unittest.TestCase):
         """Set up test fixtures"""
         self.client = TestClient(app)
         self.sample_text = "This is a test lease agreement with John Doe and Jane Smith."
+        if main.ner_cache is not None:
+            main.ner_cache.clear()
         
     def test_root_endpoint(self):
         """Test the root endpoint"""
@@ -34,6 +81,27 @@ class TestMainAPI(unittest.TestCase):
         self.assertIn("status", data)
         self.assertIn("models_loaded", data)
         self.assertEqual(data["status"], "healthy")
+        self.assertEqual(set(data["models"]), {"spacy", "bert", "bert-student", "bert-pruned", "bert-int8", "bert_onnx", "spacy_bert"})
+        self.assertIn(data["models"]["bert"]["state"], ["not_loaded", "loading", "loaded", "evicted", "failed"])
+    
+    def test_liveness_endpoint(self):
+        """Test the liveness probe"""
+        response = self.client.get("/health/live")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "alive"})
+    
+    def test_readiness_endpoint(self):
+        """Test the readiness probe reports per-model readiness"""
+        loaded = {"spacy": MagicMock(), "bert": MagicMock(), "spacy_bert": MagicMock()}
+        with patch.dict('main.models', loaded), patch('main.PRELOAD_MODELS', ["spacy", "bert", "spacy_bert"]):
+            response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["models_ready"], {"spacy": True, "bert": True, "spacy_bert": True})
+        
+        with patch.dict('main.models', {"bert": None}), patch('main.PRELOAD_MODELS', ["bert"]):
+            response = self.client.get("/health/ready")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["models_ready"], {"bert": False})
     
     def test_models_endpoint(self):
         """Test the models endpoint"""
@@ -64,6 +132,299 @@ class TestMainAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn("not available", response.json()["detail"])
     
+    def test_extract_entities_endpoint_with_loaded_model(self):
+        """Test single-text extraction through the micro-batcher"""
+        with patch.dict('main.models', {"bert": make_fake_bert_model_dict({"john", "doe"})}):
+            response = self.client.post("/extract-entities", json={"text": self.sample_text, "model": "bert"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e["text"] for e in response.json()["entities"]], ["John Doe"])
+    
+    def test_entity_types_of_bert_backends(self):
+        """Test that the int8 and ONNX Runtime BERT backends report their labels"""
+        config = BertConfig(id2label={0: "O", 1: "B-LESSEE_NAME", 2: "I-LESSEE_NAME"})
+        model_dict = {"tokenizer": MagicMock(), "model": MagicMock(config=config)}
+        for model_name in ["bert-int8", "bert_onnx"]:
+            with patch.object(main.model_registry, "get", return_value=model_dict):
+                response = self.client.get(f"/entity-types?model={model_name}")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["entity_types"], ["O", "B-LESSEE_NAME", "I-LESSEE_NAME"])
+    
+    def test_worker_mode_serves_only_preloaded_models(self):
+        """Test that forked-worker mode refuses models that would be loaded separately in every worker"""
+        with patch('main.worker_pool', MagicMock()), patch('main.PRELOAD_MODELS', ["spacy", "bert"]):
+            response = self.client.post("/extract-entities", json={"text": self.sample_text, "model": "bert-int8"})
+            models = [model["name"] for model in self.client.get("/models").json()["models"]]
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn("bert-int8", models)
+        self.assertTrue(set(models) <= {"spacy", "bert"})
+    
+    def test_metrics_endpoint(self):
+        """Test the metrics endpoint reports batching stats for every model"""
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        batching = response.json()["batching"]
+        self.assertEqual(set(batching), {"spacy", "bert", "bert-student", "bert-pruned", "bert-int8", "bert_onnx", "spacy_bert"})
+        self.assertIn("queue_depth", batching["bert"])
+        self.assertIn("batch_size_distribution", batching["bert"])
+    
+    def test_extract_entities_batch_endpoint(self):
+        """Test the batch endpoint returns one result per text in input order"""
+        texts = ["john doe rents here", "nobody", "the tenant is doe"]
+        with patch.dict('main.models', {"bert": make_fake_bert_model_dict({"john", "doe"})}):
+            response = self.client.post("/extract-entities/batch", json={"texts": texts, "model": "bert", "batch_size": 2})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([result["text"] for result in results], texts)
+        self.assertEqual([[e["text"] for e in result["entities"]] for result in results], [["john doe"], [], ["doe"]])
+    
+    def test_extract_entities_served_from_cache(self):
+        """Test that the same text is only run through the model once"""
+        model_dict = make_fake_bert_model_dict({"john", "doe"})
+        calls = []
+        counting_batch = make_counting_batch(model_dict, calls)
+        
+        with patch('main.ner_cache', main.NERResultCache(1024 * 1024)), \
+             patch.dict('main.models', {"bert": model_dict}), \
+             patch.object(main.batchers["bert"], "batch_fn", counting_batch):
+            first = self.client.post("/extract-entities", json={"text": self.sample_text, "model": "bert"})
+            second = self.client.post("/extract-entities", json={"text": self.sample_text, "model": "bert"})
+            batch = self.client.post("/extract-entities/batch", json={"texts": [self.sample_text, "jane doe"], "model": "bert"})
+            stats = self.client.get("/metrics").json()["cache"]
+        
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(batch.json()["results"][0]["entities"], first.json()["entities"])
+        self.assertEqual([e["text"] for e in batch.json()["results"][1]["entities"]], ["doe"])
+        self.assertEqual(calls, [self.sample_text])
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 2))
+    
+    def test_extraction_settings_change_misses_the_cache(self):
+        """Test that results cached under other window or pipeline settings are not served"""
+        model_dict = make_fake_bert_model_dict({"john", "doe"})
+        calls = []
+        counting_batch = make_counting_batch(model_dict, calls)
+        
+        with patch('main.ner_cache', main.NERResultCache(1024 * 1024)), \
+             patch.dict('main.models', {"bert": model_dict}), \
+             patch.object(main.batchers["bert"], "batch_fn", counting_batch):
+            self.client.post("/extract-entities", json={"text": self.sample_text, "model": "bert"})
+            digest = main.model_digest("bert")
+            with patch.dict(main.MODEL_CONFIGS["bert"], {"window_size": 256}):
+                self.assertNotEqual(main.model_digest("bert"), digest)
+                self.client.post("/extract-entities", json={"text": self.sample_text, "model": "bert"})
+            self.client.post("/extract-entities", json={"text": self.sample_text, "model": "bert"})
+        
+        self.assertEqual(calls, [self.sample_text, self.sample_text])
+        spacy_digest = main.model_digest("spacy")
+        with patch.dict(main.MODEL_CONFIGS["spacy"], {"ner_only": not main.MODEL_CONFIGS["spacy"]["ner_only"]}):
+            self.assertNotEqual(main.model_digest("spacy"), spacy_digest)
+    
+    def test_extract_entities_by_paragraph(self):
+        """Test that shared paragraphs are tagged once and entities keep their document offsets"""
+        model_dict = make_fake_bert_model_dict({"john", "doe"})
+        calls = []
+        counting_batch = make_counting_batch(model_dict, calls)
+        
+        boilerplate = "Tenant shall maintain the premises."
+        first_text = f"Lease between John Smith and the landlord.\n\n  {boilerplate}\n"
+        second_text = f"Lease between Jane Doe and the landlord.\n{boilerplate}"
+        with patch('main.ner_cache', main.NERResultCache(1024 * 1024)), \
+             patch.dict('main.models', {"bert": model_dict}), \
+             patch.object(main.batchers["bert"], "batch_fn", counting_batch):
+            first = self.client.post("/extract-entities", json={"text": first_text, "model": "bert", "by_paragraph": True})
+            batch = self.client.post("/extract-entities/batch", json={
+                "texts": [first_text, second_text], "model": "bert", "by_paragraph": True
+            })
+        
+        entities = batch.json()["results"][1]["entities"]
+        self.assertEqual(first.json()["entities"], batch.json()["results"][0]["entities"])
+        self.assertEqual([(e["text"], e["start"], e["end"]) for e in entities], [("Doe", 19, 22)])
+        self.assertEqual(second_text[19:22], "Doe")
+        self.assertEqual(sorted(calls), sorted(["Lease between John Smith and the landlord.", boilerplate]))
+    
+    def test_extract_entities_incremental(self):
+        """Test that an edited draft only re-runs its changed paragraphs and matches a full re-run"""
+        model_dict = make_fake_bert_model_dict({"john", "doe", "smith"})
+        calls = []
+        counting_batch = make_counting_batch(model_dict, calls)
+        
+        draft = "Lease between John Roe and ACME.\nTenant shall maintain the premises.\nRent is due monthly."
+        edited = "Lease between John Doe and ACME.\nTenant shall maintain the premises.\n\nRent is due monthly.\nSigned by Smith today."
+        with patch('main.ner_cache', None), \
+             patch.dict('main.models', {"bert": model_dict}), \
+             patch.object(main.batchers["bert"], "batch_fn", counting_batch):
+            first = self.client.post("/extract-entities/incremental", json={"text": draft, "model": "bert"}).json()
+            calls.clear()
+            second = self.client.post("/extract-entities/incremental", json={
+                "text": edited, "model": "bert", "previous_version_id": first["version_id"]
+            }).json()
+            incremental_calls = list(calls)
+            full = self.client.post("/extract-entities", json={"text": edited, "model": "bert", "by_paragraph": True}).json()
+            unknown = self.client.post("/extract-entities/incremental", json={
+                "text": edited, "model": "bert", "previous_version_id": "unknown"
+            }).json()
+        
+        self.assertEqual(sorted(incremental_calls), ["Lease between John Doe and ACME.", "Signed by Smith today."])
+        self.assertEqual((second["reused_paragraphs"], second["computed_paragraphs"]), (2, 2))
+        self.assertEqual(second["extraction_mode"], "by_paragraph")
+        self.assertEqual(second["entities"], full["entities"])
+        self.assertEqual([edited[e["start"]:e["end"]] for e in second["entities"]], ["John Doe", "Smith"])
+        self.assertNotEqual(second["version_id"], first["version_id"])
+        self.assertEqual((unknown["reused_paragraphs"], unknown["entities"]), (0, full["entities"]))
+    
+    def test_extract_entities_compare(self):
+        """Test that the models run concurrently and the majority vote keeps spans most models agree on"""
+        text = "Lease between John Doe and ACME Corp for 123 Main Street."
+        john = Entity(text="John Doe", label="LESSEE_NAME", start=14, end=22)
+        acme = Entity(text="ACME Corp", label="LESSOR_NAME", start=27, end=36)
+        street = Entity(text="Main Street", label="PROPERTY_ADDRESS", start=45, end=56)
+        outputs = {"spacy": [john, acme], "bert": [john, street], "spacy_bert": [john, acme, street]}
+        
+        def slow_batch(model_name):
+            def batch_fn(texts):
+                time.sleep(0.3)
+                return [outputs[model_name] for _ in texts]
+            return batch_fn
+        
+        with patch.object(main.model_registry, "state", return_value="loaded"), \
+             patch.object(main.batchers["spacy"], "batch_fn", slow_batch("spacy")), \
+             patch.object(main.batchers["bert"], "batch_fn", slow_batch("bert")), \
+             patch.object(main.batchers["spacy_bert"], "batch_fn", slow_batch("spacy_bert")):
+            response = self.client.post("/extract-entities/compare", json={"text": text})
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(set(data["results"]), {"spacy", "bert", "spacy_bert"})
+        self.assertEqual([e["text"] for e in data["results"]["bert"]["entities"]], ["John Doe", "Main Street"])
+        self.assertTrue(all(result["wall_time_ms"] >= 300 for result in data["results"].values()))
+        # Close to the slowest model, not the sum of all three
+        self.assertLess(data["wall_time_ms"], 800)
+        self.assertEqual([e["text"] for e in data["majority"]], ["John Doe", "ACME Corp", "Main Street"])
+    
+    def test_extract_entities_auto_mode(self):
+        """Test that mode=auto runs BERT only when spaCy leaves labels open"""
+        text = "Lease between ACME and John Doe.\nMonthly rent is $1,500."
+        spacy_entities = [Entity(text="John Doe", label="LESSEE_NAME", start=23, end=31)]
+        bert_calls = []
+        
+        def bert_batch(texts):
+            bert_calls.extend(texts)
+            return [[Entity(text="ACME", label="LESSOR_NAME", start=14, end=18)] if "ACME" in t else [] for t in texts]
+        
+        with patch('main.ner_cache', None), \
+             patch.object(main.model_registry, "state", return_value="loaded"), \
+             patch.object(main.batchers["spacy"], "batch_fn", lambda texts: [spacy_entities for _ in texts]), \
+             patch.object(main.batchers["bert"], "batch_fn", bert_batch):
+            response = self.client.post("/extract-entities", json={"text": text, "mode": "auto"})
+            invalid = self.client.post("/extract-entities", json={"text": text, "mode": "fastest"})
+            stats = self.client.get("/metrics").json()["cascade"]
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([e["text"] for e in response.json()["entities"]], ["ACME", "John Doe"])
+        self.assertEqual(len(bert_calls), 1)
+        self.assertEqual(invalid.status_code, 400)
+        self.assertGreaterEqual(stats["escalated"], 1)
+    
+    def test_extract_entities_prefilter(self):
+        """Test that only the windows around cue phrases reach the model, with entities at document offsets"""
+        model_dict = make_fake_bert_model_dict({"john", "doe"})
+        calls = []
+        counting_batch = make_counting_batch(model_dict, calls)
+        
+        filler = "Both sides keep the hallway clean and quiet at night. " * 10
+        text = filler + "LESSEE: John Doe shall pay a deposit of $900 today. " + filler
+        with patch('main.ner_cache', None), \
+             patch.dict('main.models', {"bert": model_dict}), \
+             patch.object(main.batchers["bert"], "batch_fn", counting_batch):
+            response = self.client.post("/extract-entities", json={"text": text, "model": "bert", "prefilter": True})
+        
+        entities = response.json()["entities"]
+        self.assertEqual([(e["text"], e["start"]) for e in entities], [("John Doe", text.index("John Doe"))])
+        self.assertEqual(len(calls), 1)
+        self.assertLess(len(calls[0]), len(text) / 2)
+    
+    def test_extract_entities_routed_by_latency_budget(self):
+        """Test that model=auto picks by budget, reports the chosen model and records its latency"""
+        router = main.ModelRouter({
+            "bert": main.CostCurve(base_ms=100, ms_per_char=1.0),
+            "spacy": main.CostCurve(base_ms=1, ms_per_char=0.01)
+        })
+        spacy_entities = [Entity(text="John Doe", label="LESSEE_NAME", start=36, end=44)]
+        
+        with patch('main.ner_cache', None), \
+             patch('main.model_router', router), \
+             patch.object(main.model_registry, "state", return_value="loaded"), \
+             patch.object(main.batchers["spacy"], "batch_fn", lambda texts: [spacy_entities for _ in texts]), \
+             patch.object(main.batchers["bert"], "batch_fn", lambda texts: [[] for _ in texts]):
+            tight = self.client.post("/extract-entities", json={"text": self.sample_text, "model": "auto"},
+                                     headers={"X-Latency-Budget-Ms": "50"})
+            loose = self.client.post("/extract-entities", json={
+                "text": self.sample_text, "model": "auto", "latency_budget_ms": 10000
+            })
+            stats = self.client.get("/metrics").json()["router"]["models"]
+        
+        self.assertEqual(tight.json()["model"], "spacy")
+        self.assertEqual([e["text"] for e in tight.json()["entities"]], ["John Doe"])
+        self.assertEqual(loose.json()["model"], "bert")
+        self.assertEqual((stats["spacy"]["decisions"], stats["spacy"]["observations"]), (1, 1))
+        self.assertEqual((stats["bert"]["decisions"], stats["bert"]["observations"]), (1, 1))
+    
+    def test_extract_entities_without_text_echo(self):
+        """Test that echo_text=False references the text by digest and length, compressed when accepted"""
+        text = self.sample_text * 50
+        with patch.dict('main.models', {"bert": make_fake_bert_model_dict({"john", "doe"})}):
+            full = self.client.post("/extract-entities", json={"text": text, "model": "bert"})
+            lean = self.client.post("/extract-entities", json={"text": text, "model": "bert", "echo_text": False},
+                                    headers={"Accept-Encoding": "gzip"})
+            batch = self.client.post("/extract-entities/batch", json={"texts": [text], "model": "bert", "echo_text": False})
+        
+        self.assertEqual(lean.json()["entities"], full.json()["entities"])
+        self.assertNotIn("text", lean.json())
+        self.assertEqual(lean.json()["text_digest"], main.text_digest(text))
+        self.assertEqual(lean.json()["text_length"], len(text))
+        self.assertEqual(batch.json()["results"][0], lean.json())
+        self.assertEqual(lean.headers["Content-Encoding"], "gzip")
+        self.assertLess(int(lean.headers["Content-Length"]), len(lean.content))
+    
+    def test_extract_entities_rejected_when_queue_full(self):
+        """Test that a full model queue is reported as 429 with Retry-After"""
+        with patch.object(main.model_registry, "state", return_value="loaded"), \
+             patch.object(main.batchers["bert"], "submit", AsyncMock(side_effect=main.QueueFullError("full", 2.5))):
+            response = self.client.post("/extract-entities", json={"text": self.sample_text, "model": "bert"})
+        
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["Retry-After"], "3")
+    
+    def test_extract_entities_past_deadline(self):
+        """Test that requests whose deadline passes before they run get 504 and are not computed"""
+        calls = []
+        
+        def counting_batch(model_name, texts, batch_size=None):
+            calls.extend(texts)
+            return [[] for _ in texts]
+        
+        with patch('main.ner_cache', None), \
+             patch.object(main.model_registry, "state", return_value="loaded"), \
+             patch('main.extract_entities_batch', counting_batch):
+            batch = self.client.post("/extract-entities/batch", json={"texts": ["a"], "model": "bert", "deadline_ms": 0.001})
+            single = self.client.post("/extract-entities", json={"text": "a", "model": "bert"},
+                                      headers={"X-Deadline-Ms": "0.001"})
+        
+        self.assertEqual((batch.status_code, single.status_code), (504, 504))
+        self.assertEqual(calls, [])
+    
+    def test_extract_entities_compare_invalid_model(self):
+        """Test that the compare endpoint rejects unknown models"""
+        response = self.client.post("/extract-entities/compare", json={"text": "a", "models": ["spacy", "invalid_model"]})
+        self.assertEqual(response.status_code, 400)
+    
+    def test_extract_entities_batch_endpoint_invalid_request(self):
+        """Test the batch endpoint rejects unknown models and bad batch sizes"""
+        response = self.client.post("/extract-entities/batch", json={"texts": ["a"], "model": "invalid_model"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/extract-entities/batch", json={"texts": ["a"], "model": "spacy", "batch_size": 0})
+        self.assertEqual(response.status_code, 400)
+    
     def test_extract_entities_endpoint_valid_request(self):
         """Test extract entities endpoint with valid request"""
         request_data = {
@@ -151,6 +512,33 @@ class TestMainAPI(unittest.TestCase):
             # If Ollama isn't running, we expect a 500 error
             self.assertEqual(response.status_code, 500)
 
+class TestEventLoopResponsiveness(unittest.IsolatedAsyncioTestCase):
+    """Test that inference does not block other requests"""
+    
+    async def test_health_responds_while_bert_is_busy(self):
+        """Test that /health answers quickly while a slow extraction is running"""
+        import httpx
+        import time
+        import main
+        
+        def slow_batch(texts):
+            time.sleep(1.0)
+            return [[] for _ in texts]
+        
+        transport = httpx.ASGITransport(app=app)
+        with patch.dict('main.models', {"bert": MagicMock()}), patch.object(main.batchers["bert"], "batch_fn", slow_batch):
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                extraction = asyncio.ensure_future(client.post("/extract-entities", json={"text": "lease", "model": "bert"}))
+                await asyncio.sleep(0.1)
+                start = time.perf_counter()
+                health = await client.get("/health")
+                health_latency = time.perf_counter() - start
+                self.assertFalse(extraction.done())
+                self.assertEqual((await extraction).status_code, 200)
+        
+        self.assertEqual(health.status_code, 200)
+        self.assertLess(health_latency, 0.5)
+
 class TestMainFunctions(unittest.TestCase):
     """Test cases for the main module functions"""
     
@@ -169,6 +557,14 @@ class TestMainFunctions(unittest.TestCase):
             self.assertEqual(result, mock_model)
             mock_spacy_load.assert_called_once_with("./test_model")
     
+    @patch('main.load_pipeline_for')
+    def test_load_spacy_model_ner_only(self, mock_load_pipeline_for):
+        """Test that the NER-only profile loads just what the ner pipe needs"""
+        with patch('main.os.path.exists', return_value=True):
+            result = load_spacy_model("./test_model", ner_only=True)
+        self.assertEqual(result, mock_load_pipeline_for.return_value)
+        mock_load_pipeline_for.assert_called_once_with("./test_model", "ner")
+    
     @patch('main.spacy.load')
     def test_load_spacy_model_not_found(self, mock_spacy_load):
         """Test spaCy model loading when model doesn't exist"""
@@ -182,6 +578,7 @@ class TestMainFunctions(unittest.TestCase):
     def test_load_bert_model_success(self, mock_model_load, mock_tokenizer_load):
         """Test successful BERT model loading"""
         mock_tokenizer = MagicMock()
+        mock_tokenizer.backend_tokenizer.to_str.return_value = '{"model": {"vocab": {}}}'
         mock_model = MagicMock()
         mock_tokenizer_load.return_value = mock_tokenizer
         mock_model_load.return_value = mock_model
@@ -190,6 +587,7 @@ class TestMainFunctions(unittest.TestCase):
             result = load_bert_model("./test_model")
             self.assertEqual(result["tokenizer"], mock_tokenizer)
             self.assertEqual(result["model"], mock_model)
+            self.assertEqual(len(result["vocab_key"]), 16)
     
     @patch('main.AutoTokenizer.from_pretrained')
     @patch('main.AutoModelForTokenClassification.from_pretrained')
@@ -211,6 +609,14 @@ class TestMainFunctions(unittest.TestCase):
             self.assertEqual(result, mock_model)
             mock_spacy_load.assert_called_once_with("./test_model")
     
+    @patch('main.load_pipeline_for')
+    def test_load_spacy_bert_model_ner_only(self, mock_load_pipeline_for):
+        """Test that the NER-only profile skips the unused transformer"""
+        with patch('main.os.path.exists', return_value=True):
+            result = load_spacy_bert_model("./test_model", ner_only=True)
+        self.assertEqual(result, mock_load_pipeline_for.return_value)
+        mock_load_pipeline_for.assert_called_once_with("./test_model", "ner")
+    
     def test_extract_entities_spacy(self):
         """Test spaCy entity extraction"""
         # Create a mock spaCy document
@@ -246,37 +652,117 @@ class TestMainFunctions(unittest.TestCase):
         self.assertEqual(entities[1].start, 43)
         self.assertEqual(entities[1].end, 53)
     
-    @patch('main.torch')
-    def test_extract_entities_bert(self, mock_torch):
+    def test_extract_entities_bert(self):
         """Test BERT entity extraction"""
-        # Create mock BERT model components
-        mock_tokenizer = MagicMock()
-        mock_tokenizer.convert_ids_to_tokens.return_value = ["[CLS]", "This", "is", "a", "test", "[SEP]"]
+        mock_model_dict = make_fake_bert_model_dict({"john", "doe"})
         
-        mock_model = MagicMock()
-        mock_model.config.id2label = {0: "O", 1: "PERSON", 2: "ORG"}
+        entities = extract_entities_bert(self.sample_text, mock_model_dict)
         
-        mock_model_dict = {
-            "tokenizer": mock_tokenizer,
-            "model": mock_model
-        }
+        self.assertIsInstance(entities, list)
+        self.assertEqual(len(entities), 1)
+        self.assertEqual(entities[0].label, "PERSON")
+        self.assertEqual(entities[0].text, "John Doe")
+        self.assertEqual(entities[0].start, self.sample_text.index("John Doe"))
+        self.assertEqual(entities[0].end, self.sample_text.index("John Doe") + len("John Doe"))
+    
+    def test_decode_bert_entities_splits_adjacent_labels(self):
+        """Test that neighbouring tokens with different labels become separate entities"""
+        text = "Landlord Acme LLC Tenant Bob Ray"
+        offsets = [(0, 8), (9, 13), (14, 17), (18, 24), (25, 28), (29, 32)]
+        id2label = {0: "O", 1: "LESSOR_NAME", 2: "LESSEE_NAME"}
         
-        # Mock torch operations
-        mock_tensor = MagicMock()
-        mock_tensor.item.return_value = 1  # PERSON label
-        mock_torch.argmax.return_value = mock_tensor
-        mock_torch.tensor.return_value = mock_tensor
+        entities = decode_bert_entities(text, [0, 1, 1, 2, 2, 2], offsets, id2label)
         
-        # Mock the model output
-        mock_outputs = MagicMock()
-        mock_outputs.logits = mock_tensor
-        mock_model.return_value = mock_outputs
+        self.assertEqual([(e.label, e.text, e.start, e.end) for e in entities], [
+            ("LESSOR_NAME", "Acme LLC", 9, 17),
+            ("LESSEE_NAME", "Tenant Bob Ray", 18, 32),
+        ])
+    
+    def test_decode_bert_entities_bio_and_subwords(self):
+        """Test B-/I- tags, sub-word label inheritance and special tokens"""
+        text = "Rent $1038 paid"
+        # [CLS] rent $ 10 ##38 paid [SEP]
+        offsets = [(0, 0), (0, 4), (5, 6), (6, 8), (8, 10), (11, 15), (0, 0)]
+        word_ids = [None, 0, 1, 2, 2, 3, None]
+        id2label = {0: "O", 1: "B-RENT_AMOUNT", 2: "I-RENT_AMOUNT"}
         
-        entities = extract_entities_bert(self.sample_text, mock_model_dict)
+        # The "##38" sub-word is predicted O but follows its word's first token
+        entities = decode_bert_entities(text, [1, 0, 1, 2, 0, 0, 1], offsets, id2label, word_ids)
         
-        # The function should handle the BERT tokenization and entity extraction
-        # Since this is a complex function, we'll just verify it doesn't crash
-        self.assertIsInstance(entities, list)
+        self.assertEqual([(e.label, e.text, e.start, e.end) for e in entities], [
+            ("RENT_AMOUNT", "$1038", 5, 10),
+        ])
+        
+        # A second B- tag starts a new entity of the same type
+        entities = decode_bert_entities(text, [0, 0, 1, 1, 2, 0, 0], offsets, id2label, word_ids)
+        self.assertEqual([e.text for e in entities], ["$", "1038"])
+    
+    def test_extract_entities_bert_long_document(self):
+        """Test that entities past the first window are still tagged"""
+        long_text = " ".join(["filler"] * 1500) + " john doe signed here"
+        mock_model_dict = make_fake_bert_model_dict({"john", "doe"})
+        
+        entities = extract_entities_bert(long_text, mock_model_dict)
+        self.assertEqual(len(entities), 1)
+        
+        # The single-window mode only sees the first 510 tokens
+        mock_model_dict["sliding_window"] = False
+        self.assertEqual(extract_entities_bert(long_text, mock_model_dict), [])
+    
+    def test_extract_entities_bert_batches_windows(self):
+        """Test that all windows of a document go through one forward pass"""
+        long_text = " ".join(["filler"] * 1200)
+        mock_model_dict = make_fake_bert_model_dict(set())
+        
+        extract_entities_bert(long_text, mock_model_dict)
+        
+        self.assertEqual(mock_model_dict["model"].call_count, 1)
+        batch_ids = mock_model_dict["model"].call_args.kwargs["input_ids"]
+        self.assertEqual(tuple(batch_ids.shape), (3, 512))
+    
+    def test_extract_entities_bert_batch(self):
+        """Test batched BERT extraction matches per-text extraction"""
+        texts = [" ".join(["filler"] * 700) + " john", "doe", "", "john doe"]
+        mock_model_dict = make_fake_bert_model_dict({"john", "doe"})
+        
+        batched = extract_entities_bert_batch(texts, mock_model_dict, batch_size=2)
+        
+        # 2 windows for the long text + 1 each for the two short non-empty texts
+        self.assertEqual(mock_model_dict["model"].call_count, 2)
+        self.assertEqual(batched, [extract_entities_bert(text, mock_model_dict) for text in texts])
+        self.assertEqual([[e.text for e in entities] for entities in batched], [["john"], ["doe"], [], ["john doe"]])
+    
+    def test_extract_entities_spacy_batch(self):
+        """Test spaCy batch extraction pipes shortest first and restores input order"""
+        texts = ["a much longer lease text", "short", "medium text"]
+        
+        def pipe(stream, batch_size=None):
+            for text in stream:
+                entity = MagicMock(text=text, label_="LABEL", start_char=0, end_char=len(text))
+                yield MagicMock(ents=[entity])
+        
+        mock_model = MagicMock()
+        mock_model.pipe.side_effect = pipe
+        
+        results = extract_entities_spacy_batch(texts, mock_model, batch_size=32)
+        
+        self.assertEqual([entities[0].text for entities in results], texts)
+        self.assertEqual(mock_model.pipe.call_args.kwargs["batch_size"], 32)
+    
+    def test_get_bert_windows(self):
+        """Test window layout for short and long token sequences"""
+        self.assertEqual(get_bert_windows(10, 510, 384), [(0, 10)])
+        self.assertEqual(get_bert_windows(1000, 510, 384), [(0, 510), (384, 894), (768, 1000)])
+        
+        # Every token is covered by at least one window
+        windows = get_bert_windows(2000, 510, 256)
+        covered = set()
+        for start, end in windows:
+            covered.update(range(start, end))
+        self.assertEqual(covered, set(range(2000)))
+        
+        with self.assertRaises(ValueError):
+            get_bert_windows(1000, 128, 256)
     
     def test_extract_entities_spacy_bert(self):
         """Test spaCy BERT entity extraction"""
@@ -0,0 +1,154 @@
+import unittest
+import sys
+import os
+import asyncio
+import threading
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import DeadlineExceededError, QueueFullError, deadline_after
+from micro_batcher import MicroBatcher
+
+class TestMicroBatcher(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the micro-batching scheduler"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.batches = []
+        self.lock = threading.Lock()
+    
+    def upper_batch(self, texts):
+        """Batch function that records every batch it is given"""
+        with self.lock:
+            self.batches.append(list(texts))
+        return [text.upper() for text in texts]
+    
+    async def test_concurrent_requests_share_a_batch(self):
+        """Test that concurrent submits are run as one batch and get their own results"""
+        batcher = MicroBatcher("test", self.upper_batch, max_batch_size=8, max_wait_ms=50)
+        texts = ["a", "b", "c", "d", "e"]
+        
+        results = await asyncio.gather(*(batcher.submit(text) for text in texts))
+        
+        self.assertEqual(results, ["A", "B", "C", "D", "E"])
+        self.assertEqual(self.batches, [texts])
+        await batcher.close()
+    
+    async def test_max_batch_size_is_respected(self):
+        """Test that no batch is larger than max_batch_size"""
+        batcher = MicroBatcher("test", self.upper_batch, max_batch_size=4, max_wait_ms=50)
+        texts = [str(i) for i in range(10)]
+        
+        results = await asyncio.gather(*(batcher.submit(text) for text in texts))
+        
+        self.assertEqual(results, texts)
+        self.assertEqual(sorted(len(batch) for batch in self.batches), [2, 4, 4])
+        stats = batcher.get_stats()
+        self.assertEqual(stats["batches"], 3)
+        self.assertEqual(stats["batch_size_distribution"], {"2": 1, "4": 2})
+        self.assertEqual(stats["queue_depth"], 0)
+        await batcher.close()
+    
+    async def test_single_request_is_not_held_longer_than_max_wait(self):
+        """Test that a lone request runs once max_wait_ms has passed"""
+        batcher = MicroBatcher("test", self.upper_batch, max_batch_size=8, max_wait_ms=1)
+        
+        result = await asyncio.wait_for(batcher.submit("solo"), timeout=2)
+        
+        self.assertEqual(result, "SOLO")
+        await batcher.close()
+    
+    async def test_batch_errors_reach_every_caller(self):
+        """Test that an exception in the batch function is raised for every request in the batch"""
+        def failing_batch(texts):
+            raise RuntimeError("model exploded")
+        
+        batcher = MicroBatcher("test", failing_batch, max_batch_size=8, max_wait_ms=20)
+        results = await asyncio.gather(batcher.submit("a"), batcher.submit("b"), return_exceptions=True)
+        
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        
+        # The batcher keeps serving after a failed batch
+        batcher.batch_fn = self.upper_batch
+        self.assertEqual(await batcher.submit("c"), "C")
+        await batcher.close()
+    
+    async def test_full_queue_is_rejected(self):
+        """Test that requests beyond max_queue_size fail fast with a retry hint"""
+        release = threading.Event()
+        
+        def blocking_batch(texts):
+            release.wait(2)
+            return [text.upper() for text in texts]
+        
+        batcher = MicroBatcher("test", blocking_batch, max_batch_size=1, max_wait_ms=1, max_queue_size=2)
+        running = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0.05)
+        queued = [asyncio.ensure_future(batcher.submit(text)) for text in ["b", "c"]]
+        await asyncio.sleep(0)
+        
+        with self.assertRaises(QueueFullError) as context:
+            await batcher.submit("d")
+        self.assertGreaterEqual(int(context.exception.retry_after_header), 1)
+        
+        release.set()
+        self.assertEqual(await asyncio.gather(running, *queued), ["A", "B", "C"])
+        self.assertEqual(batcher.get_stats()["rejected"], 1)
+        await batcher.close()
+    
+    async def test_expired_requests_are_not_computed(self):
+        """Test that a request whose deadline passes while queued is dropped instead of run"""
+        release = threading.Event()
+        
+        def blocking_batch(texts):
+            self.upper_batch(texts)
+            release.wait(2)
+            return [text.upper() for text in texts]
+        
+        batcher = MicroBatcher("test", blocking_batch, max_batch_size=1, max_wait_ms=1)
+        running = asyncio.ensure_future(batcher.submit("a"))
+        await asyncio.sleep(0.05)
+        
+        with self.assertRaises(DeadlineExceededError):
+            await batcher.submit("late", deadline=deadline_after(20))
+        release.set()
+        self.assertEqual(await running, "A")
+        self.assertEqual(await batcher.submit("b", deadline=deadline_after(1000)), "B")
+        
+        self.assertEqual(self.batches, [["a"], ["b"]])
+        stats = batcher.get_stats()
+        self.assertEqual(stats["expired"], 1)
+        self.assertGreater(stats["mean_compute_ms"], 0)
+        await batcher.close()
+    
+    async def test_queue_wait_is_reported_separately(self):
+        """Test that time spent queued behind a busy model is counted as wait, not compute"""
+        release = threading.Event()
+        
+        def blocking_batch(texts):
+            if texts == ["slow"]:
+                release.wait(2)
+            return texts
+        
+        batcher = MicroBatcher("test", blocking_batch, max_batch_size=1, max_wait_ms=1)
+        running = asyncio.ensure_future(batcher.submit("slow"))
+        await asyncio.sleep(0.01)
+        queued = [asyncio.ensure_future(batcher.submit(text)) for text in ["a", "b", "c"]]
+        await asyncio.sleep(0.1)
+        release.set()
+        await asyncio.gather(running, *queued)
+        
+        # Three fast requests waited behind one slow one
+        stats = batcher.get_stats()
+        self.assertGreater(stats["mean_queue_wait_ms"], 60)
+        self.assertLess(stats["mean_compute_ms"], 40)
+        await batcher.close()
+    
+    def test_invalid_max_batch_size(self):
+        """Test that a batch size below 1 is rejected"""
+        with self.assertRaises(ValueError):
+            MicroBatcher("test", self.upper_batch, max_batch_size=0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_registry import ModelRegistry, ModelNotLoadedError
+
+class TestModelRegistry(unittest.TestCase):
+    """Test cases for the lazy, memory-budgeted model registry"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.load_calls = []
+        self.sizes = {"spacy": 40, "bert": 40, "spacy_bert": 40}
+    
+    def loader(self, name):
+        """Fake loader that records its calls"""
+        self.load_calls.append(name)
+        if name == "broken":
+            raise Exception("weights missing")
+        return f"{name}-model"
+    
+    def memory_fn(self, name, model):
+        """Fake memory measurement"""
+        return self.sizes.get(name, 0)
+    
+    def make_registry(self, budget=None, names=("spacy", "bert", "spacy_bert")):
+        return ModelRegistry(names, self.loader, self.memory_fn, memory_budget_bytes=budget)
+    
+    def test_models_load_on_first_use(self):
+        """Test that nothing loads until a model is requested"""
+        registry = self.make_registry()
+        self.assertEqual(registry.state("bert"), "not_loaded")
+        self.assertEqual(self.load_calls, [])
+        
+        self.assertEqual(registry.get("bert"), "bert-model")
+        self.assertEqual(registry.get("bert"), "bert-model")
+        
+        self.assertEqual(self.load_calls, ["bert"])
+        self.assertEqual(registry.state("bert"), "loaded")
+        self.assertEqual(registry.models["bert"], "bert-model")
+        self.assertEqual(registry.loaded_models(), ["bert"])
+    
+    def test_concurrent_requests_load_once(self):
+        """Test that concurrent first uses share one load"""
+        def slow_loader(name):
+            self.load_calls.append(name)
+            time.sleep(0.1)
+            return name
+        
+        registry = ModelRegistry(["bert"], slow_loader, self.memory_fn)
+        threads = [threading.Thread(target=registry.get, args=("bert",)) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(self.load_calls, ["bert"])
+    
+    def test_least_recently_used_model_is_evicted(self):
+        """Test LRU eviction when the budget would be exceeded"""
+        registry = self.make_registry(budget=100)
+        registry.get("spacy")
+        registry.get("bert")
+        registry.get("spacy")  # bert is now the least recently used
+        
+        registry.get("spacy_bert")
+        
+        self.assertEqual(registry.state("bert"), "evicted")
+        self.assertEqual(registry.state("spacy"), "loaded")
+        self.assertEqual(registry.state("spacy_bert"), "loaded")
+        self.assertEqual(registry.memory_used(), 80)
+        
+        # An evicted model is reloaded on its next use
+        registry.get("bert")
+        self.assertEqual(self.load_calls.count("bert"), 2)
+        self.assertEqual(registry.state("spacy"), "evicted")
+    
+    def test_no_eviction_without_budget(self):
+        """Test that an unlimited registry keeps every model"""
+        registry = self.make_registry()
+        for name in ("spacy", "bert", "spacy_bert"):
+            registry.get(name)
+        self.assertEqual(len(registry.loaded_models()), 3)
+        self.assertEqual(registry.memory_used(), 120)
+    
+    def test_failed_model_is_not_retried(self):
+        """Test that a failed load is recorded and reported"""
+        registry = self.make_registry(names=("broken",))
+        
+        with self.assertRaises(ModelNotLoadedError):
+            registry.get("broken")
+        with self.assertRaises(ModelNotLoadedError):
+            registry.get("broken")
+        
+        self.assertEqual(self.load_calls, ["broken"])
+        status = registry.get_status()["broken"]
+        self.assertEqual(status["state"], "failed")
+        self.assertIn("weights missing", status["error"])
+    
+    def test_preload_records_failures(self):
+        """Test that preloading loads what it can without raising"""
+        registry = self.make_registry(names=("spacy", "broken"))
+        registry.preload(["spacy", "broken"])
+        self.assertEqual(registry.state("spacy"), "loaded")
+        self.assertEqual(registry.state("broken"), "failed")
+    
+    def test_models_are_warmed_up_before_serving(self):
+        """Test that a model is only published after its warm-up inference"""
+        states_during_warmup = []
+        
+        def warmup(name, model):
+            states_during_warmup.append((registry.state(name), registry.models[name]))
+        
+        registry = ModelRegistry(["bert"], self.loader, self.memory_fn, warmup_fn=warmup)
+        registry.get("bert")
+        
+        self.assertEqual(states_during_warmup, [("warming", None)])
+        self.assertTrue(registry.is_ready("bert"))
+    
+    def test_failed_warmup_marks_model_failed(self):
+        """Test that a model whose warm-up raises is not served"""
+        def warmup(name, model):
+            raise RuntimeError("bad kernel")
+        
+        registry = ModelRegistry(["bert"], self.loader, self.memory_fn, warmup_fn=warmup)
+        registry.preload(["bert"])
+        
+        self.assertEqual(registry.state("bert"), "failed")
+        self.assertFalse(registry.is_ready("bert"))
+    
+    def test_parallel_preload_loads_models_concurrently(self):
+        """Test that parallel preloading overlaps the model loads"""
+        def slow_loader(name):
+            time.sleep(0.2)
+            return name
+        
+        registry = ModelRegistry(["spacy", "bert", "spacy_bert"], slow_loader, self.memory_fn)
+        start = time.perf_counter()
+        registry.preload(["spacy", "bert", "spacy_bert"], parallel=True)
+        
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(sorted(registry.loaded_models()), ["bert", "spacy", "spacy_bert"])
+    
+    def test_unknown_model(self):
+        """Test that unknown names are rejected"""
+        registry = self.make_registry()
+        self.assertNotIn("gpt", registry)
+        with self.assertRaises(KeyError):
+            registry.get("gpt")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_router import CostCurve, ModelRouter
+
+
+class TestCostCurve(unittest.TestCase):
+    """Test cases for the online per-model latency curves"""
+
+    def test_prior_before_any_observation(self):
+        """Test that the prior line is predicted until latencies are measured"""
+        curve = CostCurve(base_ms=10, ms_per_char=0.5)
+        self.assertAlmostEqual(curve.predict(0), 10)
+        self.assertAlmostEqual(curve.predict(100), 60)
+
+    def test_curve_converges_to_measurements(self):
+        """Test that measured latencies replace a wrong prior"""
+        curve = CostCurve(base_ms=1, ms_per_char=0.001)
+        for length in [500, 1000, 2000, 4000, 8000] * 40:
+            curve.update(length, 30 + 0.1 * length)
+
+        base_ms, ms_per_char = curve.coefficients()
+        self.assertAlmostEqual(base_ms, 30, delta=1)
+        self.assertAlmostEqual(ms_per_char, 0.1, delta=0.002)
+
+    def test_prediction_is_never_negative(self):
+        """Test that a negative intercept doesn't predict negative latency"""
+        curve = CostCurve(base_ms=0, ms_per_char=0.01)
+        for _ in range(50):
+            curve.update(10000, 10)
+            curve.update(20000, 100)
+        self.assertEqual(curve.predict(0), 0.0)
+
+
+class TestModelRouter(unittest.TestCase):
+    """Test cases for the latency-budget model router"""
+
+    def setUp(self):
+        # Most accurate first
+        self.router = ModelRouter({
+            "bert": CostCurve(base_ms=20, ms_per_char=0.1),
+            "spacy_bert": CostCurve(base_ms=5, ms_per_char=0.01),
+            "spacy": CostCurve(base_ms=2, ms_per_char=0.002)
+        })
+
+    def test_most_accurate_model_within_budget(self):
+        """Test that the budget decides how far down the accuracy order the router goes"""
+        self.assertEqual(self.router.choose(1000)[0], "bert")
+        self.assertEqual(self.router.choose(1000, budget_ms=500)[0], "bert")
+        self.assertEqual(self.router.choose(10000, budget_ms=500)[0], "spacy_bert")
+        self.assertEqual(self.router.choose(1000000, budget_ms=500)[0], "spacy")
+
+    def test_fastest_model_when_nothing_fits(self):
+        """Test that an impossible budget gets the fastest model and is counted"""
+        model_name, predicted_ms = self.router.choose(10000, budget_ms=1)
+
+        self.assertEqual(model_name, "spacy")
+        self.assertAlmostEqual(predicted_ms, 22)
+        self.assertEqual(self.router.get_stats()["over_budget"], 1)
+
+    def test_only_available_models(self):
+        """Test that unavailable models are skipped"""
+        self.assertEqual(self.router.choose(1000, available=["spacy", "spacy_bert"])[0], "spacy_bert")
+        with self.assertRaises(ValueError):
+            self.router.choose(1000, available=[])
+
+    def test_measurements_change_decisions(self):
+        """Test that a model measured slower than its prior stops being picked for tight budgets"""
+        self.assertEqual(self.router.choose(2000, budget_ms=300)[0], "bert")
+        for _ in range(100):
+            self.router.record("bert", 2000, 900, self.router.curves["bert"].predict(2000))
+
+        self.assertEqual(self.router.choose(2000, budget_ms=300)[0], "spacy_bert")
+
+    def test_stats(self):
+        """Test decisions and prediction error in the stats"""
+        self.router.choose(1000)
+        self.router.record("bert", 1000, 150, 120)
+
+        stats = self.router.get_stats()["models"]["bert"]
+        self.assertEqual((stats["decisions"], stats["observations"]), (1, 1))
+        self.assertEqual(stats["mean_abs_error_ms"], 30)
+        self.assertEqual(stats["mean_abs_pct_error"], 0.2)
+        self.assertIsNone(self.router.get_stats()["models"]["spacy"]["mean_abs_error_ms"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ner_cache import NERResultCache, ArtifactDigests
+
+ENTITIES = [{"text": "John Doe", "label": "LESSOR_NAME", "start": 10, "end": 18}]
+
+
+class TestNERResultCache(unittest.TestCase):
+    """Test cases for the content-addressed NER result cache"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_hit_and_miss(self):
+        """Test that a stored text is found and counted"""
+        cache = NERResultCache(1024 * 1024)
+        self.assertIsNone(cache.get("bert", "v1", "lease text"))
+        cache.put("bert", "v1", "lease text", ENTITIES)
+
+        self.assertEqual(cache.get("bert", "v1", "lease text"), ENTITIES)
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    def test_key_includes_model_and_digest(self):
+        """Test that other models and other model artifacts don't share entries"""
+        cache = NERResultCache(1024 * 1024)
+        cache.put("bert", "v1", "lease text", ENTITIES)
+
+        self.assertIsNone(cache.get("spacy", "v1", "lease text"))
+        self.assertIsNone(cache.get("bert", "v2", "lease text"))
+
+    def test_size_based_lru_eviction(self):
+        """Test that the least recently used entries go first once the byte budget is exceeded"""
+        entry_size = len('[{"text":"John Doe","label":"LESSOR_NAME","start":10,"end":18}]')
+        cache = NERResultCache(entry_size * 2)
+        cache.put("bert", "v1", "a", ENTITIES)
+        cache.put("bert", "v1", "b", ENTITIES)
+        cache.get("bert", "v1", "a")
+        cache.put("bert", "v1", "c", ENTITIES)
+
+        self.assertIsNotNone(cache.get("bert", "v1", "a"))
+        self.assertIsNone(cache.get("bert", "v1", "b"))
+        self.assertIsNotNone(cache.get("bert", "v1", "c"))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+        self.assertLessEqual(cache.get_stats()["bytes"], entry_size * 2)
+
+    def test_disk_tier_survives_restart(self):
+        """Test that a new cache over the same directory finds earlier entries"""
+        NERResultCache(1024 * 1024, self.tmp_dir).put("bert", "v1", "lease text", ENTITIES)
+
+        restarted = NERResultCache(1024 * 1024, self.tmp_dir)
+        self.assertEqual(restarted.get("bert", "v1", "lease text"), ENTITIES)
+        self.assertEqual(restarted.get_stats()["disk_hits"], 1)
+        # Promoted to the memory tier
+        self.assertEqual(restarted.get("bert", "v1", "lease text"), ENTITIES)
+        self.assertEqual(restarted.get_stats()["hits"], 1)
+
+    def test_new_digest_removes_stale_disk_entries(self):
+        """Test that entries of replaced model files are deleted from disk"""
+        NERResultCache(1024 * 1024, self.tmp_dir).put("bert", "v1", "lease text", ENTITIES)
+        cache = NERResultCache(1024 * 1024, self.tmp_dir)
+        cache.put("bert", "v2", "other text", ENTITIES)
+
+        self.assertEqual(os.listdir(os.path.join(self.tmp_dir, "bert")), ["v2"])
+        self.assertIsNone(cache.get("bert", "v1", "lease text"))
+
+
+class TestArtifactDigests(unittest.TestCase):
+    """Test cases for model artifact digests"""
+
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.model_dir, "weights.bin"), "wb") as f:
+            f.write(b"weights v1")
+
+    def tearDown(self):
+        shutil.rmtree(self.model_dir)
+
+    def test_digest_changes_with_model_files(self):
+        """Test that editing a model file changes the digest"""
+        digests = ArtifactDigests(check_interval=0)
+        before = digests.digest([self.model_dir])
+        self.assertEqual(digests.digest([self.model_dir]), before)
+
+        with open(os.path.join(self.model_dir, "weights.bin"), "wb") as f:
+            f.write(b"weights v2, retrained")
+
+        self.assertNotEqual(digests.digest([self.model_dir]), before)
+
+    def test_digest_is_rechecked_after_interval(self):
+        """Test that files are only re-checked every check_interval seconds"""
+        digests = ArtifactDigests(check_interval=60)
+        before = digests.digest([self.model_dir])
+        with open(os.path.join(self.model_dir, "extra.json"), "w") as f:
+            f.write("{}")
+
+        self.assertEqual(digests.digest([self.model_dir]), before)
+        digests.check_interval = 0
+        self.assertNotEqual(digests.digest([self.model_dir]), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
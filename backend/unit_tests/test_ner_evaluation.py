@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ner_evaluation import (ENTITY_COLUMNS, load_golden_data, entity_values, exact_score,
+                            partial_score, evaluate_predictions)
+from main import Entity
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets/golden_data.csv")
+
+
+class TestNerEvaluation(unittest.TestCase):
+    """Test cases for the golden-data accuracy report"""
+
+    def test_load_golden_data(self):
+        """Test that every test lease has a value for every entity type"""
+        golden = load_golden_data(GOLDEN_PATH)
+        self.assertIn("./datasets/dataset-master/testing/Lease_Agreement_Test1.docx", golden)
+        for values in golden.values():
+            self.assertEqual(set(values), set(ENTITY_COLUMNS))
+
+    def test_entity_values(self):
+        """Test that the last entity of each label is the prediction, like the notebooks"""
+        entities = [Entity(text="John Smith", label="LESSOR_NAME", start=0, end=10),
+                    Entity(text="Jane Doe", label="LESSEE_NAME", start=20, end=28),
+                    Entity(text="Someone Else", label="LESSOR_NAME", start=40, end=52)]
+        self.assertEqual(entity_values(entities), {"LESSOR_NAME": "Someone Else", "LESSEE_NAME": "Jane Doe"})
+
+    def test_exact_score_ignores_surrounding_whitespace(self):
+        """Test exact matching"""
+        self.assertEqual(exact_score(" $1,500 ", "$1,500"), 1.0)
+        self.assertEqual(exact_score("$1,500", "$1,600"), 0.0)
+        self.assertEqual(exact_score(None, "$1,500"), 0.0)
+
+    def test_partial_score_buckets(self):
+        """Test that fuzzy similarity is bucketed like the comparison notebook"""
+        self.assertEqual(partial_score("Smith John", "John Smith"), 1.0)
+        self.assertEqual(partial_score("123 Main Street, Springfield", "123 Main Street, Springfeld"), 1.0)
+        self.assertEqual(partial_score("January 1, 2024", "anuary 1, 2024"), 1.0)
+        self.assertEqual(partial_score("1500", "Tianjin Milk Goat Dairy Co., Ltd."), 0.0)
+        self.assertEqual(partial_score(None, "John Smith"), 0.0)
+
+    def test_evaluate_predictions(self):
+        """Test per-entity exact and partial metrics"""
+        golden = {
+            "a.docx": {column: "" for column in ENTITY_COLUMNS},
+            "b.docx": {column: "" for column in ENTITY_COLUMNS}
+        }
+        golden["a.docx"]["LESSOR_NAME"] = "John Smith"
+        golden["b.docx"]["LESSOR_NAME"] = "Acme Holdings LLC"
+        predictions = {
+            "a.docx": {"LESSOR_NAME": "John Smith"},
+            "b.docx": {"LESSOR_NAME": "Acme Holdings"}
+        }
+
+        report = evaluate_predictions(predictions, golden)
+
+        self.assertEqual(report["exact"]["LESSOR_NAME"]["true_positives"], 1)
+        self.assertEqual(report["exact"]["LESSOR_NAME"]["f1_score"], 0.5)
+        self.assertEqual(report["partial"]["LESSOR_NAME"]["true_positives"], 2)
+        self.assertEqual(report["partial"]["LESSOR_NAME"]["f1_score"], 1.0)
+        self.assertEqual(report["exact"]["RENT_AMOUNT"]["total"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from transformers import AutoConfig, AutoTokenizer, BertConfig, BertForTokenClassification
+
+import onnx_backend
+from onnx_backend import load_onnx_classifier
+from main import extract_entities_bert_batch
+
+BERT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "legalBert/legalbert-ner-model-100")
+
+
+@unittest.skipIf(onnx_backend.ort is None, "onnxruntime is not installed")
+class TestOnnxBackend(unittest.TestCase):
+    """Test cases for the ONNX Runtime BERT backend"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Export a small randomly initialised model with the LegalBERT labels and tokenizer"""
+        cls.tmp_dir = tempfile.mkdtemp()
+        cls.model_dir = os.path.join(cls.tmp_dir, "model")
+        labels = AutoConfig.from_pretrained(BERT_DIR).id2label
+        torch.manual_seed(0)
+        cls.model = BertForTokenClassification(BertConfig(
+            hidden_size=32, num_hidden_layers=2, num_attention_heads=2, intermediate_size=64,
+            id2label=labels, label2id={label: index for index, label in labels.items()}
+        ))
+        cls.model.eval()
+        cls.model.save_pretrained(cls.model_dir)
+        cls.tokenizer = AutoTokenizer.from_pretrained(BERT_DIR)
+        cls.tokenizer.save_pretrained(cls.model_dir)
+        cls.onnx_path = os.path.join(cls.tmp_dir, "onnx", "model.onnx")
+        cls.classifier = load_onnx_classifier(cls.model_dir, cls.onnx_path)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp_dir)
+
+    def test_export_writes_onnx_file(self):
+        """Test that loading exported the model once"""
+        self.assertTrue(os.path.exists(self.onnx_path))
+        self.assertFalse(os.path.exists(f"{self.onnx_path}.tmp"))
+
+    def test_stale_export_is_redone(self):
+        """Test that retrained weights newer than the export are exported again, and unchanged ones are not"""
+        with patch('onnx_backend.export_to_onnx', wraps=onnx_backend.export_to_onnx) as mock_export:
+            load_onnx_classifier(self.model_dir, self.onnx_path)
+            mock_export.assert_not_called()
+
+            weights = os.path.join(self.model_dir, "model.safetensors")
+            original = os.path.getmtime(weights)
+            later = time.time() + 60
+            os.utime(weights, (later, later))
+            try:
+                load_onnx_classifier(self.model_dir, self.onnx_path)
+            finally:
+                os.utime(weights, (original, original))
+        mock_export.assert_called_once_with(self.model_dir, self.onnx_path)
+
+    def test_logits_match_pytorch_for_any_shape(self):
+        """Test that the dynamic axes accept other batch and sequence sizes with the same logits"""
+        input_ids = torch.randint(1000, 2000, (3, 40))
+        attention_mask = torch.ones_like(input_ids)
+        attention_mask[1, 25:] = 0
+
+        with torch.no_grad():
+            expected = self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+        actual = self.classifier(input_ids=input_ids, attention_mask=attention_mask).logits
+
+        self.assertEqual(actual.shape, expected.shape)
+        self.assertTrue(torch.allclose(actual, expected, atol=1e-4))
+
+    def test_entities_match_pytorch_backend(self):
+        """Test that both backends extract the same entities through the shared windowing code"""
+        texts = [
+            "This lease is made between John Smith and Jane Doe for 123 Main Street. " * 20,
+            "Monthly rent is $1,500 payable on the first day of each month."
+        ]
+        settings = {"tokenizer": self.tokenizer, "sliding_window": True, "window_size": 64, "stride": 48}
+
+        expected = extract_entities_bert_batch(texts, {**settings, "model": self.model}, batch_size=4)
+        actual = extract_entities_bert_batch(texts, {**settings, "model": self.classifier}, batch_size=4)
+
+        self.assertEqual(actual, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from paragraph_memo import split_paragraphs, paragraph_hit_rate, ParagraphStats
+
+
+class TestParagraphMemo(unittest.TestCase):
+    """Test cases for paragraph splitting and the paragraph hit rate"""
+
+    def test_split_paragraphs_keeps_document_offsets(self):
+        """Test that blank lines are skipped and offsets point at the stripped paragraphs"""
+        text = "LEASE AGREEMENT\n\n   Tenant shall maintain the premises.  \n\t\nRent is $1,500."
+
+        paragraphs = split_paragraphs(text)
+
+        self.assertEqual([paragraph for _, paragraph in paragraphs],
+                         ["LEASE AGREEMENT", "Tenant shall maintain the premises.", "Rent is $1,500."])
+        for offset, paragraph in paragraphs:
+            self.assertEqual(text[offset:offset + len(paragraph)], paragraph)
+
+    def test_split_paragraphs_of_empty_text(self):
+        """Test that a text without content has no paragraphs"""
+        self.assertEqual(split_paragraphs(""), [])
+        self.assertEqual(split_paragraphs("\n \n"), [])
+
+    def test_paragraph_hit_rate(self):
+        """Test that paragraphs seen in earlier documents count as hits"""
+        documents = [
+            "Lease between John Smith and ACME.\nTenant shall maintain the premises.",
+            "Lease between Jane Doe and ACME.\nTenant shall maintain the premises.",
+            "Tenant shall maintain the premises."
+        ]
+
+        stats = paragraph_hit_rate(documents)
+
+        self.assertEqual((stats["paragraphs"], stats["unique_paragraphs"]), (5, 3))
+        self.assertAlmostEqual(stats["hit_rate"], 2 / 5)
+        self.assertGreater(stats["char_hit_rate"], 0)
+
+    def test_paragraph_stats(self):
+        """Test the served-from-cache share of paragraphs"""
+        stats = ParagraphStats()
+        self.assertEqual(stats.get_stats()["hit_rate"], 0.0)
+        stats.record(10, 4)
+        stats.record(10, 1)
+        self.assertEqual(stats.get_stats(), {"paragraphs": 20, "computed": 5, "hit_rate": 0.75})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from transformers import AutoTokenizer, BertConfig, BertForTokenClassification
+
+from distill_student import build_chunks
+from prune_bert import remaining_heads, score_heads, prune_level, passes_guard
+from main import load_bert_model
+
+BERT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "legalBert/legalbert-ner-model-100")
+
+
+class TestPruneBert(unittest.TestCase):
+    """Test cases for structured layer and head pruning"""
+
+    def setUp(self):
+        """A small randomly initialised token classifier"""
+        torch.manual_seed(0)
+        self.model = BertForTokenClassification(BertConfig(
+            hidden_size=32, num_hidden_layers=4, num_attention_heads=4, intermediate_size=64, num_labels=8
+        ))
+        self.model.eval()
+        self.input_ids = torch.randint(100, 1000, (2, 12))
+
+    def scores(self):
+        """Importance that grows with the layer and head index"""
+        return {(layer, head): float(layer * 10 + head)
+                for layer in range(self.model.config.num_hidden_layers)
+                for head in remaining_heads(self.model, layer)}
+
+    def test_score_heads_covers_remaining_heads(self):
+        """Test that every head left in the model gets a score"""
+        tokenizer = AutoTokenizer.from_pretrained(BERT_DIR)
+        text = "This lease is between John Smith and Jane Doe."
+        start = text.index("John Smith")
+        chunks = build_chunks(tokenizer, [text], [[(start, start + 10, 1)]], max_length=32)
+        self.model.prune_heads({2: [1]})
+
+        scores = score_heads(self.model, chunks, tokenizer.pad_token_id)
+
+        self.assertEqual(len(scores), 4 * 4 - 1)
+        self.assertNotIn((2, 1), scores)
+        self.assertTrue(all(score >= 0 for score in scores.values()))
+
+    def test_prune_level_drops_least_important_layers_and_heads(self):
+        """Test that the weakest layer goes first and every layer keeps a head"""
+        self.model.prune_heads({1: [0, 2]})
+
+        prune_level(self.model, self.scores(), num_layers=1, num_heads=3)
+
+        self.assertEqual(self.model.config.num_hidden_layers, 3)
+        self.assertEqual(len(self.model.bert.encoder.layer), 3)
+        # Old layer 1 is now layer 0; it keeps one head, so the third pruned head comes from layer 1
+        self.assertEqual(remaining_heads(self.model, 0), [3])
+        self.assertEqual(remaining_heads(self.model, 1), [2, 3])
+        self.assertEqual(remaining_heads(self.model, 2), [0, 1, 2, 3])
+
+    def test_pruned_checkpoint_is_served_by_load_bert_model(self):
+        """Test that the saved pruned model reloads with the same structure and outputs"""
+        prune_level(self.model, self.scores(), num_layers=2, num_heads=2)
+        with torch.no_grad():
+            expected = self.model(input_ids=self.input_ids).logits
+
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            self.model.save_pretrained(tmp_dir)
+            AutoTokenizer.from_pretrained(BERT_DIR).save_pretrained(tmp_dir)
+            model_dict = load_bert_model(tmp_dir)
+            with torch.no_grad():
+                actual = model_dict["model"](input_ids=self.input_ids).logits
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        self.assertEqual(model_dict["model"].config.num_hidden_layers, 2)
+        self.assertTrue(torch.allclose(actual, expected, atol=1e-6))
+
+    def test_accuracy_guard(self):
+        """Test the absolute and relative per-entity F1 thresholds"""
+        baseline = {"LESSOR_NAME": 0.9, "RENT_AMOUNT": 0.6}
+
+        self.assertTrue(passes_guard({"LESSOR_NAME": 0.88, "RENT_AMOUNT": 0.58}, baseline, None, 0.05))
+        self.assertFalse(passes_guard({"LESSOR_NAME": 0.80, "RENT_AMOUNT": 0.60}, baseline, None, 0.05))
+        self.assertFalse(passes_guard({"LESSOR_NAME": 0.90, "RENT_AMOUNT": 0.60}, baseline, 0.7, None))
+        self.assertTrue(passes_guard({"LESSOR_NAME": 0.75, "RENT_AMOUNT": 0.75}, baseline, 0.7, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from transformers import BertConfig, BertForTokenClassification
+
+import quantization
+from quantization import load_quantized_model
+
+
+class TestQuantization(unittest.TestCase):
+    """Test cases for the cached int8 BERT variant"""
+
+    def setUp(self):
+        """Save a small randomly initialised token classifier"""
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_dir = os.path.join(self.tmp_dir, "model")
+        self.cache_path = os.path.join(self.tmp_dir, "quantized", "model-int8.pt")
+        torch.manual_seed(0)
+        self.model = BertForTokenClassification(BertConfig(
+            hidden_size=64, num_hidden_layers=2, num_attention_heads=2, intermediate_size=128, num_labels=8
+        ))
+        self.model.eval()
+        self.model.save_pretrained(self.model_dir)
+        self.input_ids = torch.randint(100, 1000, (2, 30))
+        self.attention_mask = torch.ones_like(self.input_ids)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def logits(self, model):
+        with torch.no_grad():
+            return model(input_ids=self.input_ids, attention_mask=self.attention_mask).logits
+
+    def test_linear_layers_are_quantized(self):
+        """Test that the linear layers are replaced by dynamic int8 ones"""
+        model = load_quantized_model(self.model_dir, self.cache_path)
+
+        self.assertNotIn(torch.nn.Linear, {type(module) for module in model.modules()})
+        self.assertIsInstance(model.classifier, torch.ao.nn.quantized.dynamic.Linear)
+        self.assertTrue(torch.allclose(self.logits(model), self.logits(self.model), atol=0.1))
+
+    def test_second_load_uses_the_cache(self):
+        """Test that the cached weights are loaded without quantizing again"""
+        first = load_quantized_model(self.model_dir, self.cache_path)
+        self.assertTrue(os.path.exists(self.cache_path))
+
+        with patch('quantization.build_quantized_cache') as mock_build:
+            second = load_quantized_model(self.model_dir, self.cache_path)
+        mock_build.assert_not_called()
+        self.assertTrue(torch.equal(self.logits(first), self.logits(second)))
+
+    def test_stale_cache_is_rebuilt(self):
+        """Test that retrained weights newer than the cache are quantized again"""
+        load_quantized_model(self.model_dir, self.cache_path)
+        weights = os.path.join(self.model_dir, "model.safetensors")
+        later = time.time() + 60
+        os.utime(weights, (later, later))
+
+        with patch('quantization.build_quantized_cache', wraps=quantization.build_quantized_cache) as mock_build:
+            load_quantized_model(self.model_dir, self.cache_path)
+        mock_build.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from region_prefilter import candidate_windows, is_covered, PrefilterStats
+
+FILLER = "The parties agree to keep the common areas clean and free of obstructions at all times. " * 5
+
+
+class TestRegionPrefilter(unittest.TestCase):
+    """Test cases for the cue-phrase candidate window prefilter"""
+
+    def test_windows_surround_cues(self):
+        """Test that windows cover the cue and its values but skip clauses without cues"""
+        text = FILLER + "The Tenant shall pay a security deposit of $1,500 on signing. " + FILLER
+
+        windows = candidate_windows(text, radius=20)
+
+        self.assertEqual(len(windows), 1)
+        self.assertTrue(is_covered(windows, text.index("$1,500"), text.index("$1,500") + 6))
+        self.assertLess(windows[0][1] - windows[0][0], len(text) / 4)
+
+    def test_windows_do_not_cut_words(self):
+        """Test that window edges fall on whitespace or the ends of the text"""
+        text = FILLER + "The term commences on January 1, 2024. " + FILLER
+
+        for start, end in candidate_windows(text, radius=13):
+            self.assertTrue(start == 0 or text[start - 1].isspace())
+            self.assertTrue(end == len(text) or text[end].isspace())
+
+    def test_overlapping_windows_are_merged(self):
+        """Test that nearby cues share one window"""
+        text = "LESSOR: ACME Ltd.\nLESSEE: John Doe\n" + FILLER
+
+        windows = candidate_windows(text, radius=10)
+
+        self.assertEqual(len(windows), 1)
+        self.assertTrue(is_covered(windows, text.index("John Doe"), text.index("John Doe") + 8))
+
+    def test_party_cue_spans_between_and(self):
+        """Test the "between ... and ..." cue"""
+        text = FILLER + "This lease is made between Jane Roe and Acme Holdings. " + FILLER
+
+        windows = candidate_windows(text, radius=15)
+
+        self.assertTrue(is_covered(windows, text.index("Jane Roe"), text.index("Acme Holdings") + 13))
+
+    def test_text_without_cues(self):
+        """Test that a text without cues has no windows"""
+        self.assertEqual(candidate_windows(FILLER), [])
+
+    def test_stats(self):
+        """Test the share of characters kept"""
+        stats = PrefilterStats()
+        stats.record("x" * 100, [(0, 10), (50, 60)])
+
+        self.assertEqual(stats.get_stats()["kept_share"], 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from transformers import AutoTokenizer, BertConfig, BertForTokenClassification
+
+from shared_encoding import EncodingCache, vocab_fingerprint
+import main
+
+BERT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "legalBert/legalbert-ner-model-100")
+TEXT = "This lease is made between John Smith and Jane Doe for 12 Oak Road."
+
+
+class CountingTokenizer:
+    """Wraps a tokenizer and records the texts it tokenizes"""
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.texts = []
+
+    def __call__(self, texts, **kwargs):
+        self.texts.extend(texts)
+        return self.tokenizer(texts, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.tokenizer, name)
+
+
+class TestSharedEncoding(unittest.TestCase):
+    """Test cases for the tokenization shared between BERT backends"""
+
+    def setUp(self):
+        self.tokenizer = AutoTokenizer.from_pretrained(BERT_DIR)
+
+    def test_vocab_fingerprint(self):
+        """Test that the same vocabulary gives the same fingerprint and other normalization a different one"""
+        self.assertEqual(vocab_fingerprint(self.tokenizer), vocab_fingerprint(AutoTokenizer.from_pretrained(BERT_DIR)))
+        cased = AutoTokenizer.from_pretrained(BERT_DIR, do_lower_case=False)
+        self.assertNotEqual(vocab_fingerprint(self.tokenizer), vocab_fingerprint(cased))
+
+    def test_encode_matches_tokenizer_and_is_reused(self):
+        """Test that cached encodings equal a direct tokenization and are not tokenized again"""
+        cache = EncodingCache()
+        counting = CountingTokenizer(self.tokenizer)
+        expected = self.tokenizer([TEXT], add_special_tokens=False, return_offsets_mapping=True)
+
+        first = cache.encode(counting, [TEXT, "Rent is $1,500."], "vocab")
+        second = cache.encode(counting, [TEXT], "vocab")
+
+        self.assertEqual(first[0]["input_ids"], expected["input_ids"][0])
+        self.assertEqual(first[0]["offsets"], expected["offset_mapping"][0])
+        self.assertEqual(first[0]["word_ids"], expected.word_ids(0))
+        self.assertIs(second[0], first[0])
+        self.assertEqual(counting.texts, [TEXT, "Rent is $1,500."])
+        self.assertEqual((cache.get_stats()["hits"], cache.get_stats()["misses"]), (1, 2))
+
+    def test_other_vocabularies_are_not_shared(self):
+        """Test that encodings are only reused under the same vocabulary fingerprint"""
+        cache = EncodingCache()
+        counting = CountingTokenizer(self.tokenizer)
+
+        cache.encode(counting, [TEXT], "vocab-a")
+        cache.encode(counting, [TEXT], "vocab-b")
+        cache.encode(counting, [TEXT], None)
+
+        self.assertEqual(counting.texts, [TEXT, TEXT, TEXT])
+
+    def test_least_recently_used_documents_are_dropped(self):
+        """Test that the cache keeps at most max_entries documents"""
+        cache = EncodingCache(max_entries=2)
+        for text in ["a", "b", "c"]:
+            cache.encode(self.tokenizer, [text], "vocab")
+
+        self.assertEqual(cache.get_stats()["entries"], 2)
+
+    def test_bert_backends_share_tokenization(self):
+        """Test that a second BERT backend on the same vocabulary reuses the first one's tokens"""
+        torch.manual_seed(0)
+        config = BertConfig(vocab_size=self.tokenizer.vocab_size, hidden_size=32, num_hidden_layers=1,
+                            num_attention_heads=2, intermediate_size=64, num_labels=3)
+        config.id2label = {0: "O", 1: "B-LESSEE_NAME", 2: "I-LESSEE_NAME"}
+        counting = CountingTokenizer(self.tokenizer)
+        backends = [
+            {"tokenizer": counting, "vocab_key": vocab_fingerprint(self.tokenizer),
+             "model": BertForTokenClassification(config).eval(), "window_size": 16, "stride": 8}
+            for _ in range(2)
+        ]
+
+        with patch('main.encoding_cache', EncodingCache()) as cache:
+            first = main.extract_entities_bert_batch([TEXT], backends[0])
+            main.extract_entities_bert_batch([TEXT], backends[1])
+            uncached = main.extract_entities_bert_batch([TEXT], dict(backends[0], vocab_key=None))
+
+        self.assertEqual(counting.texts, [TEXT, TEXT])
+        self.assertEqual(first, uncached)
+        self.assertGreater(cache.get_stats()["encoder_ms"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
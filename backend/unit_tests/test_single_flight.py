@@ -0,0 +1,152 @@
+import unittest
+import sys
+import os
+import asyncio
+from unittest.mock import patch
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from admission import DeadlineExceededError, deadline_after
+from single_flight import SingleFlight
+import main
+from main import Entity
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Test cases for coalescing identical in-flight work"""
+
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.computed = []
+
+    async def slow_upper(self, keys, leading):
+        self.computed.extend(keys[index] for index in leading)
+        await asyncio.sleep(0.05)
+        return [keys[index].upper() for index in leading]
+
+    async def test_concurrent_duplicates_share_one_computation(self):
+        """Test that only the first caller for a key computes it"""
+        keys = ["a", "b"]
+        results = await asyncio.gather(*(
+            self.flight.run_many(keys, lambda leading: self.slow_upper(keys, leading)) for _ in range(3)
+        ))
+
+        self.assertEqual(results, [["A", "B"]] * 3)
+        self.assertEqual(self.computed, ["a", "b"])
+        self.assertEqual(self.flight.get_stats(), {"leaders": 2, "coalesced": 4, "retried": 0, "in_flight": 0})
+
+    async def test_partial_overlap_and_repeated_keys(self):
+        """Test that a call only computes the keys not already in flight, and each key once"""
+        first = asyncio.ensure_future(self.flight.run_many(["a"], lambda leading: self.slow_upper(["a"], leading)))
+        await asyncio.sleep(0)
+        keys = ["a", "b", "b"]
+        second = await self.flight.run_many(keys, lambda leading: self.slow_upper(keys, leading))
+
+        self.assertEqual((await first, second), (["A"], ["A", "B", "B"]))
+        self.assertEqual(self.computed, ["a", "b"])
+
+    async def test_errors_reach_waiters_and_are_not_remembered(self):
+        """Test that a failed computation fails its waiters and the next call computes again"""
+        async def failing(leading):
+            await asyncio.sleep(0.05)
+            raise RuntimeError("model exploded")
+
+        results = await asyncio.gather(self.flight.run_many(["a"], failing), self.flight.run_many(["a"], failing),
+                                       return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(await self.flight.run_many(["a"], lambda leading: self.slow_upper(["a"], leading)), ["A"])
+
+    async def test_cancelled_waiter_does_not_cancel_the_leader(self):
+        """Test that a duplicate giving up leaves the shared computation running"""
+        leader = asyncio.ensure_future(self.flight.run_many(["a"], lambda leading: self.slow_upper(["a"], leading)))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(self.flight.run_many(["a"], lambda leading: self.slow_upper(["a"], leading)))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+
+        self.assertEqual(await leader, ["A"])
+
+    async def test_leader_deadline_is_not_shared(self):
+        """Test that a waiter without a deadline computes the key itself when the leader's deadline passes"""
+        async def leader_compute(leading):
+            await asyncio.sleep(0.05)
+            raise DeadlineExceededError("leader deadline")
+
+        leader = asyncio.ensure_future(self.flight.run_many(["a"], leader_compute, deadline_after(50)))
+        await asyncio.sleep(0)
+        waiter = await self.flight.run_many(["a"], lambda leading: self.slow_upper(["a"], leading))
+
+        with self.assertRaises(DeadlineExceededError):
+            await leader
+        self.assertEqual(waiter, ["A"])
+        self.assertEqual(self.flight.get_stats()["retried"], 1)
+
+    async def test_leader_cancellation_is_not_shared(self):
+        """Test that a waiter computes the key itself when the leader is cancelled"""
+        leader = asyncio.ensure_future(self.flight.run_many(["a"], lambda leading: self.slow_upper(["a"], leading)))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(self.flight.run_many(["a"], lambda leading: self.slow_upper(["a"], leading)))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        self.assertEqual(await waiter, ["A"])
+        self.assertEqual(self.computed, ["a", "a"])
+
+    async def test_waiter_deadline_only_bounds_its_own_wait(self):
+        """Test that a waiter with a short deadline gives up while the leader without one finishes"""
+        leader = asyncio.ensure_future(self.flight.run_many(["a"], lambda leading: self.slow_upper(["a"], leading)))
+        await asyncio.sleep(0)
+
+        with self.assertRaises(DeadlineExceededError):
+            await self.flight.run_many(["a"], lambda leading: self.slow_upper(["a"], leading), deadline_after(10))
+        self.assertEqual(await leader, ["A"])
+        self.assertEqual(self.computed, ["a"])
+
+    async def test_waiter_without_deadline_joins_leader_with_short_deadline(self):
+        """Test that a request without a deadline joining a leader with a 50 ms one still gets its entities"""
+        entity = Entity(text="John Doe", label="LESSEE_NAME", start=0, end=8)
+
+        async def leader_extract(texts):
+            await asyncio.sleep(0.05)
+            raise DeadlineExceededError("Deadline passed while waiting for bert")
+
+        async def waiter_extract(texts):
+            return [[entity] for _ in texts]
+
+        with patch('main.ner_cache', None), patch('main.single_flight', SingleFlight()):
+            leader = asyncio.ensure_future(
+                main.extract_with_cache("bert", ["John Doe"], leader_extract, deadline=deadline_after(50))
+            )
+            await asyncio.sleep(0)
+            waiter = await main.extract_with_cache("bert", ["John Doe"], waiter_extract)
+
+            with self.assertRaises(DeadlineExceededError):
+                await leader
+        self.assertEqual(waiter, [[entity]])
+
+    async def test_cache_miss_storm_runs_the_model_once(self):
+        """Test that concurrent requests for an uncached text are extracted once and then cached"""
+        calls = []
+        entity = Entity(text="John Doe", label="LESSEE_NAME", start=0, end=8)
+
+        async def extract(texts):
+            calls.extend(texts)
+            await asyncio.sleep(0.05)
+            return [[entity] for _ in texts]
+
+        with patch('main.ner_cache', main.NERResultCache(1024 * 1024)), \
+             patch('main.model_digest', lambda model_name: "digest"), \
+             patch('main.single_flight', SingleFlight()) as flight:
+            results = await asyncio.gather(*(main.extract_with_cache("bert", ["John Doe"], extract) for _ in range(5)))
+            cached = await main.extract_with_cache("bert", ["John Doe"], extract)
+
+        self.assertEqual(calls, ["John Doe"])
+        self.assertEqual(results, [[[entity]]] * 5)
+        self.assertEqual(cached, [[entity]])
+        self.assertEqual(flight.get_stats()["coalesced"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import spacy
+from spacy_pipeline import required_components, excluded_components, load_pipeline_for
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def listener(upstream):
+    """Config of a component model that listens to an upstream embedding component"""
+    return {"@architectures": "spacy.TransitionBasedParser.v2",
+            "tok2vec": {"@architectures": "spacy.Tok2VecListener.v1", "upstream": upstream}}
+
+
+class TestSpacyPipeline(unittest.TestCase):
+    """Test cases for working out the components a spaCy pipe depends on"""
+
+    def test_lease_model_ner_is_standalone(self):
+        """Test that the lease model's ner embeds tokens itself and needs nothing else"""
+        config = spacy.util.load_config(os.path.join(BACKEND_DIR, "spacy/lease_ner_model/config.cfg"))
+
+        self.assertEqual(required_components(config, "ner"), ["ner"])
+        self.assertEqual(excluded_components(config, "ner"),
+                         ["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer"])
+
+    def test_spacy_bert_ner_does_not_need_the_transformer(self):
+        """Test that the spaCy+LegalBERT ner, which uses its own HashEmbedCNN, drops the transformer"""
+        config = spacy.util.load_config(os.path.join(BACKEND_DIR, "spacy_legalBert/custom_legal_ner_spacy_100/config.cfg"))
+
+        self.assertEqual(required_components(config, "ner"), ["ner"])
+        self.assertEqual(excluded_components(config, "ner"), ["transformer"])
+
+    def test_transformer_listener_keeps_the_transformer(self):
+        """Test that a ner listening to the transformer keeps it"""
+        config = {
+            "nlp": {"pipeline": ["transformer", "ner"]},
+            "components": {
+                "transformer": {"factory": "transformer"},
+                "ner": {"factory": "ner", "model": {
+                    "@architectures": "spacy.TransitionBasedParser.v2",
+                    "tok2vec": {"@architectures": "spacy-transformers.TransformerListener.v1", "upstream": "*"}
+                }}
+            }
+        }
+
+        self.assertEqual(required_components(config, "ner"), ["transformer", "ner"])
+
+    def test_listener_keeps_its_upstream(self):
+        """Test that a ner listening to a shared tok2vec keeps that tok2vec"""
+        config = {
+            "nlp": {"pipeline": ["tok2vec", "tagger", "ner"]},
+            "components": {
+                "tok2vec": {"factory": "tok2vec", "model": {"@architectures": "spacy.Tok2Vec.v2"}},
+                "tagger": {"factory": "tagger", "model": listener("tok2vec")},
+                "ner": {"factory": "ner", "model": listener("tok2vec")}
+            }
+        }
+
+        self.assertEqual(required_components(config, "ner"), ["tok2vec", "ner"])
+        self.assertEqual(excluded_components(config, "ner"), ["tagger"])
+
+    def test_wildcard_listener_keeps_preceding_embedders(self):
+        """Test that upstream '*' keeps the embedding components that run before the pipe"""
+        config = {
+            "nlp": {"pipeline": ["tok2vec", "ner", "late_tok2vec"]},
+            "components": {
+                "tok2vec": {"factory": "tok2vec"},
+                "ner": {"factory": "ner", "model": listener("*")},
+                "late_tok2vec": {"factory": "tok2vec"}
+            }
+        }
+
+        self.assertEqual(required_components(config, "ner"), ["tok2vec", "ner"])
+
+    def test_unknown_target(self):
+        """Test that asking for a component outside the pipeline raises"""
+        config = {"nlp": {"pipeline": ["tok2vec"]}, "components": {"tok2vec": {"factory": "tok2vec"}}}
+        with self.assertRaises(ValueError):
+            required_components(config, "ner")
+
+    @patch('spacy_pipeline.spacy.load')
+    def test_load_pipeline_for_excludes_unneeded_components(self, mock_spacy_load):
+        """Test that loading excludes everything the target doesn't need"""
+        path = os.path.join(BACKEND_DIR, "spacy/lease_ner_model")
+        load_pipeline_for(path, "ner")
+
+        mock_spacy_load.assert_called_once_with(
+            path, exclude=["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer"]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
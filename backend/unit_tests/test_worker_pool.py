@@ -0,0 +1,80 @@
+import unittest
+import sys
+import os
+import asyncio
+
+# Add the parent directory to the path to import the modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from worker_pool import ModelWorkerPool
+
+# Stands in for the models the parent loads before forking
+SHARED_STATE = {}
+
+def read_shared_state(key):
+    """Return a value from the parent's memory along with the worker's pid"""
+    return os.getpid(), SHARED_STATE.get(key)
+
+def mark_warmed_up():
+    """Record the warm-up in the worker's own memory"""
+    SHARED_STATE["warmed_up"] = os.getpid()
+
+def fail_in_worker(message):
+    """Raise inside a worker"""
+    raise ValueError(message)
+
+class TestModelWorkerPool(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the pre-fork model worker pool"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        SHARED_STATE["weights"] = list(range(1000))
+        self.pool = ModelWorkerPool(2, threads_per_worker=1)
+    
+    def tearDown(self):
+        """Stop the workers"""
+        self.pool.shutdown()
+        SHARED_STATE.clear()
+    
+    async def test_workers_inherit_parent_state(self):
+        """Test that workers see what the parent loaded before forking"""
+        self.pool.start()
+        results = await asyncio.gather(*(self.pool.run(read_shared_state, "weights") for _ in range(8)))
+        
+        for pid, weights in results:
+            self.assertNotEqual(pid, os.getpid())
+            self.assertEqual(weights, list(range(1000)))
+        self.assertLessEqual(len({pid for pid, _ in results}), 2)
+        
+        stats = self.pool.get_stats()
+        self.assertTrue(stats["started"])
+        self.assertEqual(stats["completed"], 8)
+        self.assertEqual(stats["in_flight"], 0)
+    
+    async def test_every_worker_warms_up_after_the_fork(self):
+        """Test that the warm-up runs in each worker, not in the parent"""
+        self.pool.start(warmup=mark_warmed_up)
+        results = await asyncio.gather(*(self.pool.run(read_shared_state, "warmed_up") for _ in range(8)))
+        
+        for pid, warmed_up in results:
+            self.assertEqual(warmed_up, pid)
+        self.assertNotIn("warmed_up", SHARED_STATE)
+    
+    async def test_worker_errors_are_raised_in_parent(self):
+        """Test that exceptions in a worker reach the caller"""
+        self.pool.start()
+        with self.assertRaises(ValueError):
+            await self.pool.run(fail_in_worker, "bad document")
+    
+    async def test_run_requires_start(self):
+        """Test that running before the workers are forked is an error"""
+        with self.assertRaises(RuntimeError):
+            await self.pool.run(read_shared_state, "weights")
+    
+    def test_invalid_worker_count(self):
+        """Test that at least one worker is required"""
+        with self.assertRaises(ValueError):
+            ModelWorkerPool(0)
+
+if __name__ == '__main__':
+    unittest.main()
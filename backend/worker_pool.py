@@ -0,0 +1,102 @@
+import asyncio
+import gc
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+def _init_worker(threads_per_worker: int, warmup: Optional[Callable[[], None]] = None):
+    """Give each forked worker its own share of the CPU threads, then warm it up"""
+    try:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    if warmup is not None:
+        warmup()
+
+
+def _worker_pid(_: int) -> int:
+    """Report the worker's process id; used to fork every worker up front"""
+    return os.getpid()
+
+
+class ModelWorkerPool:
+    """Forked inference workers that share the parent's loaded model weights copy-on-write"""
+
+    def __init__(self, num_workers: int, threads_per_worker: Optional[int] = None):
+        """
+        Initialize the worker pool
+
+        Args:
+            num_workers: Number of inference processes to fork
+            threads_per_worker: torch threads per worker (defaults to an even split of the CPUs)
+        """
+        if num_workers < 1:
+            raise ValueError("num_workers must be at least 1")
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+        self._completed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        """Whether the workers have been forked"""
+        return self._executor is not None
+
+    def start(self, warmup: Optional[Callable[[], None]] = None):
+        """
+        Fork the workers. Call this after the models are loaded and before the parent
+        runs any inference, so the workers inherit the weights and no busy thread pools.
+        Returns once every worker is up and has run warmup, e.g. a first inference per model.
+        """
+        if self.started:
+            return
+        # Move everything loaded so far out of the garbage collector's reach, so collections
+        # in the workers don't write to (and so copy) the pages holding the model objects
+        gc.collect()
+        gc.freeze()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker, warmup)
+        )
+        # The first submission forks every worker at once; fork-context pools don't spawn lazily
+        list(self._executor.map(_worker_pid, range(self.num_workers)))
+        print(f"Forked {self.num_workers} inference workers with {self.threads_per_worker} threads each")
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Send fn(*args) to a worker over the pool's pipes and await the result"""
+        if not self.started:
+            raise RuntimeError("Worker pool has not been started")
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._completed += 1
+
+    def shutdown(self):
+        """Stop the workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            gc.unfreeze()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Worker count, thread budget and request counters"""
+        with self._lock:
+            return {
+                "started": self.started,
+                "workers": self.num_workers,
+                "threads_per_worker": self.threads_per_worker,
+                "in_flight": self._in_flight,
+                "completed": self._completed
+            }